@@ -1,21 +1,47 @@
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+import asyncio
+import json
+import math
 import os
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from utils.file_handler import FileHandler
+from utils.file_handler import FileHandler, FileTooLargeError
+from utils.extraction_pool import ExtractionError
 from services.resume_analyzer import ResumeAnalyzer
 from services.job_matcher import JobMatcher
-from pydantic import BaseModel
-from typing import List, Optional
+from services.batch_matcher import BatchMatcher
+from services.circuit_breaker import CircuitOpenError, mark_degraded, track_degraded
+from services.deadlines import ClientDisconnected, Deadline, cancel_on_disconnect, deadline_stats, run_stage
+from services.combined_analysis import CombinedAnalyzer
+from services.job_index import JobIndex
+from services.llm_cache import llm_cache
+from services.llm_gateway import llm_gateway
+from services.prompt_context import PromptContext
+from services.upload_jobs import STAGES, UploadJobQueue
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from typing import Any, Awaitable, Callable, List, Optional
 
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Worker processes for PDF/DOCX extraction are spawned up front and stopped on exit
+    await asyncio.to_thread(file_handler.extraction_pool.start)
+    # Picks up upload jobs that were queued or running when the server last stopped
+    await upload_jobs.start()
+    yield
+    await upload_jobs.stop()
+    await asyncio.to_thread(file_handler.extraction_pool.shutdown)
+    await llm_gateway.aclose()
+
 app = FastAPI(
     title="JobWiz AI Resume Analyzer",
     description="AI-powered resume analysis and job matching service",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -38,6 +64,38 @@ app.add_middleware(
 file_handler = FileHandler()
 resume_analyzer = ResumeAnalyzer()
 job_matcher = JobMatcher()
+batch_matcher = BatchMatcher(resume_analyzer, job_matcher)
+combined_analyzer = CombinedAnalyzer(resume_analyzer, job_matcher)
+job_index = JobIndex()
+
+# Room for the non-file form fields on top of the resume itself
+UPLOAD_FORM_OVERHEAD = {
+    "/api/upload": 256 * 1024,
+    "/api/match-batch": 4 * 1024 * 1024,
+    "/api/jobs/search": 4 * 1024,
+    "/api/jobs/match": 4 * 1024
+}
+BATCH_MAX_JOBS = int(os.getenv("BATCH_MAX_JOBS", "50"))
+# Default for the upload's `combined` field: one LLM call for all three sections
+UPLOAD_COMBINED_ANALYSIS = os.getenv("UPLOAD_COMBINED_ANALYSIS", "False").lower() == "true"
+# Default for the upload's `async` field: return a job ID at once and process in the background
+UPLOAD_ASYNC = os.getenv("UPLOAD_ASYNC", "False").lower() == "true"
+# Default for the upload's `progressive` field: stream the local analysis first, then the LLM's sections
+UPLOAD_PROGRESSIVE = os.getenv("UPLOAD_PROGRESSIVE", "False").lower() == "true"
+UPLOAD_SECTIONS = ("resume_analysis", "job_matching", "recommendations")
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """Reject oversize uploads from Content-Length before the body is read"""
+    form_overhead = UPLOAD_FORM_OVERHEAD.get(request.url.path)
+    if request.method == "POST" and form_overhead is not None:
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > file_handler.max_file_size + form_overhead:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"File exceeds the {file_handler.max_file_size} byte limit"}
+            )
+    return await call_next(request)
 
 class ResumeSectionRequest(BaseModel):
     section_id: str
@@ -68,65 +126,475 @@ class AIResumeGenerationRequest(BaseModel):
     missing_skills: List[str]
     section_type: str  # "full", "summary", "experience", "skills", "education"
 
+class BatchJob(BaseModel):
+    job_title: str = ""
+    company: str = ""
+    job_description: str
+
+BATCH_JOBS_ADAPTER = TypeAdapter(List[BatchJob])
+
+class IndexedJob(BaseModel):
+    job_id: str
+    job_title: str = ""
+    company: str = ""
+    job_description: str
+
 class InterviewPrepRequest(BaseModel):
     job_title: str
     company: str
     resume_analysis: dict
     job_matching: dict
 
+async def _run_stage(
+    name: str,
+    stage: Awaitable,
+    fallback: Callable[[], Any],
+    progress: Optional[Callable[[str, str], None]] = None,
+    deadline: Optional[Deadline] = None
+) -> Any:
+    """Await one upload stage, isolating its failure (or missed deadline) from the sibling stages"""
+    if progress:
+        progress(name, "running")
+    result = await run_stage(name, stage, fallback, deadline)
+    if progress:
+        progress(name, "done")
+    return result
+
+def _local_sections(resume_text: str, job_description: str) -> dict:
+    """All three sections from the regex and set-based fallbacks, without calling the LLM"""
+    return {
+        "resume_analysis": resume_analyzer._fallback_analysis(resume_text),
+        "job_matching": job_matcher._fallback_match(resume_text, job_description),
+        "recommendations": job_matcher._fallback_recommendations(resume_text, job_description)
+    }
+
+async def _analyze_upload(
+    resume_text: str,
+    job_description: str,
+    combined: bool,
+    progress: Optional[Callable[[str, str], None]] = None,
+    deadline: Optional[Deadline] = None
+) -> dict:
+    """
+    Resume analysis, job matching and recommendations for an extracted resume.
+    `progress(stage, state)` is told when each stage starts and finishes; a stage
+    that runs past its share of `deadline` is cancelled and answered locally.
+    """
+    # Tokenize the resume and job description once for all three prompts
+    context = PromptContext(resume_text, job_description)
+    
+    # Sections answered by the local fallback (LLM failing or its circuit open) are reported as degraded
+    with track_degraded() as degraded:
+        if combined:
+            # One call for all three sections; only sections missing from its answer are re-requested
+            stages = STAGES[1:] if progress else ()
+            for stage in stages:
+                progress(stage, "running")
+            analysis = combined_analyzer.analyze(resume_text, job_description, context)
+            try:
+                sections = await (deadline.run("analyzing", analysis) if deadline else analysis)
+            except asyncio.TimeoutError:
+                print("Combined upload analysis missed its deadline, using local fallbacks")
+                sections = _local_sections(resume_text, job_description)
+            for stage in stages:
+                progress(stage, "done")
+        else:
+            # Analyze resume, match job and generate recommendations concurrently
+            resume_analysis, job_matching, recommendations = await asyncio.gather(
+                _run_stage(
+                    "analyzing",
+                    resume_analyzer.analyze_resume(resume_text, context),
+                    lambda: resume_analyzer._fallback_analysis(resume_text),
+                    progress,
+                    deadline
+                ),
+                _run_stage(
+                    "matching",
+                    job_matcher.match_job(resume_text, job_description, context),
+                    lambda: job_matcher._fallback_match(resume_text, job_description),
+                    progress,
+                    deadline
+                ),
+                _run_stage(
+                    "recommending",
+                    job_matcher.generate_recommendations(resume_text, job_description, context),
+                    lambda: job_matcher._fallback_recommendations(resume_text, job_description),
+                    progress,
+                    deadline
+                )
+            )
+            sections = {
+                "resume_analysis": resume_analysis,
+                "job_matching": job_matching,
+                "recommendations": recommendations
+            }
+    
+    return {
+        **sections,
+        "originalResume": resume_text,
+        "degraded": bool(degraded),
+        "degraded_sections": sorted(degraded)
+    }
+
+async def _process_upload_job(job: dict, progress: Callable[[str, str], None]) -> dict:
+    """Run a queued upload: extract the stored file, then analyze it like a synchronous upload"""
+    progress("extracting", "running")
+    try:
+        resume_text = await file_handler.extract_text_from_bytes(job["file"], job["filename"])
+    except ExtractionError as e:
+        raise ValueError(f"Could not extract text from resume: {str(e)}")
+    if not resume_text:
+        raise ValueError("Could not extract text from resume")
+    progress("extracting", "done")
+    return await _analyze_upload(resume_text, job["job_description"], job["combined"], progress)
+
+upload_jobs = UploadJobQueue(_process_upload_job)
+
+def _job_links(job: dict) -> dict:
+    return {
+        **job,
+        "status_url": f"/api/upload/jobs/{job['job_id']}",
+        "websocket_url": f"/api/upload/jobs/{job['job_id']}/ws"
+    }
+
+async def _read_resume_text(resume: UploadFile) -> str:
+    """Validate an uploaded resume and extract its text, mapping failures to HTTP errors"""
+    try:
+        if not file_handler.is_valid_file_type(resume.filename):
+            raise HTTPException(status_code=400, detail="Invalid file type. Only PDF, DOC, DOCX, and TXT files are allowed.")
+        file_digest, file_size = file_handler.read_upload(resume)
+        return await file_handler.extract_text_from_upload(resume, file_digest, file_size)
+    except HTTPException:
+        raise
+    except FileTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ExtractionError as e:
+        raise HTTPException(status_code=422, detail=f"Could not extract text from resume: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await resume.close()
+
+def _ndjson_response(resume_text: str, jobs: List[dict]) -> StreamingResponse:
+    async def events():
+        async for event in batch_matcher.stream(resume_text, jobs):
+            yield json.dumps(event) + "\n"
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+def _progressive_response(resume_text: str, job_description: str, combined: bool, deadline: Deadline) -> StreamingResponse:
+    """
+    NDJSON upload response: a "provisional" event with the local analysis right away,
+    then a "section" event per section as its LLM answer arrives (replacing the
+    provisional one), then "done" with the degraded sections.
+    """
+    def section_event(section: str, value: Any, degraded: bool) -> dict:
+        return {"type": "section", "section": section, section: value, "degraded": degraded}
+    
+    async def refine(section: str, stage: str, work: Awaitable, fallback: Callable[[], Any]) -> List[dict]:
+        with track_degraded() as degraded:
+            value = await _run_stage(stage, work, fallback, deadline=deadline)
+        return [section_event(section, value, section in degraded)]
+    
+    async def refine_combined() -> List[dict]:
+        result = await _analyze_upload(resume_text, job_description, True, deadline=deadline)
+        return [
+            section_event(section, result[section], section in result["degraded_sections"])
+            for section in UPLOAD_SECTIONS
+        ]
+    
+    async def events():
+        # Local fallbacks only mark sections degraded inside `track_degraded`, so the provisional ones are unmarked
+        local = _local_sections(resume_text, job_description)
+        yield json.dumps({"type": "provisional", **local, "originalResume": resume_text}) + "\n"
+        
+        def provisional(section: str) -> Callable[[], Any]:
+            def fallback():
+                # The client already has the local answer; it stays, reported as degraded
+                mark_degraded(section)
+                return local[section]
+            return fallback
+        
+        if combined:
+            tasks = [asyncio.create_task(refine_combined())]
+        else:
+            context = PromptContext(resume_text, job_description)
+            tasks = [
+                asyncio.create_task(refine(
+                    "resume_analysis", "analyzing",
+                    resume_analyzer.analyze_resume(resume_text, context),
+                    provisional("resume_analysis")
+                )),
+                asyncio.create_task(refine(
+                    "job_matching", "matching",
+                    job_matcher.match_job(resume_text, job_description, context),
+                    provisional("job_matching")
+                )),
+                asyncio.create_task(refine(
+                    "recommendations", "recommending",
+                    job_matcher.generate_recommendations(resume_text, job_description, context),
+                    provisional("recommendations")
+                ))
+            ]
+        degraded = []
+        try:
+            for finished in asyncio.as_completed(tasks):
+                for event in await finished:
+                    if event["degraded"]:
+                        degraded.append(event["section"])
+                    yield json.dumps(event) + "\n"
+            yield json.dumps({"type": "done", "degraded": bool(degraded), "degraded_sections": sorted(degraded)}) + "\n"
+        except Exception as e:
+            # The provisional sections stand; the client keeps them
+            yield json.dumps({"type": "error", "detail": str(e)}) + "\n"
+        finally:
+            # A disconnect cancels this generator, and with it the LLM calls still running
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _retry_after(error: CircuitOpenError) -> int:
+    return max(1, math.ceil(error.retry_after))
+
+async def _complete_text(
+    stream: bool,
+    request: Request,
+    *,
+    endpoint: str,
+    payload: Callable[[str], dict],
+    error: str,
+    use_cache: bool = True,
+    **params
+):
+    """
+    Run one free-text completion and shape it with `payload`. With `stream`, tokens are
+    forwarded as SSE "token" events and the final "done" event carries the same payload.
+    The call is cancelled when the endpoint's deadline passes or the client disconnects.
+    """
+    deadline = Deadline.for_request(endpoint, request.headers)
+    if not stream:
+        try:
+            response = await cancel_on_disconnect(
+                request,
+                deadline.run("completion", llm_gateway.create(endpoint=endpoint, use_cache=use_cache, **params)),
+                endpoint
+            )
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail=f"{error}: deadline exceeded")
+        except CircuitOpenError as e:
+            # Degraded, not broken: the client should come back once the circuit half-opens
+            raise HTTPException(status_code=503, detail=f"{error}: {str(e)}", headers={"Retry-After": str(_retry_after(e))})
+        except ClientDisconnected:
+            return Response(status_code=499)
+        return payload(response.choices[0].message.content.strip())
+    
+    async def events():
+        parts = []
+        # A disconnect cancels this generator, and with it the upstream stream
+        tokens = llm_gateway.stream(endpoint=endpoint, use_cache=use_cache, **params)
+        try:
+            while True:
+                try:
+                    text = await deadline.run("completion", tokens.__anext__())
+                except StopAsyncIteration:
+                    break
+                parts.append(text)
+                yield _sse("token", {"text": text})
+            yield _sse("done", payload("".join(parts).strip()))
+        except asyncio.TimeoutError:
+            yield _sse("error", {"detail": f"{error}: deadline exceeded"})
+        except CircuitOpenError as e:
+            yield _sse("error", {"detail": f"{error}: {str(e)}", "retry_after": _retry_after(e)})
+        except Exception as e:
+            yield _sse("error", {"detail": f"{error}: {str(e)}"})
+        finally:
+            await tokens.aclose()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the token stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/")
 async def root():
     return {"message": "JobWiz AI Resume Analyzer API"}
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "JobWiz AI Resume Analyzer"}
+    return {"status": "healthy", "service": "JobWiz AI Resume Analyzer", "llm": llm_gateway.breaker.state}
+
+@app.get("/api/cache-stats")
+async def cache_stats():
+    return {
+        "llm": llm_cache.stats(),
+        "gateway": llm_gateway.stats(),
+        "combined_analysis": combined_analyzer.stats(),
+        "deadlines": deadline_stats.stats(),
+        "extraction": file_handler.text_cache.stats()
+    }
 
 @app.post("/api/upload")
 async def upload_resume(
+    request: Request,
     resume: UploadFile = File(...),
     job_title: str = Form(...),
     company: str = Form(...),
-    job_description: str = Form(...)
+    job_description: str = Form(...),
+    combined: bool = Form(UPLOAD_COMBINED_ANALYSIS),
+    run_async: bool = Form(UPLOAD_ASYNC, alias="async"),
+    progressive: bool = Form(UPLOAD_PROGRESSIVE)
 ):
     try:
         # Validate file
         if not file_handler.is_valid_file_type(resume.filename):
             raise HTTPException(status_code=400, detail="Invalid file type. Only PDF, DOC, DOCX, and TXT files are allowed.")
         
-        # Save file
-        file_path = file_handler.save_uploaded_file(resume)
+        # Hash the spooled upload in bounded chunks, rejecting oversize files
+        file_digest, file_size = file_handler.read_upload(resume)
         
-        # Extract text
-        resume_text = file_handler.extract_text_from_file(file_path)
+        if run_async:
+            # Persist the upload and answer at once; progress and the result come from the job endpoints
+            job = await upload_jobs.submit(
+                resume.filename,
+                resume.file.read(),
+                {"job_title": job_title, "company": company, "job_description": job_description, "combined": combined}
+            )
+            return JSONResponse(status_code=202, content=_job_links(job))
         
-        # Analyze resume
-        resume_analysis = resume_analyzer.analyze_resume(resume_text)
+        # The deadline is shared out across the stages; a disconnect cancels whatever is still running
+        deadline = Deadline.for_request("upload", request.headers)
         
-        # Match job
-        job_matching = job_matcher.match_job(resume_text, job_description)
-        
-        # Generate recommendations
-        recommendations = job_matcher.generate_recommendations(resume_text, job_description)
-        
-        # Cleanup file
-        file_handler.cleanup_file(file_path)
+        async def process():
+            # Extract text straight from the upload stream (skipped entirely when this exact file was seen before)
+            try:
+                resume_text = await deadline.run(
+                    "extracting",
+                    file_handler.extract_text_from_upload(resume, file_digest, file_size)
+                )
+            except asyncio.TimeoutError:
+                raise HTTPException(status_code=504, detail="Timed out extracting text from resume")
+            
+            if progressive:
+                # Local analysis within milliseconds; the LLM's sections follow on the same response
+                return _progressive_response(resume_text, job_description, combined, deadline)
+            
+            return await _analyze_upload(resume_text, job_description, combined, deadline=deadline)
         
-        return {
-            "resume_analysis": resume_analysis,
-            "job_matching": job_matching,
-            "recommendations": recommendations,
-            "originalResume": resume_text
-        }
+        return await cancel_on_disconnect(request, process(), "upload")
         
+    except HTTPException:
+        raise
+    except ClientDisconnected:
+        return Response(status_code=499)
+    except FileTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ExtractionError as e:
+        raise HTTPException(status_code=422, detail=f"Could not extract text from resume: {str(e)}")
     except Exception as e:
-        # Cleanup file if it exists
-        if 'file_path' in locals():
-            file_handler.cleanup_file(file_path)
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await resume.close()
+
+@app.get("/api/upload/jobs/{job_id}")
+async def upload_job_status(job_id: str):
+    """Status, per-stage progress and (once done) the result of an asynchronous upload"""
+    job = await upload_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Upload job not found")
+    return _job_links(job)
+
+@app.websocket("/api/upload/jobs/{job_id}/ws")
+async def upload_job_updates(websocket: WebSocket, job_id: str):
+    """Push the job's state on every change; closes once the job is done or failed"""
+    await websocket.accept()
+    sent = False
+    try:
+        async for job in upload_jobs.watch(job_id):
+            await websocket.send_json(_job_links(job))
+            sent = True
+    except WebSocketDisconnect:
+        return
+    await websocket.close(code=1000 if sent else 4404)
+
+@app.post("/api/match-batch")
+async def match_resume_batch(
+    resume: UploadFile = File(...),
+    jobs: str = Form(...)
+):
+    """
+    Match one resume against many jobs (a JSON list of {job_title, company, job_description}).
+    Results stream back as NDJSON: a ranking event, the resume analysis and one
+    match event per job as soon as each finishes, then a done event.
+    """
+    try:
+        batch = BATCH_JOBS_ADAPTER.validate_json(jobs)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid jobs list: {str(e)}")
+    if not batch:
+        raise HTTPException(status_code=400, detail="At least one job is required.")
+    if len(batch) > BATCH_MAX_JOBS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_JOBS} jobs can be matched per batch.")
+    
+    # The resume is read, extracted and analyzed once for the whole batch
+    resume_text = await _read_resume_text(resume)
+    return _ndjson_response(resume_text, [job.model_dump() for job in batch])
+
+@app.post("/api/jobs")
+async def index_jobs(jobs: List[IndexedJob]):
+    """Add postings to the local job index (a posting with an existing job_id is replaced)"""
+    await asyncio.to_thread(job_index.add_many, [job.model_dump() for job in jobs])
+    return {"indexed": len(jobs), "total": len(job_index)}
+
+@app.delete("/api/jobs/{job_id}")
+async def remove_job(job_id: str):
+    if not await asyncio.to_thread(job_index.remove, job_id):
+        raise HTTPException(status_code=404, detail="Job not found in the index")
+    return {"removed": job_id, "total": len(job_index)}
+
+@app.get("/api/jobs/stats")
+async def job_index_stats():
+    return await asyncio.to_thread(job_index.stats)
+
+def _top_indexed_jobs(resume_text: str, k: int) -> List[dict]:
+    top = job_index.search(resume_text, k)
+    return [job for job in (job_index.get(result["job_id"]) for result in top) if job]
+
+@app.post("/api/jobs/search")
+async def search_jobs(
+    resume: UploadFile = File(...),
+    k: int = Form(20)
+):
+    """Top-k indexed postings for a resume, ranked locally without any LLM call"""
+    resume_text = await _read_resume_text(resume)
+    # Off the loop: the index lock may be held by a compaction
+    results = await asyncio.to_thread(job_index.search, resume_text, max(1, min(k, BATCH_MAX_JOBS)))
+    return {"results": results}
+
+@app.post("/api/jobs/match")
+async def match_indexed_jobs(
+    resume: UploadFile = File(...),
+    k: int = Form(20)
+):
+    """Send only the top-k indexed postings through the LLM matcher, streamed as NDJSON"""
+    resume_text = await _read_resume_text(resume)
+    jobs = await asyncio.to_thread(_top_indexed_jobs, resume_text, max(1, min(k, BATCH_MAX_JOBS)))
+    if not jobs:
+        raise HTTPException(status_code=404, detail="No indexed jobs match this resume")
+    return _ndjson_response(resume_text, jobs)
 
 @app.post("/api/resume-suggestions")
-async def get_resume_suggestions(request: ResumeSectionRequest):
+async def get_resume_suggestions(request: ResumeSectionRequest, http_request: Request, stream: bool = False):
     try:
         # Create a comprehensive prompt for AI suggestions
         if request.section_id == "full-resume":
@@ -181,9 +649,26 @@ async def get_resume_suggestions(request: ResumeSectionRequest):
             Format each suggestion as a clear, actionable recommendation that a job seeker can immediately implement.
             """
         
+        def build_response(content: str) -> dict:
+            # Extract suggestions from response
+            ai_suggestions = content.split('\n')
+            # Clean up suggestions
+            suggestions = [s.strip().replace('- ', '').replace('• ', '').replace('* ', '') for s in ai_suggestions if s.strip()]
+            
+            return {
+                "suggestions": suggestions,
+                "section_id": request.section_id,
+                "message": "Expert AI recommendations generated successfully"
+            }
+        
         # Call OpenAI for suggestions with increased tokens
-        response = resume_analyzer.client.chat.completions.create(
-            model="gpt-4",
+        return await _complete_text(
+            stream,
+            http_request,
+            payload=build_response,
+            error="Failed to generate AI suggestions",
+            endpoint="resume_suggestions",
+            use_cache=False,  # Users regenerate suggestions expecting fresh output
             messages=[
                 {
                     "role": "system",
@@ -193,27 +678,16 @@ async def get_resume_suggestions(request: ResumeSectionRequest):
                     "role": "user",
                     "content": prompt
                 }
-            ],
-            max_tokens=1000,  # Increased from 500 to 1000
-            temperature=0.7
+            ]
         )
         
-        # Extract suggestions from response
-        ai_suggestions = response.choices[0].message.content.strip().split('\n')
-        # Clean up suggestions
-        suggestions = [s.strip().replace('- ', '').replace('• ', '').replace('* ', '') for s in ai_suggestions if s.strip()]
-        
-        return {
-            "suggestions": suggestions,
-            "section_id": request.section_id,
-            "message": "Expert AI recommendations generated successfully"
-        }
-        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate AI suggestions: {str(e)}")
 
 @app.post("/api/job-description-analysis")
-async def analyze_job_description(request: JobDescriptionRequest):
+async def analyze_job_description(request: JobDescriptionRequest, http_request: Request, stream: bool = False):
     try:
         prompt = f"""
         As an expert career coach and job market analyst, provide a comprehensive analysis of this job posting:
@@ -234,8 +708,20 @@ async def analyze_job_description(request: JobDescriptionRequest):
         Format as a structured analysis with clear sections and actionable insights.
         """
         
-        response = resume_analyzer.client.chat.completions.create(
-            model="gpt-4",
+        def build_response(content: str) -> dict:
+            return {
+                "analysis": content,
+                "job_title": request.job_title,
+                "company": request.company,
+                "message": "Job description analysis completed"
+            }
+        
+        return await _complete_text(
+            stream,
+            http_request,
+            payload=build_response,
+            error="Failed to analyze job description",
+            endpoint="job_description_analysis",
             messages=[
                 {
                     "role": "system",
@@ -245,25 +731,16 @@ async def analyze_job_description(request: JobDescriptionRequest):
                     "role": "user",
                     "content": prompt
                 }
-            ],
-            max_tokens=800,
-            temperature=0.6
+            ]
         )
         
-        analysis = response.choices[0].message.content.strip()
-        
-        return {
-            "analysis": analysis,
-            "job_title": request.job_title,
-            "company": request.company,
-            "message": "Job description analysis completed"
-        }
-        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to analyze job description: {str(e)}")
 
 @app.post("/api/resume-optimization-tips")
-async def get_resume_optimization_tips(request: ResumeOptimizationRequest):
+async def get_resume_optimization_tips(request: ResumeOptimizationRequest, http_request: Request, stream: bool = False):
     try:
         prompt = f"""
         As an expert resume writer and ATS specialist, provide comprehensive optimization tips for a resume targeting this specific role:
@@ -284,8 +761,19 @@ async def get_resume_optimization_tips(request: ResumeOptimizationRequest):
         Make each tip specific, actionable, and relevant to this particular job.
         """
         
-        response = resume_analyzer.client.chat.completions.create(
-            model="gpt-4",
+        def build_response(content: str) -> dict:
+            return {
+                "optimization_tips": content,
+                "target_role": request.target_role,
+                "message": "Resume optimization tips generated"
+            }
+        
+        return await _complete_text(
+            stream,
+            http_request,
+            payload=build_response,
+            error="Failed to generate optimization tips",
+            endpoint="resume_optimization_tips",
             messages=[
                 {
                     "role": "system",
@@ -295,24 +783,16 @@ async def get_resume_optimization_tips(request: ResumeOptimizationRequest):
                     "role": "user",
                     "content": prompt
                 }
-            ],
-            max_tokens=600,
-            temperature=0.7
+            ]
         )
         
-        tips = response.choices[0].message.content.strip()
-        
-        return {
-            "optimization_tips": tips,
-            "target_role": request.target_role,
-            "message": "Resume optimization tips generated"
-        }
-        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate optimization tips: {str(e)}")
 
 @app.post("/api/interview-preparation")
-async def get_interview_preparation(request: InterviewPrepRequest):
+async def get_interview_preparation(request: InterviewPrepRequest, http_request: Request, stream: bool = False):
     try:
         prompt = f"""
         As an expert interview coach and career consultant, provide comprehensive interview preparation guidance for this specific role:
@@ -332,8 +812,20 @@ async def get_interview_preparation(request: InterviewPrepRequest):
         Make all advice specific to this role and company.
         """
         
-        response = resume_analyzer.client.chat.completions.create(
-            model="gpt-4",
+        def build_response(content: str) -> dict:
+            return {
+                "interview_preparation": content,
+                "job_title": request.job_title,
+                "company": request.company,
+                "message": "Interview preparation guide generated"
+            }
+        
+        return await _complete_text(
+            stream,
+            http_request,
+            payload=build_response,
+            error="Failed to generate interview preparation",
+            endpoint="interview_preparation",
             messages=[
                 {
                     "role": "system",
@@ -343,25 +835,16 @@ async def get_interview_preparation(request: InterviewPrepRequest):
                     "role": "user",
                     "content": prompt
                 }
-            ],
-            max_tokens=700,
-            temperature=0.6
+            ]
         )
         
-        preparation_guide = response.choices[0].message.content.strip()
-        
-        return {
-            "interview_preparation": preparation_guide,
-            "job_title": request.job_title,
-            "company": request.company,
-            "message": "Interview preparation guide generated"
-        }
-        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate interview preparation: {str(e)}")
 
 @app.post("/api/career-advice")
-async def get_career_advice(request: JobDescriptionRequest):
+async def get_career_advice(request: JobDescriptionRequest, http_request: Request, stream: bool = False):
     try:
         prompt = f"""
         As an expert career coach and industry consultant, provide personalized career advice for someone applying to this position:
@@ -382,8 +865,20 @@ async def get_career_advice(request: JobDescriptionRequest):
         Make advice specific to this role and industry.
         """
         
-        response = resume_analyzer.client.chat.completions.create(
-            model="gpt-4",
+        def build_response(content: str) -> dict:
+            return {
+                "career_advice": content,
+                "job_title": request.job_title,
+                "company": request.company,
+                "message": "Career advice generated"
+            }
+        
+        return await _complete_text(
+            stream,
+            http_request,
+            payload=build_response,
+            error="Failed to generate career advice",
+            endpoint="career_advice",
             messages=[
                 {
                     "role": "system",
@@ -393,25 +888,16 @@ async def get_career_advice(request: JobDescriptionRequest):
                     "role": "user",
                     "content": prompt
                 }
-            ],
-            max_tokens=600,
-            temperature=0.7
+            ]
         )
         
-        career_advice = response.choices[0].message.content.strip()
-        
-        return {
-            "career_advice": career_advice,
-            "job_title": request.job_title,
-            "company": request.company,
-            "message": "Career advice generated"
-        }
-        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate career advice: {str(e)}") 
 
 @app.post("/api/generate-optimized-resume")
-async def generate_optimized_resume(request: AIResumeGenerationRequest):
+async def generate_optimized_resume(request: AIResumeGenerationRequest, http_request: Request, stream: bool = False):
     try:
         # Create comprehensive prompt for AI resume generation
         if request.section_type == "full_resume":
@@ -544,9 +1030,22 @@ async def generate_optimized_resume(request: AIResumeGenerationRequest):
             Generate an enhanced presentation that maintains the exact same format and structure.
             """
         
+        def build_response(content: str) -> dict:
+            return {
+                "optimized_content": content,
+                "section_type": request.section_type,
+                "job_title": request.job_title,
+                "message": "AI-optimized resume content generated successfully"
+            }
+        
         # Call OpenAI for resume generation
-        response = resume_analyzer.client.chat.completions.create(
-            model="gpt-4",
+        return await _complete_text(
+            stream,
+            http_request,
+            payload=build_response,
+            error="Failed to generate optimized resume",
+            endpoint="optimized_resume",
+            use_cache=False,  # Users regenerate resumes expecting fresh output
             messages=[
                 {
                     "role": "system",
@@ -556,19 +1055,10 @@ async def generate_optimized_resume(request: AIResumeGenerationRequest):
                     "role": "user",
                     "content": prompt
                 }
-            ],
-            max_tokens=1500,  # Increased for comprehensive resume generation
-            temperature=0.7
+            ]
         )
         
-        optimized_content = response.choices[0].message.content.strip()
-        
-        return {
-            "optimized_content": optimized_content,
-            "section_type": request.section_type,
-            "job_title": request.job_title,
-            "message": "AI-optimized resume content generated successfully"
-        }
-        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate optimized resume: {str(e)}") 
\ No newline at end of file
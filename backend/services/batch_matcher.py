@@ -0,0 +1,98 @@
+import asyncio
+import os
+from typing import AsyncIterator, Dict, List, Optional
+
+from services.circuit_breaker import track_degraded
+from services.deadlines import run_stage
+from services.job_matcher import JobMatcher
+from services.prompt_context import PromptContext
+from services.resume_analyzer import ResumeAnalyzer
+from services.similarity import rank_jobs
+
+
+class BatchMatcher:
+    """
+    Matches one resume against many job descriptions. The resume is analyzed
+    once; jobs run through `JobMatcher.match_job` best pre-score first with at
+    most `concurrency` LLM matches in flight, and results are yielded as they finish.
+    """
+
+    def __init__(
+        self,
+        resume_analyzer: ResumeAnalyzer,
+        job_matcher: JobMatcher,
+        concurrency: Optional[int] = None
+    ):
+        self.resume_analyzer = resume_analyzer
+        self.job_matcher = job_matcher
+        self.concurrency = concurrency or int(os.getenv("BATCH_MATCH_CONCURRENCY", "5"))
+
+    def rank(self, resume_text: str, jobs: List[Dict]) -> List[Dict]:
+        """Jobs with their index and BM25 pre-score, best first (ties keep submission order)"""
+        scores = rank_jobs(resume_text, [job["job_description"] for job in jobs])
+        ranked = [{"index": index, "pre_score": score} for index, score in enumerate(scores)]
+        ranked.sort(key=lambda item: (-item["pre_score"], item["index"]))
+        return ranked
+
+    async def stream(self, resume_text: str, jobs: List[Dict]) -> AsyncIterator[Dict]:
+        """
+        Yield a "ranking" event, then "analysis" and one "match" event per job in
+        completion order (flagged `degraded` when a local fallback answered), then
+        "done". Closing the iterator cancels pending work.
+        """
+        ranked = self.rank(resume_text, jobs)
+        yield {"type": "ranking", "jobs": ranked}
+
+        # The resume is tokenized once and reused for every job's prompt
+        context = PromptContext(resume_text)
+        results: asyncio.Queue = asyncio.Queue()
+        pending: asyncio.Queue = asyncio.Queue()
+        for item in ranked:
+            pending.put_nowait(item)
+
+        async def analyze():
+            with track_degraded() as degraded:
+                analysis = await run_stage(
+                    "analysis",
+                    self.resume_analyzer.analyze_resume(resume_text, context),
+                    lambda: self.resume_analyzer._fallback_analysis(resume_text),
+                    label="Batch stage"
+                )
+            await results.put({"type": "analysis", "resume_analysis": analysis, "degraded": bool(degraded)})
+
+        async def match_worker():
+            while not pending.empty():
+                item = pending.get_nowait()
+                job = jobs[item["index"]]
+                job_description = job["job_description"]
+                with track_degraded() as degraded:
+                    job_matching = await run_stage(
+                        f"matching job {item['index']}",
+                        self.job_matcher.match_job(resume_text, job_description, context.for_job(job_description)),
+                        lambda: self.job_matcher._fallback_match(resume_text, job_description),
+                        label="Batch stage"
+                    )
+                event = {
+                    "type": "match",
+                    "index": item["index"],
+                    "job_title": job.get("job_title", ""),
+                    "company": job.get("company", ""),
+                    "pre_score": item["pre_score"],
+                    "job_matching": job_matching,
+                    "degraded": bool(degraded)
+                }
+                if "job_id" in job:
+                    event["job_id"] = job["job_id"]
+                await results.put(event)
+
+        workers = min(self.concurrency, len(ranked))
+        tasks = [asyncio.create_task(analyze())]
+        tasks += [asyncio.create_task(match_worker()) for _ in range(workers)]
+        try:
+            for _ in range(len(ranked) + 1):
+                yield await results.get()
+            yield {"type": "done", "count": len(ranked)}
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
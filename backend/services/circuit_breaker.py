@@ -0,0 +1,169 @@
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Iterator, NamedTuple, Optional, Set, Tuple
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# Sections answered by a local fallback during the current request (None outside `track_degraded`)
+_degraded: ContextVar[Optional[Set[str]]] = ContextVar("degraded_sections", default=None)
+
+
+class Permit(NamedTuple):
+    """Admission of one upstream call by `CircuitBreaker.allow`"""
+    # The one call whose outcome settles a half-open circuit
+    probe: bool
+    # How many times the circuit had opened when the call was admitted
+    generation: int
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the LLM while the circuit is open"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM circuit is open, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+@contextmanager
+def track_degraded() -> Iterator[Set[str]]:
+    """Collect the sections that fell back to local analysis inside the block (and its tasks)"""
+    sections: Set[str] = set()
+    token = _degraded.set(sections)
+    try:
+        yield sections
+    finally:
+        _degraded.reset(token)
+
+
+def mark_degraded(section: str):
+    sections = _degraded.get()
+    if sections is not None:
+        sections.add(section)
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open breaker for the LLM. It opens when, over the last `window`
+    seconds, enough calls failed or were slow; while open, calls are rejected at once
+    so callers go straight to their local fallbacks. After `open_seconds` one probe
+    call is let through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        window: Optional[float] = None,
+        min_calls: Optional[int] = None,
+        failure_rate: Optional[float] = None,
+        slow_call_seconds: Optional[float] = None,
+        slow_call_rate: Optional[float] = None,
+        open_seconds: Optional[float] = None
+    ):
+        if enabled is None:
+            enabled = os.getenv("LLM_BREAKER_ENABLED", "True").lower() == "true"
+        self.enabled = enabled
+        self.window = window if window is not None else float(os.getenv("LLM_BREAKER_WINDOW", "60"))
+        self.min_calls = min_calls if min_calls is not None else int(os.getenv("LLM_BREAKER_MIN_CALLS", "5"))
+        self.failure_rate = failure_rate if failure_rate is not None else float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5"))
+        self.slow_call_seconds = slow_call_seconds if slow_call_seconds is not None else float(os.getenv("LLM_BREAKER_SLOW_CALL_SECONDS", "45"))
+        self.slow_call_rate = slow_call_rate if slow_call_rate is not None else float(os.getenv("LLM_BREAKER_SLOW_CALL_RATE", "0.5"))
+        self.open_seconds = open_seconds if open_seconds is not None else float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "30"))
+
+        # (finished at, failed, slow) for calls in the current window
+        self._calls: Deque[Tuple[float, bool, bool]] = deque()
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._generation = 0
+        self._stats = {"opened": 0, "rejected": 0, "probes": 0}
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        if time.monotonic() - self._opened_at < self.open_seconds:
+            return OPEN
+        return HALF_OPEN
+
+    def retry_after(self) -> float:
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+
+    def allow(self) -> Optional[Permit]:
+        """
+        A permit if a call may go upstream now, None if not. In half-open only one
+        probe is in flight, and only its permit settles the circuit.
+        """
+        if not self.enabled:
+            return Permit(False, self._generation)
+        state = self.state
+        if state == CLOSED:
+            return Permit(False, self._generation)
+        if state == HALF_OPEN and not self._probing:
+            self._probing = True
+            self._stats["probes"] += 1
+            return Permit(True, self._generation)
+        self._stats["rejected"] += 1
+        return None
+
+    def record(self, success: bool, latency: float, permit: Optional[Permit] = None):
+        """Outcome of one upstream call that `allow` let through (a current closed-state call without `permit`)"""
+        if not self.enabled:
+            return
+        permit = permit or Permit(False, self._generation)
+        slow = latency >= self.slow_call_seconds
+        if permit.probe:
+            if permit.generation == self._generation and self._probing:
+                self._probing = False
+                if success and not slow:
+                    self._close()
+                else:
+                    self._open()
+            return
+        if self._opened_at is not None or permit.generation != self._generation:
+            # Admitted before the circuit opened; the probe decides what happens next
+            return
+
+        now = time.monotonic()
+        self._calls.append((now, not success, slow))
+        while self._calls and self._calls[0][0] < now - self.window:
+            self._calls.popleft()
+        calls = len(self._calls)
+        if calls < self.min_calls:
+            return
+        failed = sum(1 for _, failure, _ in self._calls if failure)
+        slow_calls = sum(1 for _, _, is_slow in self._calls if is_slow)
+        if failed / calls >= self.failure_rate or slow_calls / calls >= self.slow_call_rate:
+            self._open()
+
+    def release(self, permit: Permit):
+        """The call let through ended without an outcome (cancelled, throttled)"""
+        if permit.probe and permit.generation == self._generation:
+            self._probing = False
+
+    def stats(self) -> Dict:
+        calls = len(self._calls)
+        return {
+            "enabled": self.enabled,
+            "state": self.state,
+            **self._stats,
+            "window": {
+                "calls": calls,
+                "failed": sum(1 for _, failure, _ in self._calls if failure),
+                "slow": sum(1 for _, _, slow in self._calls if slow)
+            }
+        }
+
+    def _open(self):
+        print(f"LLM circuit opened; failing fast to local fallbacks for {self.open_seconds:.0f}s")
+        self._opened_at = time.monotonic()
+        self._generation += 1
+        self._stats["opened"] += 1
+
+    def _close(self):
+        print("LLM circuit closed after a successful probe")
+        self._opened_at = None
+        self._calls.clear()
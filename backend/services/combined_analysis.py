@@ -0,0 +1,203 @@
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel, ValidationError
+
+from services.deadlines import run_stage
+from services.job_matcher import JobMatcher
+from services.llm_gateway import LLMGateway, llm_gateway
+from services.prompt_context import PromptContext, context_budget
+from services.resume_analyzer import ResumeAnalyzer
+
+SECTIONS = ("resume_analysis", "job_matching", "recommendations")
+
+
+class AnalysisSection(BaseModel):
+    """Same shape `ResumeAnalyzer._parse_ai_response` produces"""
+    skills: List[str] = []
+    experience: List[Dict[str, Any]] = []
+    education: List[Dict[str, Any]] = []
+    summary: str = ""
+    strengths: List[str] = []
+    areas_for_improvement: List[str] = []
+    ai_insights: List[str] = []
+    overall_score: Union[int, float] = 0
+
+
+class MatchingSection(BaseModel):
+    """Same shape `JobMatcher._parse_matching_response` produces"""
+    match_percentage: Union[int, float] = 0
+    matching_skills: List[str] = []
+    missing_skills: List[str] = []
+    extra_skills: List[str] = []
+    ai_analysis: Dict[str, Any] = {}
+    skill_gaps: List[Dict[str, Any]] = []
+    transferable_skills: List[Dict[str, Any]] = []
+
+
+class CombinedAnalyzer:
+    """
+    Resume analysis, job matching and recommendations from one LLM call instead of
+    three. Each section of the answer is validated on its own; a section that is
+    missing or malformed is produced by its regular per-call path instead.
+    """
+
+    def __init__(
+        self,
+        resume_analyzer: ResumeAnalyzer,
+        job_matcher: JobMatcher,
+        gateway: Optional[LLMGateway] = None
+    ):
+        self.resume_analyzer = resume_analyzer
+        self.job_matcher = job_matcher
+        self.gateway = gateway or llm_gateway
+        self._stats = {"calls": 0, "complete": 0, "section_fallbacks": {name: 0 for name in SECTIONS}}
+
+    async def analyze(self, resume_text: str, job_description: str, context: Optional[PromptContext] = None) -> Dict:
+        """{"resume_analysis", "job_matching", "recommendations"} for one resume and job"""
+        context = context or PromptContext(resume_text, job_description)
+        self._stats["calls"] += 1
+        try:
+            response = await self.gateway.create(
+                endpoint="combined_analysis",
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "You are an expert resume analyst, HR recruiter and career coach with 15+ years of experience. You provide detailed, accurate and actionable feedback in strict JSON."
+                    },
+                    {
+                        "role": "user",
+                        "content": self._create_combined_prompt(
+                            context.resume_digest(context_budget("combined_analysis", "resume")),
+                            context.job_digest(context_budget("combined_analysis", "job"))
+                        )
+                    }
+                ]
+            )
+            sections = self._parse_combined_response(response.choices[0].message.content)
+        except Exception as e:
+            print(f"Combined analysis failed, using separate calls: {str(e)}")
+            sections = {}
+
+        result = {}
+        if "resume_analysis" in sections:
+            result["resume_analysis"] = self.resume_analyzer._combine_analysis(resume_text, sections["resume_analysis"])
+        if "job_matching" in sections:
+            result["job_matching"] = self.job_matcher._combine_match(resume_text, job_description, sections["job_matching"])
+        if "recommendations" in sections:
+            result["recommendations"] = sections["recommendations"][:5]
+
+        # Only the sections the answer lacked go back through their own calls
+        fallbacks = {
+            "resume_analysis": lambda: run_stage(
+                "analysis",
+                self.resume_analyzer.analyze_resume(resume_text, context),
+                lambda: self.resume_analyzer._fallback_analysis(resume_text),
+                label="Combined analysis stage"
+            ),
+            "job_matching": lambda: run_stage(
+                "matching",
+                self.job_matcher.match_job(resume_text, job_description, context),
+                lambda: self.job_matcher._fallback_match(resume_text, job_description),
+                label="Combined analysis stage"
+            ),
+            "recommendations": lambda: run_stage(
+                "recommendations",
+                self.job_matcher.generate_recommendations(resume_text, job_description, context),
+                lambda: self.job_matcher._fallback_recommendations(resume_text, job_description),
+                label="Combined analysis stage"
+            ),
+        }
+        missing = [name for name in SECTIONS if name not in result]
+        for name in missing:
+            self._stats["section_fallbacks"][name] += 1
+        if not missing:
+            self._stats["complete"] += 1
+        for name, value in zip(missing, await asyncio.gather(*(fallbacks[name]() for name in missing))):
+            result[name] = value
+
+        return {name: result[name] for name in SECTIONS}
+
+    def stats(self) -> Dict:
+        return {**self._stats, "section_fallbacks": dict(self._stats["section_fallbacks"])}
+
+    def _parse_combined_response(self, ai_response: str) -> Dict:
+        """Valid sections of the combined answer; invalid or absent ones are left out"""
+        json_start = ai_response.find('{')
+        json_end = ai_response.rfind('}') + 1
+        if json_start == -1 or json_end <= json_start:
+            return {}
+        try:
+            parsed_data = json.loads(ai_response[json_start:json_end])
+        except ValueError as e:
+            print(f"Error parsing combined AI response: {str(e)}")
+            return {}
+        if not isinstance(parsed_data, dict):
+            return {}
+
+        sections = {}
+        for name, model in (("resume_analysis", AnalysisSection), ("job_matching", MatchingSection)):
+            section = parsed_data.get(name)
+            if not isinstance(section, dict) or not section:
+                continue
+            try:
+                sections[name] = model.model_validate(section).model_dump()
+            except ValidationError as e:
+                print(f"Combined AI response has an invalid '{name}' section: {str(e)}")
+
+        recommendations = parsed_data.get("recommendations")
+        if isinstance(recommendations, list) and recommendations and all(isinstance(rec, str) for rec in recommendations):
+            sections["recommendations"] = [rec for rec in recommendations if rec]
+        return sections
+
+    def _create_combined_prompt(self, resume_text: str, job_description: str) -> str:
+        """One prompt asking for all three upload sections"""
+        return f"""
+Analyze this resume on its own, then against the job description, and recommend improvements. Return a single JSON object in exactly this format:
+
+{{
+    "resume_analysis": {{
+        "skills": ["skill1", "skill2", "skill3"],
+        "experience": [{{"company": "Company Name", "duration": "2020-2023", "description": "Detailed role description"}}],
+        "education": [{{"degree": "Bachelor of Science", "institution": "University Name", "description": "Education details"}}],
+        "summary": "Professional summary in 2-3 sentences",
+        "strengths": ["Specific strength 1", "Specific strength 2", "Specific strength 3"],
+        "areas_for_improvement": ["Specific improvement area 1", "Specific improvement area 2"],
+        "ai_insights": ["Professional insight about the candidate", "Career trajectory analysis", "Market positioning assessment"],
+        "overall_score": 85
+    }},
+    "job_matching": {{
+        "match_percentage": 75.5,
+        "matching_skills": ["Python", "React", "SQL"],
+        "missing_skills": ["Docker", "Kubernetes"],
+        "extra_skills": ["MongoDB", "AWS"],
+        "ai_analysis": {{
+            "overall_fit": "Good fit for the role with some skill gaps",
+            "strength_areas": ["Technical skills", "Project management"],
+            "concern_areas": ["DevOps experience", "Cloud platforms"],
+            "role_alignment": "Candidate's background aligns well with the position"
+        }},
+        "skill_gaps": [{{"skill": "Docker", "importance": "High", "suggestion": "Consider taking Docker certification course"}}],
+        "transferable_skills": [{{"skill": "Project Management", "relevance": "Highly relevant for team leadership", "application": "Can be applied to technical project coordination"}}]
+    }},
+    "recommendations": [
+        "Specific recommendation 1",
+        "Specific recommendation 2",
+        "Specific recommendation 3",
+        "Specific recommendation 4",
+        "Specific recommendation 5"
+    ]
+}}
+
+RESUME TEXT:
+{resume_text}
+
+JOB DESCRIPTION:
+{job_description}
+
+REQUIREMENTS:
+1. resume_analysis: identify skills, experience, education, strengths and concrete improvements; score the resume 0-100
+2. job_matching: calculate an accurate match percentage (0-100) from skill alignment, experience level and industry relevance; list matching, missing and extra skills, skill gaps with importance levels and transferable skills
+3. recommendations: 5 specific, actionable, realistic recommendations, most impactful first, covering both resume improvements and skill development for this job
+"""
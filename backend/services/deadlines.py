@@ -0,0 +1,129 @@
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+
+DEADLINE_HEADER = "x-request-deadline"
+# Below the load balancer's 60s idle timeout
+DEFAULT_DEADLINE = 55.0
+# Long generations are usually streamed, which keeps the connection busy
+ENDPOINT_DEADLINES = {"optimized_resume": 120.0}
+
+# Share of the request's deadline each upload stage may use, never more than what is left;
+# override with DEADLINE_SHARE_<STAGE>. The three LLM stages run concurrently, so each may
+# use everything extraction left over.
+STAGE_SHARES = {"extracting": 0.25, "analyzing": 1.0, "matching": 1.0, "recommending": 1.0}
+
+
+class ClientDisconnected(Exception):
+    """The client went away before its response was ready"""
+
+
+def endpoint_deadline(endpoint: str) -> float:
+    """Configured seconds for `endpoint` (DEADLINE_<ENDPOINT>, else its default or DEADLINE_DEFAULT)"""
+    value = os.getenv(f"DEADLINE_{endpoint.upper()}")
+    if value:
+        return float(value)
+    if endpoint in ENDPOINT_DEADLINES:
+        return ENDPOINT_DEADLINES[endpoint]
+    return float(os.getenv("DEADLINE_DEFAULT", str(DEFAULT_DEADLINE)))
+
+
+def stage_share(stage: str) -> float:
+    value = os.getenv(f"DEADLINE_SHARE_{stage.upper()}")
+    return float(value) if value else STAGE_SHARES.get(stage, 1.0)
+
+
+class Deadline:
+    """One request's time budget, shared out across its stages"""
+
+    def __init__(self, endpoint: str, seconds: float):
+        self.endpoint = endpoint
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def for_request(cls, endpoint: str, headers: Mapping[str, str]) -> "Deadline":
+        """The endpoint's deadline, or the X-Request-Deadline header's (capped at DEADLINE_MAX)"""
+        seconds = endpoint_deadline(endpoint)
+        requested = headers.get(DEADLINE_HEADER)
+        if requested:
+            try:
+                seconds = min(max(float(requested), 0.0), float(os.getenv("DEADLINE_MAX", "300")))
+            except ValueError:
+                pass
+        return cls(endpoint, seconds)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def budget(self, stage: str) -> float:
+        return min(self.remaining(), self.seconds * stage_share(stage))
+
+    async def run(self, stage: str, work: Awaitable) -> Any:
+        """Await `work` within the stage's budget; past it the work is cancelled and asyncio.TimeoutError raised"""
+        try:
+            return await asyncio.wait_for(work, self.budget(stage))
+        except asyncio.TimeoutError:
+            deadline_stats.record(self.endpoint, stage)
+            raise
+
+
+async def run_stage(
+    name: str,
+    stage: Awaitable,
+    fallback: Callable[[], Any],
+    deadline: Optional[Deadline] = None,
+    label: str = "Upload stage"
+) -> Any:
+    """Await one stage, answering with `fallback()` if it fails or runs past its share of `deadline`"""
+    try:
+        return await (deadline.run(name, stage) if deadline else stage)
+    except asyncio.TimeoutError:
+        print(f"{label} '{name}' missed its deadline, using local fallback")
+        return fallback()
+    except Exception as e:
+        print(f"{label} '{name}' failed, using local fallback: {str(e)}")
+        return fallback()
+
+
+async def cancel_on_disconnect(request, work: Awaitable, endpoint: str) -> Any:
+    """Await `work`, cancelling it (and the upstream calls under it) if the client disconnects"""
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(_disconnected(request))
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        task.cancel()
+        watcher.cancel()
+        raise
+    watcher.cancel()
+    if task.done():
+        return task.result()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    deadline_stats.record(endpoint, "disconnected")
+    raise ClientDisconnected()
+
+
+async def _disconnected(request):
+    # The body has been read by now, so the next message is the disconnect
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+class DeadlineStats:
+    """Requests and stages cut short, per endpoint: by their deadline or by the client leaving"""
+
+    def __init__(self):
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def record(self, endpoint: str, reason: str):
+        counts = self._counts.setdefault(endpoint, {})
+        counts[reason] = counts.get(reason, 0) + 1
+
+    def stats(self) -> Dict:
+        return {endpoint: dict(counts) for endpoint, counts in self._counts.items()}
+
+
+deadline_stats = DeadlineStats()
@@ -0,0 +1,184 @@
+import asyncio
+import inspect
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """Nearest-rank percentile (p in 0-100) of a non-empty sequence"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+class LatencyTracker:
+    """The last `window` upstream latencies per (endpoint, model)"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self._latencies: Dict[Tuple[str, str], Deque[float]] = {}
+
+    def record(self, endpoint: str, model: str, seconds: float):
+        self._latencies.setdefault((endpoint, model), deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, endpoint: str, model: str, p: float, min_samples: int = 1) -> Optional[float]:
+        latencies = self._latencies.get((endpoint, model))
+        if not latencies or len(latencies) < min_samples:
+            return None
+        return percentile(latencies, p)
+
+    def stats(self) -> Dict:
+        summary: Dict[str, Dict] = {}
+        for (endpoint, model), latencies in self._latencies.items():
+            summary.setdefault(endpoint, {})[model] = {
+                "samples": len(latencies),
+                "p50": round(percentile(latencies, 50), 4),
+                "p99": round(percentile(latencies, 99), 4)
+            }
+        return summary
+
+
+class HedgeBudget:
+    """Every call earns `ratio` of a hedge, so hedges stay under that share of calls"""
+
+    def __init__(self, ratio: float):
+        self.ratio = ratio
+        # Up to 20 calls' worth of credit, so a short slow spell can hedge several calls in a row
+        self.burst = max(1.0, ratio * 20) if ratio > 0 else 0.0
+        self.credit = self.burst
+
+    def earn(self):
+        self.credit = min(self.burst, self.credit + self.ratio)
+
+    def spend(self) -> bool:
+        if self.credit < 1:
+            return False
+        self.credit -= 1
+        return True
+
+
+class Hedger:
+    """
+    Hedged requests for the LLM. When a call has not answered by the given
+    percentile of recent latency for its endpoint and model, an identical second
+    call is sent; whichever answers first wins and the other is cancelled. Hedges
+    are capped by a budget relative to the number of calls.
+    """
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        percentile: Optional[float] = None,
+        budget: Optional[float] = None,
+        min_samples: Optional[int] = None,
+        window: Optional[int] = None,
+        endpoints: Optional[List[str]] = None
+    ):
+        if enabled is None:
+            enabled = os.getenv("LLM_HEDGE_ENABLED", "False").lower() == "true"
+        self.enabled = enabled
+        self.percentile = percentile if percentile is not None else float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+        ratio = budget if budget is not None else float(os.getenv("LLM_HEDGE_BUDGET", "0.05"))
+        self.budget = HedgeBudget(ratio)
+        # No hedging until the endpoint has enough history for a meaningful percentile
+        self.min_samples = min_samples if min_samples is not None else int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+        if endpoints is None:
+            endpoints = [name.strip() for name in os.getenv("LLM_HEDGE_ENDPOINTS", "").split(",") if name.strip()]
+        # Empty means every endpoint
+        self.endpoints = set(endpoints)
+        self.latencies = LatencyTracker(window if window is not None else int(os.getenv("LLM_HEDGE_WINDOW", "500")))
+        self._stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "budget_exhausted": 0}
+
+    def applies_to(self, endpoint: str) -> bool:
+        return self.enabled and (not self.endpoints or endpoint in self.endpoints)
+
+    def delay(self, endpoint: str, model: str) -> Optional[float]:
+        """Seconds to wait before hedging a call, or None if it is not hedged"""
+        if not self.applies_to(endpoint):
+            return None
+        return self.latencies.percentile(endpoint, model, self.percentile, self.min_samples)
+
+    async def run(
+        self,
+        endpoint: str,
+        model: str,
+        send: Callable[[], Awaitable],
+        hedge: Optional[Callable[[], Awaitable]] = None
+    ) -> Any:
+        """Await `send()`, racing it against `hedge()` (default: `send()` again) once it is slow"""
+        delay = self.delay(endpoint, model)
+        if self.applies_to(endpoint):
+            self._stats["calls"] += 1
+            self.budget.earn()
+
+        started: Dict[asyncio.Future, float] = {}
+
+        def launch(work: Callable[[], Awaitable]) -> asyncio.Future:
+            task = asyncio.ensure_future(work())
+            started[task] = time.monotonic()
+            return task
+
+        primary = launch(send)
+        winner = None
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+                if not done:
+                    if self.budget.spend():
+                        self._stats["hedged"] += 1
+                        launch(hedge or send)
+                    else:
+                        self._stats["budget_exhausted"] += 1
+            pending = set(started)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # The primary's error is the one reported if no call succeeds
+                for task in sorted(done, key=lambda task: task is not primary):
+                    if task.exception() is None:
+                        winner = task
+                        break
+                    error = error or task.exception()
+                if winner is not None:
+                    break
+            if winner is None:
+                raise error
+            self.latencies.record(endpoint, model, time.monotonic() - started[winner])
+            if winner is not primary:
+                self._stats["hedge_wins"] += 1
+            return winner.result()
+        finally:
+            losers = [task for task in started if task is not winner]
+            if winner is not None:
+                # The slow calls that lost count with what they had taken, so the tail stays visible
+                now = time.monotonic()
+                for task in losers:
+                    if not task.done():
+                        self.latencies.record(endpoint, model, now - started[task])
+            await self._discard(losers)
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "percentile": self.percentile,
+            "budget": self.budget.ratio,
+            **self._stats,
+            "latency": self.latencies.stats()
+        }
+
+    async def _discard(self, losers: List[asyncio.Future]):
+        for task in losers:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*losers, return_exceptions=True)
+        for task in losers:
+            if task.cancelled():
+                continue
+            if task.exception() is None:
+                # Answered too late (e.g. an opened stream): release it
+                close = getattr(task.result(), "close", None)
+                if close is not None:
+                    closing = close()
+                    if inspect.isawaitable(closing):
+                        await closing
@@ -0,0 +1,123 @@
+import re
+from functools import lru_cache
+from typing import Dict, List
+
+from services.skill_taxonomy import get_skill_taxonomy
+
+# Tier priority when a skill shows up in several places
+TIER_RANK = {"required": 0, "preferred": 1, "other": 2}
+
+# Heading keywords, checked in order so "Preferred Qualifications" is preferred
+SECTION_KEYWORDS = [
+    ("preferred", ("nice to have", "nice-to-have", "preferred", "bonus", "desired", "good to have", "pluses", "a plus")),
+    ("required", (
+        "requirement", "qualification", "required", "must have", "must-have", "minimum", "skills",
+        "what you bring", "what we're looking for", "what we are looking for", "who you are",
+        "you have", "looking for", "experience with", "experience in", "proficient", "familiar",
+        "expertise"
+    )),
+    ("responsibilities", ("responsibilit", "what you'll do", "what you will do", "duties", "the role", "day to day")),
+    ("other", ("about", "benefit", "perks", "compensation", "salary", "why join", "location", "equal opportunity")),
+]
+
+# Inline cues that override the section tier for a single line
+PREFERRED_LINE_PATTERN = re.compile(r"\b(?:nice to have|preferred|bonus|a plus|is a plus|desirable|ideally)\b", re.IGNORECASE)
+REQUIRED_LINE_PATTERN = re.compile(r"\b(?:required|must have|must-have|minimum|mandatory)\b", re.IGNORECASE)
+
+# Lines worth surfacing as key requirements
+KEY_REQUIREMENT_PATTERN = re.compile(
+    r"\b(?:\d+\+?\s*(?:years?|yrs)|bachelor'?s?|master'?s?|ph\.?d|degree|certification|certified|"
+    r"required|must have|minimum)\b",
+    re.IGNORECASE
+)
+
+HEADING_MAX_LENGTH = 60
+LEAD_IN_MAX_LENGTH = 120
+LIST_MARKERS = "-*•·–—>"
+
+
+def _classify_heading(line: str) -> str:
+    lowered = line.lower()
+    for kind, keywords in SECTION_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return kind
+    return ""
+
+
+def _section_for_line(line: str) -> str:
+    """Section kind this line starts, or "" if it is ordinary content"""
+    if line.endswith(":") and len(line) <= LEAD_IN_MAX_LENGTH:
+        # "Requirements:" or "We are looking for someone with experience in:"
+        return _classify_heading(line) or "other"
+    if len(line) <= HEADING_MAX_LENGTH and line[0] not in LIST_MARKERS and not line.endswith("."):
+        # Bare headings such as "Nice to have" or "## Qualifications"
+        return _classify_heading(line)
+    return ""
+
+
+def _line_tier(line: str, section_kind: str) -> str:
+    if PREFERRED_LINE_PATTERN.search(line):
+        return "preferred"
+    if REQUIRED_LINE_PATTERN.search(line):
+        return "required"
+    if section_kind in ("required", "preferred"):
+        return section_kind
+    return "other"
+
+
+@lru_cache(maxsize=256)
+def segment_job_description(job_description: str) -> Dict:
+    """
+    Segment a job description in one pass over its lines, tagging every skill by tier
+    (required, preferred, other) and collecting key requirement lines.
+    The result is cached per text and must be treated as read-only.
+    """
+    sections: List[Dict] = []
+    line_starts: List[int] = []
+    line_tiers: List[str] = []
+    key_requirements: List[str] = []
+    section_kind = ""
+
+    offset = 0
+    for raw_line in job_description.splitlines(keepends=True):
+        start = offset
+        offset += len(raw_line)
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        starts_section = _section_for_line(line)
+        if starts_section:
+            section_kind = starts_section
+            if sections:
+                sections[-1]["end"] = start
+            sections.append({"kind": section_kind, "title": line.rstrip(":").lstrip("# ").strip(), "start": start, "end": len(job_description)})
+
+        tier = _line_tier(line, section_kind)
+        line_starts.append(start)
+        line_tiers.append(tier)
+
+        if not starts_section and KEY_REQUIREMENT_PATTERN.search(line):
+            key_requirements.append(line.lstrip(LIST_MARKERS + " ").strip())
+
+    # One taxonomy pass over the full text; matches come back in order, so a
+    # single forward-moving line pointer tags each one with its line's tier
+    skill_tiers: Dict[str, str] = {}
+    line_index = -1
+    for match in get_skill_taxonomy().find(job_description):
+        while line_index + 1 < len(line_starts) and line_starts[line_index + 1] <= match.start:
+            line_index += 1
+        tier = line_tiers[line_index] if line_index >= 0 else "other"
+        current = skill_tiers.get(match.name)
+        if current is None or TIER_RANK[tier] < TIER_RANK[current]:
+            skill_tiers[match.name] = tier
+
+    skills = {tier: [] for tier in TIER_RANK}
+    for name, tier in skill_tiers.items():
+        skills[tier].append(name)
+
+    return {
+        "sections": sections,
+        "skills": skills,
+        "key_requirements": key_requirements
+    }
@@ -0,0 +1,361 @@
+import heapq
+import json
+import math
+import mmap
+import os
+import tempfile
+import threading
+from array import array
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from services.job_description import segment_job_description
+from services.similarity import SKILL_TIER_WEIGHTS, content_words
+from services.skill_taxonomy import get_skill_taxonomy
+
+INDEX_VERSION = 1
+LEXICON_FILE = "lexicon.json"
+POSTING_DOCS_FILE = "postings.docs"  # uint32 doc numbers
+POSTING_WEIGHTS_FILE = "postings.weights"  # float32 weights, parallel to the doc numbers
+TEXTS_FILE = "texts.bin"  # UTF-8 job descriptions, addressed by (offset, length)
+DELTA_FILE = "delta.jsonl"  # adds/removes since the last compaction
+
+# Plain words only break ties between postings with similar skills
+WORD_WEIGHT = 0.25
+
+
+def _word_terms(text: str) -> Counter:
+    return Counter(f"w:{word}" for word in content_words(text))
+
+
+def posting_terms(job_description: str) -> Dict[str, float]:
+    """Weighted index terms of a job description: tiered skills plus content words"""
+    terms = {
+        f"w:{term[2:]}": WORD_WEIGHT * (1 + math.log(count))
+        for term, count in _word_terms(job_description).items()
+    }
+    for tier, skills in segment_job_description(job_description)["skills"].items():
+        for skill in skills:
+            terms[f"s:{skill}"] = SKILL_TIER_WEIGHTS[tier]
+    return terms
+
+
+def resume_terms(resume_text: str) -> List[str]:
+    """Query terms of a resume: its canonical skills plus content words"""
+    skills = [f"s:{skill}" for skill in get_skill_taxonomy().extract(resume_text)]
+    return skills + list(_word_terms(resume_text))
+
+
+def _atomic_write(path: Path, data: bytes):
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class _Segment:
+    """Read-only compacted postings, memory-mapped from disk"""
+
+    def __init__(self, directory: Path):
+        self.terms: Dict[str, List[int]] = {}
+        self.docs: List[Optional[list]] = []
+        self._maps: List[mmap.mmap] = []
+        self.doc_numbers = memoryview(b"").cast("I")
+        self.weights = memoryview(b"").cast("f")
+        self.texts = b""
+
+        lexicon_path = directory / LEXICON_FILE
+        if not lexicon_path.exists():
+            return
+        with open(lexicon_path, "r", encoding="utf-8") as f:
+            lexicon = json.load(f)
+        if lexicon.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported job index version: {lexicon.get('version')}")
+        self.terms = lexicon["terms"]
+        self.docs = lexicon["docs"]
+        self.doc_numbers = self._map(directory / POSTING_DOCS_FILE).cast("I")
+        self.weights = self._map(directory / POSTING_WEIGHTS_FILE).cast("f")
+        self.texts = self._map(directory / TEXTS_FILE)
+
+    def _map(self, path: Path) -> memoryview:
+        if path.stat().st_size == 0:
+            return memoryview(b"")
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return memoryview(mapped)
+
+    def postings(self, term: str) -> Iterable[Tuple[int, float]]:
+        span = self.terms.get(term)
+        if span is None:
+            return ()
+        start, count = span
+        return zip(self.doc_numbers[start:start + count], self.weights[start:start + count])
+
+    def text(self, doc_number: int) -> str:
+        offset, length = self.docs[doc_number][3:5]
+        return bytes(self.texts[offset:offset + length]).decode("utf-8")
+
+    def close(self):
+        self.doc_numbers.release()
+        self.weights.release()
+        if isinstance(self.texts, memoryview):
+            self.texts.release()
+        for mapped in self._maps:
+            mapped.close()
+        self._maps = []
+
+
+class JobIndex:
+    """
+    On-disk inverted index of job postings over canonical skills and content words.
+    A compacted, memory-mapped segment holds most postings; adds and removes go to
+    an append-only delta log (replayed on load) until `compact()` folds them in.
+    """
+
+    def __init__(self, directory: Optional[str] = None, compact_threshold: Optional[int] = None, max_df_ratio: float = 0.2):
+        self.directory = Path(directory or os.getenv("JOB_INDEX_DIR", "job_index"))
+        self.compact_threshold = compact_threshold or int(os.getenv("JOB_INDEX_COMPACT_THRESHOLD", "1000"))
+        # Words found in more postings than this share barely discriminate and are skipped at query time
+        self.max_df_ratio = max_df_ratio
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self):
+        self._segment = _Segment(self.directory)
+        # job_id -> ("base", doc number) or ("delta", job dict)
+        self._locations: Dict[str, tuple] = {
+            doc[0]: ("base", doc_number)
+            for doc_number, doc in enumerate(self._segment.docs)
+            if doc is not None
+        }
+        self._removed_base = set()
+        self._delta_jobs: Dict[str, Dict] = {}
+        self._delta_postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._delta_ops = 0
+
+        delta_path = self.directory / DELTA_FILE
+        if delta_path.exists():
+            with open(delta_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._apply(json.loads(line))
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self._locations
+
+    def add(self, job_id: str, job_description: str, job_title: str = "", company: str = ""):
+        """Index a posting, replacing any posting with the same id"""
+        self.add_many([{
+            "job_id": job_id,
+            "job_title": job_title,
+            "company": company,
+            "job_description": job_description
+        }])
+
+    def add_many(self, jobs: Iterable[Dict]):
+        """Index many postings ({job_id, job_description, job_title?, company?}) with one log write"""
+        self._log([
+            {
+                "op": "add",
+                "job_id": job["job_id"],
+                "job_title": job.get("job_title", ""),
+                "company": job.get("company", ""),
+                "job_description": job["job_description"]
+            }
+            for job in jobs
+        ])
+
+    def remove(self, job_id: str) -> bool:
+        """Drop a posting; returns False if it was not indexed"""
+        with self._lock:
+            if job_id not in self._locations:
+                return False
+            self._log([{"op": "remove", "job_id": job_id}])
+            return True
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            location = self._locations.get(job_id)
+            if location is None:
+                return None
+            kind, value = location
+            if kind == "delta":
+                return {
+                    "job_id": job_id,
+                    "job_title": value["job_title"],
+                    "company": value["company"],
+                    "job_description": value["job_description"]
+                }
+            doc = self._segment.docs[value]
+            return {
+                "job_id": doc[0],
+                "job_title": doc[1],
+                "company": doc[2],
+                "job_description": self._segment.text(value)
+            }
+
+    def search(self, resume_text: str, k: int = 20) -> List[Dict]:
+        """Top-k postings for a resume, best first, with their scores and shared skills"""
+        query = resume_terms(resume_text)
+        with self._lock:
+            total = len(self._locations)
+            if not total or not query:
+                return []
+
+            scores: Dict[tuple, float] = defaultdict(float)
+            matched_skills: Dict[tuple, List[str]] = defaultdict(list)
+            for term in dict.fromkeys(query):
+                base = self._segment.postings(term)
+                delta = self._delta_postings.get(term, {})
+                base_df = self._segment.terms.get(term, (0, 0))[1]
+                df = base_df + len(delta)
+                if not df or (term.startswith("w:") and df > max(1, self.max_df_ratio * total)):
+                    continue
+                idf = math.log(1 + total / df)
+                is_skill = term.startswith("s:")
+                for doc_number, weight in base:
+                    if doc_number in self._removed_base:
+                        continue
+                    key = ("base", doc_number)
+                    scores[key] += idf * weight
+                    if is_skill:
+                        matched_skills[key].append(term[2:])
+                for job_id, weight in delta.items():
+                    key = ("delta", job_id)
+                    scores[key] += idf * weight
+                    if is_skill:
+                        matched_skills[key].append(term[2:])
+
+            results = []
+            for key, score in scores.items():
+                kind, value = key
+                if kind == "base":
+                    doc = self._segment.docs[value]
+                    job_id, job_title, company, norm = doc[0], doc[1], doc[2], doc[5]
+                else:
+                    job = self._delta_jobs[value]
+                    job_id, job_title, company, norm = value, job["job_title"], job["company"], job["norm"]
+                results.append((score / norm if norm else 0.0, job_id, job_title, company, key))
+
+            # Ties break on job id so rankings are deterministic
+            top = heapq.nsmallest(k, results, key=lambda item: (-item[0], item[1]))
+            return [
+                {
+                    "job_id": job_id,
+                    "job_title": job_title,
+                    "company": company,
+                    "score": round(score, 4),
+                    "matched_skills": matched_skills.get(key, [])
+                }
+                for score, job_id, job_title, company, key in top
+            ]
+
+    def compact(self):
+        """Fold the delta log into a new memory-mapped segment"""
+        with self._lock:
+            segment = self._segment
+            doc_map: Dict[int, int] = {}
+            docs: List[list] = []
+            texts = bytearray()
+            postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+
+            for doc_number, doc in enumerate(segment.docs):
+                if doc is None or doc_number in self._removed_base:
+                    continue
+                encoded = segment.text(doc_number).encode("utf-8")
+                doc_map[doc_number] = len(docs)
+                docs.append([doc[0], doc[1], doc[2], len(texts), len(encoded), doc[5]])
+                texts += encoded
+            for term, (start, count) in segment.terms.items():
+                for doc_number, weight in zip(segment.doc_numbers[start:start + count], segment.weights[start:start + count]):
+                    if doc_number in doc_map:
+                        postings[term].append((doc_map[doc_number], weight))
+
+            for job_id, job in self._delta_jobs.items():
+                encoded = job["job_description"].encode("utf-8")
+                new_number = len(docs)
+                docs.append([job_id, job["job_title"], job["company"], len(texts), len(encoded), job["norm"]])
+                texts += encoded
+                for term, weight in job["terms"].items():
+                    postings[term].append((new_number, weight))
+
+            terms: Dict[str, List[int]] = {}
+            doc_numbers = array("I")
+            weights = array("f")
+            for term in sorted(postings):
+                terms[term] = [len(doc_numbers), len(postings[term])]
+                for doc_number, weight in postings[term]:
+                    doc_numbers.append(doc_number)
+                    weights.append(weight)
+
+            segment.close()
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Postings go first so a crash never leaves a lexicon pointing past them
+            _atomic_write(self.directory / POSTING_DOCS_FILE, doc_numbers.tobytes())
+            _atomic_write(self.directory / POSTING_WEIGHTS_FILE, weights.tobytes())
+            _atomic_write(self.directory / TEXTS_FILE, bytes(texts))
+            _atomic_write(
+                self.directory / LEXICON_FILE,
+                json.dumps({"version": INDEX_VERSION, "terms": terms, "docs": docs}).encode("utf-8")
+            )
+            _atomic_write(self.directory / DELTA_FILE, b"")
+            self._load()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "jobs": len(self._locations),
+                "terms": len(self._segment.terms) + sum(1 for term in self._delta_postings if term not in self._segment.terms),
+                "segment_jobs": len(self._segment.docs),
+                "delta_operations": self._delta_ops
+            }
+
+    def close(self):
+        with self._lock:
+            self._segment.close()
+
+    def _log(self, ops: List[Dict]):
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.directory / DELTA_FILE, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(op) + "\n" for op in ops))
+            for op in ops:
+                self._apply(op)
+            if self._delta_ops >= self.compact_threshold:
+                self.compact()
+
+    def _apply(self, op: Dict):
+        job_id = op["job_id"]
+        location = self._locations.pop(job_id, None)
+        if location is not None:
+            kind, value = location
+            if kind == "base":
+                self._removed_base.add(value)
+            else:
+                for term in self._delta_jobs.pop(job_id)["terms"]:
+                    self._delta_postings[term].pop(job_id, None)
+
+        if op["op"] == "add":
+            terms = posting_terms(op["job_description"])
+            job = {
+                "job_title": op.get("job_title", ""),
+                "company": op.get("company", ""),
+                "job_description": op["job_description"],
+                "terms": terms,
+                "norm": math.sqrt(sum(weight * weight for weight in terms.values()))
+            }
+            self._delta_jobs[job_id] = job
+            self._locations[job_id] = ("delta", job)
+            for term, weight in terms.items():
+                self._delta_postings[term][job_id] = weight
+        self._delta_ops += 1
@@ -1,29 +1,34 @@
-import re
 import json
 from typing import Dict, List, Optional
-import openai
-import os
 from dotenv import load_dotenv
+from services.circuit_breaker import mark_degraded
+from services.job_description import segment_job_description
+from services.llm_gateway import LLMGateway, llm_gateway
+from services.prompt_context import PromptContext, context_budget
+from services.similarity import similarity_percentage
+from services.skill_taxonomy import get_skill_taxonomy
 
 load_dotenv()
 
 class JobMatcher:
-    def __init__(self):
-        self.client = openai.OpenAI(
-            api_key=os.getenv("OPENAI_API_KEY", "your-openai-api-key")
-        )
+    def __init__(self, gateway: Optional[LLMGateway] = None):
+        self.gateway = gateway or llm_gateway
     
-    def match_job(self, resume_text: str, job_description: str) -> Dict:
+    async def match_job(self, resume_text: str, job_description: str, context: Optional[PromptContext] = None) -> Dict:
         """
         Match resume skills with job requirements using AI
         """
         try:
             # Use AI for sophisticated job matching
-            matching_prompt = self._create_job_matching_prompt(resume_text, job_description)
+            context = context or PromptContext(resume_text, job_description)
+            matching_prompt = self._create_job_matching_prompt(
+                context.resume_digest(context_budget("job_matching", "resume")),
+                context.job_digest(context_budget("job_matching", "job"))
+            )
             
             try:
-                response = self.client.chat.completions.create(
-                    model="gpt-3.5-turbo",
+                response = await self.gateway.create(
+                    endpoint="job_matching",
                     messages=[
                         {
                             "role": "system",
@@ -33,62 +38,17 @@ class JobMatcher:
                             "role": "user",
                             "content": matching_prompt
                         }
-                    ],
-                    temperature=0.2,
-                    max_tokens=1500
+                    ]
                 )
                 
                 # Parse AI response
                 ai_matching = self._parse_matching_response(response.choices[0].message.content)
-                
-                # Combine AI analysis with regex-based extraction
-                resume_skills = self._extract_skills_from_text(resume_text)
-                job_skills = self._extract_skills_from_job_description(job_description)
-                
-                # Use AI results if available, otherwise fall back to regex
-                matching_skills = ai_matching.get("matching_skills", list(set(resume_skills) & set(job_skills)))
-                missing_skills = ai_matching.get("missing_skills", list(set(job_skills) - set(resume_skills)))
-                extra_skills = ai_matching.get("extra_skills", list(set(resume_skills) - set(job_skills)))
-                
-                # Calculate match percentage
-                match_percentage = ai_matching.get("match_percentage", 
-                    (len(matching_skills) / len(job_skills)) * 100 if job_skills else 0)
-                
-                return {
-                    "match_percentage": round(match_percentage, 2),
-                    "matching_skills": matching_skills,
-                    "missing_skills": missing_skills,
-                    "extra_skills": extra_skills,
-                    "total_resume_skills": len(resume_skills),
-                    "total_job_skills": len(job_skills),
-                    "matching_count": len(matching_skills),
-                    "ai_analysis": ai_matching.get("ai_analysis", {}),
-                    "skill_gaps": ai_matching.get("skill_gaps", []),
-                    "transferable_skills": ai_matching.get("transferable_skills", [])
-                }
+                return self._combine_match(resume_text, job_description, ai_matching)
                 
             except Exception as ai_error:
                 print(f"AI matching failed, falling back to regex: {str(ai_error)}")
                 # Fallback to regex-based matching
-                resume_skills = self._extract_skills_from_text(resume_text)
-                job_skills = self._extract_skills_from_job_description(job_description)
-                matching_skills = list(set(resume_skills) & set(job_skills))
-                missing_skills = list(set(job_skills) - set(resume_skills))
-                extra_skills = list(set(resume_skills) - set(job_skills))
-                match_percentage = (len(matching_skills) / len(job_skills)) * 100 if job_skills else 0
-                
-                return {
-                    "match_percentage": round(match_percentage, 2),
-                    "matching_skills": matching_skills,
-                    "missing_skills": missing_skills,
-                    "extra_skills": extra_skills,
-                    "total_resume_skills": len(resume_skills),
-                    "total_job_skills": len(job_skills),
-                    "matching_count": len(matching_skills),
-                    "ai_analysis": {},
-                    "skill_gaps": [],
-                    "transferable_skills": []
-                }
+                return self._fallback_match(resume_text, job_description)
             
         except Exception as e:
             print(f"Error matching job: {str(e)}")
@@ -103,19 +63,25 @@ class JobMatcher:
                 "error": "Failed to match job requirements"
             }
     
-    def generate_recommendations(self, resume_text: str, job_description: str) -> List[str]:
+    async def generate_recommendations(self, resume_text: str, job_description: str, context: Optional[PromptContext] = None) -> List[str]:
         """Generate personalized recommendations based on resume and job description"""
         try:
             # Extract skills from resume and job description
             resume_skills = self._extract_skills_from_text(resume_text)
             job_skills = self._extract_skills_from_job_description(job_description)
             
-            # Create AI prompt for recommendations
-            prompt = self._create_recommendations_prompt_simple(resume_text, job_description, resume_skills, job_skills)
+            # Create AI prompt for recommendations from the most relevant parts of both texts
+            context = context or PromptContext(resume_text, job_description)
+            prompt = self._create_recommendations_prompt_simple(
+                context.resume_digest(context_budget("recommendations", "resume")),
+                context.job_digest(context_budget("recommendations", "job")),
+                resume_skills,
+                job_skills
+            )
             
             # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model="gpt-4",
+            response = await self.gateway.create(
+                endpoint="recommendations",
                 messages=[
                     {
                         "role": "system",
@@ -125,9 +91,7 @@ class JobMatcher:
                         "role": "user",
                         "content": prompt
                     }
-                ],
-                max_tokens=600,
-                temperature=0.7
+                ]
             )
             
             ai_response = response.choices[0].message.content.strip()
@@ -135,16 +99,14 @@ class JobMatcher:
             
             # If AI recommendations fail, use fallback
             if not recommendations:
+                mark_degraded("recommendations")
                 recommendations = self._generate_fallback_recommendations_simple(resume_skills, job_skills)
             
             return recommendations[:5]  # Limit to 5 recommendations
             
         except Exception as e:
             print(f"AI recommendations failed, falling back to basic recommendations: {str(e)}")
-            # Extract skills for fallback
-            resume_skills = self._extract_skills_from_text(resume_text)
-            job_skills = self._extract_skills_from_job_description(job_description)
-            return self._generate_fallback_recommendations_simple(resume_skills, job_skills)
+            return self._fallback_recommendations(resume_text, job_description)
             
         except Exception as e:
             print(f"Error generating recommendations: {str(e)}")
@@ -154,47 +116,72 @@ class JobMatcher:
                 "Consider having someone review your application materials"
             ]
     
-    def _extract_skills_from_text(self, text: str) -> List[str]:
-        """Extract skills from resume text"""
-        # Common technical skills to look for
-        skill_patterns = [
-            r'\b(?:Python|Java|JavaScript|React|Node\.js|Angular|Vue\.js|TypeScript|HTML|CSS|SQL|MongoDB|PostgreSQL|MySQL|AWS|Azure|Docker|Kubernetes|Git|GitHub|Agile|Scrum|JIRA|Jenkins|CI/CD|REST API|GraphQL|Microservices|Machine Learning|AI|Data Science|Tableau|Power BI|Excel|Word|PowerPoint|Photoshop|Illustrator|Figma|Sketch)\b',
-            r'\b(?:Programming|Development|Coding|Software|Web|Mobile|Database|Cloud|DevOps|Testing|QA|UI/UX|Design|Analytics|Business Intelligence|Project Management|Leadership|Communication|Problem Solving|Critical Thinking|Teamwork|Collaboration)\b'
-        ]
-        
-        skills = set()
-        for pattern in skill_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            skills.update(matches)
-        
-        return list(skills)
-    
-    def _extract_skills_from_job_description(self, job_description: str) -> List[str]:
-        """Extract required skills from job description"""
-        # Look for skills mentioned in the job description
-        skill_indicators = [
-            r'required.*?skills?.*?[:;]',
-            r'qualifications.*?[:;]',
-            r'requirements.*?[:;]',
-            r'experience.*?with.*?[:;]',
-            r'proficient.*?in.*?[:;]',
-            r'familiar.*?with.*?[:;]',
-            r'expertise.*?in.*?[:;]'
-        ]
+    def _combine_match(self, resume_text: str, job_description: str, ai_matching: Dict) -> Dict:
+        """Combine AI matching with regex-based extraction"""
+        resume_skills = self._extract_skills_from_text(resume_text)
+        job_skills = self._extract_skills_from_job_description(job_description)
         
-        skills = set()
+        # Use AI results if available, otherwise fall back to regex
+        matching_skills = ai_matching.get("matching_skills", list(set(resume_skills) & set(job_skills)))
+        missing_skills = ai_matching.get("missing_skills", list(set(job_skills) - set(resume_skills)))
+        extra_skills = ai_matching.get("extra_skills", list(set(resume_skills) - set(job_skills)))
         
-        # Extract skills from the entire job description
-        skills.update(self._extract_skills_from_text(job_description))
+        # Calculate match percentage
+        match_percentage = ai_matching.get("match_percentage", 
+            (len(matching_skills) / len(job_skills)) * 100 if job_skills else 0)
         
-        # Look for skills in specific sections
-        for indicator in skill_indicators:
-            sections = re.findall(indicator, job_description, re.IGNORECASE | re.DOTALL)
-            for section in sections:
-                section_skills = self._extract_skills_from_text(section)
-                skills.update(section_skills)
+        return {
+            "match_percentage": round(match_percentage, 2),
+            "matching_skills": matching_skills,
+            "missing_skills": missing_skills,
+            "extra_skills": extra_skills,
+            "total_resume_skills": len(resume_skills),
+            "total_job_skills": len(job_skills),
+            "matching_count": len(matching_skills),
+            "ai_analysis": ai_matching.get("ai_analysis", {}),
+            "skill_gaps": ai_matching.get("skill_gaps", []),
+            "transferable_skills": ai_matching.get("transferable_skills", [])
+        }
+    
+    def _fallback_match(self, resume_text: str, job_description: str) -> Dict:
+        """Local job matching used when the AI call is unavailable"""
+        mark_degraded("job_matching")
+        resume_skills = self._extract_skills_from_text(resume_text)
+        job_skills = self._extract_skills_from_job_description(job_description)
+        matching_skills = list(set(resume_skills) & set(job_skills))
+        missing_skills = list(set(job_skills) - set(resume_skills))
+        extra_skills = list(set(resume_skills) - set(job_skills))
+        # BM25 coverage of the whole posting, so jobs outside the skill taxonomy still score
+        match_percentage = similarity_percentage(resume_text, job_description)
         
-        return list(skills)
+        return {
+            "match_percentage": round(match_percentage, 2),
+            "matching_skills": matching_skills,
+            "missing_skills": missing_skills,
+            "extra_skills": extra_skills,
+            "total_resume_skills": len(resume_skills),
+            "total_job_skills": len(job_skills),
+            "matching_count": len(matching_skills),
+            "ai_analysis": {},
+            "skill_gaps": [],
+            "transferable_skills": []
+        }
+    
+    def _fallback_recommendations(self, resume_text: str, job_description: str) -> List[str]:
+        """Skill-gap recommendations used when the AI call is unavailable"""
+        mark_degraded("recommendations")
+        resume_skills = self._extract_skills_from_text(resume_text)
+        job_skills = self._extract_skills_from_job_description(job_description)
+        return self._generate_fallback_recommendations_simple(resume_skills, job_skills)
+    
+    def _extract_skills_from_text(self, text: str) -> List[str]:
+        """Extract skills from resume text as canonical skill names"""
+        return get_skill_taxonomy().extract(text)
+    
+    def _extract_skills_from_job_description(self, job_description: str) -> List[str]:
+        """Extract skills from job description, required ones first, then preferred, then the rest"""
+        tiers = segment_job_description(job_description)["skills"]
+        return tiers["required"] + tiers["preferred"] + tiers["other"]
     
     def _calculate_skill_match(self, resume_skills: List[str], job_skills: List[str]) -> float:
         """Calculate the percentage match between resume and job skills"""
@@ -206,21 +193,7 @@ class JobMatcher:
     
     def _identify_key_requirements(self, job_description: str) -> List[str]:
         """Identify key requirements from job description"""
-        requirements = []
-        
-        # Look for common requirement patterns
-        requirement_patterns = [
-            r'(?:minimum|required|must have).*?(?:years?|experience)',
-            r'(?:bachelor|master|phd|degree).*?(?:required|preferred)',
-            r'(?:certification|certified).*?(?:required|preferred)',
-            r'(?:experience|expertise).*?(?:with|in).*?[:;]'
-        ]
-        
-        for pattern in requirement_patterns:
-            matches = re.findall(pattern, job_description, re.IGNORECASE)
-            requirements.extend(matches)
-        
-        return requirements[:5]  # Limit to top 5 requirements
+        return segment_job_description(job_description)["key_requirements"][:5]  # Limit to top 5 requirements
     
     def _create_job_matching_prompt(self, resume_text: str, job_description: str) -> str:
         """Create a comprehensive prompt for AI job matching"""
@@ -430,10 +403,10 @@ Focus on quality over quantity - provide the most valuable 5 recommendations tha
         As an expert career coach and resume writer, provide 5 specific, actionable recommendations for improving a resume to better match this job description.
 
         RESUME TEXT:
-        {resume_text[:1000]}...
+        {resume_text}
 
         JOB DESCRIPTION:
-        {job_description[:1000]}...
+        {job_description}
 
         RESUME SKILLS:
         {', '.join(resume_skills)}
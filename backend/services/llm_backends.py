@@ -0,0 +1,72 @@
+import os
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+import openai
+
+
+class LLMBackend:
+    """
+    A place chat completions can be sent: any client with an OpenAI-style
+    `chat.completions.create` (and, optionally, `with_raw_response` for headers).
+    """
+
+    def __init__(self, name: str, client: Any, http_client: Optional[httpx.AsyncClient] = None):
+        self.name = name
+        self.client = client
+        self.http_client = http_client
+
+    async def aclose(self):
+        if self.http_client is not None:
+            await self.http_client.aclose()
+
+
+def openai_backend(
+    name: str,
+    base_url: Optional[str] = None,
+    base_url_env: Optional[str] = None,
+    api_key: Optional[str] = None,
+    api_key_env: Optional[str] = None,
+    max_connections: Optional[int] = None,
+    timeout: float = 60.0
+) -> LLMBackend:
+    """
+    The OpenAI API, or any OpenAI-compatible server (vLLM, Ollama, LM Studio,
+    llama.cpp) at `base_url`, on one keep-alive connection pool
+    """
+    if max_connections is None:
+        max_connections = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+    http_client = openai.DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+        ),
+        timeout=httpx.Timeout(timeout, connect=float(os.getenv("LLM_CONNECT_TIMEOUT", "5")))
+    )
+    client = openai.AsyncOpenAI(
+        # Local servers usually ignore the key, but the client insists on one
+        api_key=api_key or (os.getenv(api_key_env) if api_key_env else None) or "your-openai-api-key",
+        base_url=base_url or (os.getenv(base_url_env) if base_url_env else None) or None,
+        http_client=http_client,
+        # Retries are the gateway's, so they are counted and jittered the same way everywhere
+        max_retries=0
+    )
+    return LLMBackend(name, client, http_client)
+
+
+# Backend "type" in the routing configuration -> factory(name, **settings)
+BACKEND_TYPES: Dict[str, Callable[..., LLMBackend]] = {"openai": openai_backend}
+
+
+def register_backend_type(kind: str, factory: Callable[..., LLMBackend]):
+    """Make `{"type": kind, ...}` usable in the routing configuration"""
+    BACKEND_TYPES[kind] = factory
+
+
+def create_backend(name: str, settings: Dict[str, Any]) -> LLMBackend:
+    settings = dict(settings)
+    kind = settings.pop("type", "openai")
+    if kind not in BACKEND_TYPES:
+        raise ValueError(f"Unknown LLM backend type '{kind}' for backend '{name}'")
+    return BACKEND_TYPES[kind](name, **settings)
@@ -0,0 +1,321 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional
+
+from dotenv import load_dotenv
+from openai.types.chat import ChatCompletion
+
+from services.single_flight import SingleFlight
+
+load_dotenv()
+
+# How long a cached completion stays valid, per endpoint (seconds).
+# Job-only prompts change rarely; resume-specific ones are kept for a day.
+ENDPOINT_TTLS = {
+    "resume_analysis": 24 * 3600,
+    "job_matching": 24 * 3600,
+    "recommendations": 24 * 3600,
+    "combined_analysis": 24 * 3600,
+    "job_description_analysis": 7 * 24 * 3600,
+    "career_advice": 7 * 24 * 3600,
+    "resume_optimization_tips": 7 * 24 * 3600,
+    "interview_preparation": 24 * 3600,
+}
+DEFAULT_TTL = 3600
+# Expired disk entries are swept at least this often (seconds), even while the tier is under its size cap
+DISK_SWEEP_INTERVAL = 600
+# Entries start with their expiry, so a sweep reads a few bytes per file instead of parsing it
+EXPIRES_AT = re.compile(rb'"expires_at":\s*([0-9.eE+-]+)')
+
+
+class LLMCache:
+    """
+    Content-addressed cache for chat completions with a memory LRU tier and a disk tier.
+    Identical cacheable requests that arrive while one is already in flight share its
+    upstream call instead of issuing their own (even with the cache itself disabled).
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+        enabled: Optional[bool] = None,
+        coalesce: Optional[bool] = None,
+        max_disk_bytes: Optional[int] = None
+    ):
+        self.max_entries = max_entries or int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+        self.max_disk_bytes = max_disk_bytes or int(os.getenv("LLM_CACHE_MAX_DISK_BYTES", str(256 * 1024 * 1024)))
+        cache_dir = cache_dir if cache_dir is not None else os.getenv("LLM_CACHE_DIR", ".cache/llm")
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if enabled is None:
+            enabled = os.getenv("LLM_CACHE_ENABLED", "True").lower() == "true"
+        self.enabled = enabled
+        if coalesce is None:
+            coalesce = os.getenv("LLM_COALESCE_ENABLED", "True").lower() == "true"
+        self.coalesce = coalesce
+        self.flights = SingleFlight()
+
+        # key -> (expires_at, response payload)
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0, "coalesced": 0, "evictions": 0, "disk_evictions": 0}
+        # Approximate size of the disk tier; unknown until the first sweep
+        self._disk_bytes: Optional[int] = None
+        self._last_sweep = 0.0
+        self._sweep_lock = threading.Lock()
+        self._endpoint_stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def make_key(params: Dict) -> str:
+        """Hash the request parameters (model, messages, temperature, max_tokens, ...), ignoring prompt whitespace"""
+        normalized = dict(params)
+        if "messages" in params:
+            normalized["messages"] = [
+                {**message, "content": " ".join(message["content"].split())}
+                if isinstance(message.get("content"), str) else message
+                for message in params["messages"]
+            ]
+        canonical = json.dumps(normalized, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    async def create(self, client, *, endpoint: str, use_cache: bool = True, **params) -> ChatCompletion:
+        """Serve `client.chat.completions.create(**params)` from the cache (or an identical in-flight call) when possible"""
+        if not use_cache or not (self.enabled or self.coalesce):
+            self._record(endpoint, "bypassed")
+            return await client.chat.completions.create(**params)
+
+        key = self.make_key(params)
+        if self.enabled:
+            cached = await self.get(key, endpoint)
+            if cached is not None:
+                return ChatCompletion.model_validate(cached)
+        else:
+            self._record(endpoint, "bypassed")
+
+        if not self.coalesce:
+            return await self._fetch(client, key, endpoint, params)
+        if self.flights.in_flight(key):
+            self._record(endpoint, "coalesced")
+        return await self.flights.do(key, lambda: self._fetch(client, key, endpoint, params))
+
+    async def _fetch(self, client, key: str, endpoint: str, params: Dict) -> ChatCompletion:
+        response = await client.chat.completions.create(**params)
+        if self.enabled:
+            await self.set(key, response.model_dump(mode="json"), ENDPOINT_TTLS.get(endpoint, DEFAULT_TTL))
+        return response
+
+    async def stream(self, client, *, endpoint: str, use_cache: bool = True, **params) -> AsyncIterator[str]:
+        """
+        Like `create`, but yield the completion text as the model produces it.
+        A cache hit yields the whole text at once; a stream that runs to completion
+        is stored under the same key as the equivalent non-streaming request.
+        """
+        key = self.make_key(params) if use_cache else None
+        if key is not None and self.enabled:
+            cached = await self.get(key, endpoint)
+            if cached is not None:
+                yield ChatCompletion.model_validate(cached).choices[0].message.content or ""
+                return
+        else:
+            self._record(endpoint, "bypassed")
+
+        if key is not None and self.coalesce and self.flights.in_flight(key):
+            # An identical non-streaming call is already running; share its answer
+            self._record(endpoint, "coalesced")
+            response = await self.flights.join(key)
+            yield response.choices[0].message.content or ""
+            return
+
+        parts = []
+        finish_reason = usage = None
+        response_id = created = None
+        # Without include_usage a stream never reports its token usage; it arrives as a last chunk without choices
+        upstream = await client.chat.completions.create(stream=True, **{"stream_options": {"include_usage": True}, **params})
+        try:
+            async for chunk in upstream:
+                response_id = response_id or chunk.id
+                created = created or chunk.created
+                usage = getattr(chunk, "usage", None) or usage
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.delta.content:
+                    parts.append(choice.delta.content)
+                    yield choice.delta.content
+                finish_reason = choice.finish_reason or finish_reason
+        finally:
+            close = getattr(upstream, "close", None)
+            if close is not None:
+                await close()
+
+        if key is not None and self.enabled and finish_reason is not None:
+            await self.set(key, {
+                "id": response_id or "chatcmpl-stream",
+                "object": "chat.completion",
+                "created": created or int(time.time()),
+                "model": params.get("model", ""),
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": finish_reason,
+                    "message": {"role": "assistant", "content": "".join(parts)}
+                }],
+                "usage": usage.model_dump(mode="json") if usage is not None else None
+            }, ENDPOINT_TTLS.get(endpoint, DEFAULT_TTL))
+
+    async def get(self, key: str, endpoint: str = "default") -> Optional[Dict]:
+        """Look a payload up in memory first, then on disk"""
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, payload = entry
+            if expires_at > time.time():
+                self._memory.move_to_end(key)
+                self._record(endpoint, "memory_hits")
+                return payload
+            del self._memory[key]
+
+        if self.cache_dir is not None:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry is not None:
+                expires_at, payload = entry
+                self._remember(key, expires_at, payload)
+                self._record(endpoint, "disk_hits")
+                return payload
+
+        self._record(endpoint, "misses")
+        return None
+
+    async def set(self, key: str, payload: Dict, ttl: int):
+        """Store a payload in both tiers"""
+        expires_at = time.time() + ttl
+        self._remember(key, expires_at, payload)
+        if self.cache_dir is not None:
+            await asyncio.to_thread(self._write_disk, key, expires_at, payload)
+
+    def clear(self):
+        """Drop the memory tier (the disk tier is left in place)"""
+        self._memory.clear()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters overall and per endpoint"""
+        lookups = self._stats["memory_hits"] + self._stats["disk_hits"] + self._stats["misses"]
+        hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+        return {
+            **self._stats,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "disk_bytes": self._disk_bytes,
+            "max_disk_bytes": self.max_disk_bytes,
+            "single_flight": self.flights.stats(),
+            "endpoints": {name: dict(counts) for name, counts in self._endpoint_stats.items()}
+        }
+
+    def _remember(self, key: str, expires_at: float, payload: Dict):
+        self._memory[key] = (expires_at, payload)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _record(self, endpoint: str, counter: str):
+        self._stats[counter] += 1
+        counts = self._endpoint_stats.setdefault(endpoint, {"hits": 0, "misses": 0, "bypassed": 0, "coalesced": 0})
+        if counter.endswith("_hits"):
+            counts["hits"] += 1
+        else:
+            counts[counter] += 1
+
+    def _disk_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _read_disk(self, key: str) -> Optional[tuple]:
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get("expires_at", 0) <= time.time():
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+        try:
+            # Sweeps evict the least recently used entries first
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["expires_at"], entry["response"]
+
+    def _write_disk(self, key: str, expires_at: float, payload: Dict):
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temp file and rename so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"expires_at": expires_at, "response": payload}, f)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing LLM cache entry {key}: {str(e)}")
+            return
+
+        if self._disk_bytes is not None:
+            self._disk_bytes += size
+        if (
+            self._disk_bytes is None
+            or self._disk_bytes > self.max_disk_bytes
+            or time.monotonic() - self._last_sweep > DISK_SWEEP_INTERVAL
+        ):
+            self._sweep_disk()
+
+    def _sweep_disk(self):
+        """Delete expired entries, then the least recently used ones until the tier is under 90% of its cap"""
+        if not self._sweep_lock.acquire(blocking=False):
+            # Another write is already sweeping
+            return
+        try:
+            now = time.time()
+            entries = []
+            for path in self.cache_dir.glob("*/*.json"):
+                try:
+                    stat = path.stat()
+                    with open(path, "rb") as f:
+                        match = EXPIRES_AT.search(f.read(64))
+                    if match is None or float(match.group(1)) <= now:
+                        path.unlink()
+                        continue
+                except (OSError, ValueError):
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            if total > self.max_disk_bytes:
+                entries.sort()
+                target = self.max_disk_bytes * 0.9
+                for _, size, path in entries:
+                    if total <= target:
+                        break
+                    try:
+                        path.unlink()
+                    except OSError:
+                        continue
+                    total -= size
+                    self._stats["disk_evictions"] += 1
+            self._disk_bytes = total
+            self._last_sweep = time.monotonic()
+        finally:
+            self._sweep_lock.release()
+
+
+llm_cache = LLMCache()
@@ -0,0 +1,224 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from services.llm_cache import LLMCache
+
+MODES = ("record", "replay")
+# How a request is sent, not what is asked; a streamed and a plain call share a recording
+TRANSPORT_PARAMS = ("stream", "stream_options", "timeout")
+
+
+class CassetteMissError(LookupError):
+    """Replay found no recording for a request"""
+
+
+def request_key(params: Dict) -> str:
+    """Normalized prompt hash: the LLM cache key of the request without its transport options"""
+    return LLMCache.make_key({name: value for name, value in params.items() if name not in TRANSPORT_PARAMS})
+
+
+def latency_model(spec: Optional[str], seed: Optional[int] = None) -> Optional[Callable[[float], float]]:
+    """
+    Simulated latency for replay, as a function of the recorded latency:
+    "recorded", "fixed:<s>", "uniform:<min>,<max>" or "lognormal:<median>,<sigma>".
+    Empty or "none" replays without delay.
+    """
+    if not spec or spec == "none":
+        return None
+    if spec == "recorded":
+        return lambda recorded: recorded
+    kind, _, args = spec.partition(":")
+    values = [float(value) for value in args.split(",") if value]
+    rng = random.Random(seed)
+    if kind == "fixed" and len(values) == 1:
+        return lambda recorded: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda recorded: rng.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        return lambda recorded: rng.lognormvariate(0, values[1]) * values[0]
+    raise ValueError(f"Unknown cassette latency '{spec}'")
+
+
+class Cassette:
+    """
+    JSON Lines file of chat completion calls: the request, its key and either the
+    response or the streamed chunks, with their timing. In record mode every call
+    goes upstream and is appended; in replay mode calls are answered from the file
+    (recordings of the same request in turn) and nothing leaves the process.
+    """
+
+    def __init__(self, path: str, mode: str, latency: Optional[str] = None, seed: Optional[int] = None):
+        if mode not in MODES:
+            raise ValueError(f"Cassette mode must be one of {MODES}, not '{mode}'")
+        self.path = Path(path)
+        self.mode = mode
+        self.latency = latency_model(latency, seed)
+        self._lock = threading.Lock()
+        self._recordings: Dict[str, List[Dict]] = {}
+        self._turns: Dict[str, int] = {}
+        self._stats = {"recorded": 0, "replayed": 0, "misses": 0}
+        if mode == "replay":
+            self._load()
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional["Cassette"]:
+        """The cassette configured by LLM_CASSETTE_MODE, LLM_CASSETTE_PATH and LLM_CASSETTE_LATENCY, if any"""
+        mode = os.getenv("LLM_CASSETTE_MODE", "").lower()
+        if not mode or mode == "off":
+            return None
+        return cls(
+            os.getenv("LLM_CASSETTE_PATH", ".cache/llm_cassette.jsonl"),
+            mode,
+            os.getenv("LLM_CASSETTE_LATENCY") or None
+        )
+
+    def wrap(self, client: Any) -> Any:
+        """A client whose `chat.completions` records to, or replays from, this cassette"""
+        return SimpleNamespace(chat=SimpleNamespace(completions=CassetteCompletions(self, client.chat.completions)))
+
+    def lookup(self, key: str) -> Dict:
+        recordings = self._recordings.get(key)
+        if not recordings:
+            self._stats["misses"] += 1
+            raise CassetteMissError(f"No recording in {self.path} for request {key[:12]}")
+        turn = self._turns.get(key, 0)
+        self._turns[key] = turn + 1
+        self._stats["replayed"] += 1
+        return recordings[turn % len(recordings)]
+
+    def append(self, entry: Dict):
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+        self._recordings.setdefault(entry["key"], []).append(entry)
+        self._stats["recorded"] += 1
+
+    def stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "path": str(self.path),
+            "requests": len(self._recordings),
+            **self._stats
+        }
+
+    def _load(self):
+        if not self.path.exists():
+            raise FileNotFoundError(f"Cassette {self.path} does not exist; record it first with LLM_CASSETTE_MODE=record")
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._recordings.setdefault(entry["key"], []).append(entry)
+
+
+class CassetteCompletions:
+    """`chat.completions` in front of a cassette: records the calls `inner` answers, or replays them"""
+
+    def __init__(self, cassette: Cassette, inner: Any = None):
+        self.cassette = cassette
+        self.inner = inner
+
+    async def create(self, **params):
+        key = request_key(params)
+        if self.cassette.mode == "replay":
+            entry = self.cassette.lookup(key)
+            if params.get("stream"):
+                return self._replay_stream(entry)
+            await self._delay(entry["latency"])
+            if entry.get("response") is not None:
+                return ChatCompletion.model_validate(entry["response"])
+            return ChatCompletion.model_validate(_assemble(entry["chunks"]))
+
+        started = time.monotonic()
+        response = await self.inner.create(**params)
+        request = {name: value for name, value in params.items() if name != "timeout"}
+        if params.get("stream"):
+            return self._record_stream(key, request, response, started)
+        self.cassette.append({
+            "key": key,
+            "request": request,
+            "response": response.model_dump(mode="json"),
+            "latency": round(time.monotonic() - started, 4)
+        })
+        return response
+
+    async def _record_stream(self, key: str, request: Dict, upstream: Any, started: float) -> AsyncIterator[ChatCompletionChunk]:
+        chunks, offsets = [], []
+        try:
+            async for chunk in upstream:
+                chunks.append(chunk.model_dump(mode="json"))
+                offsets.append(round(time.monotonic() - started, 4))
+                yield chunk
+        finally:
+            close = getattr(upstream, "close", None)
+            if close is not None:
+                await close()
+        # Only complete streams are recorded; a cut-off one would replay as a short answer
+        self.cassette.append({
+            "key": key,
+            "request": request,
+            "chunks": chunks,
+            "offsets": offsets,
+            "latency": offsets[-1] if offsets else 0.0
+        })
+
+    async def _replay_stream(self, entry: Dict) -> AsyncIterator[ChatCompletionChunk]:
+        chunks = entry.get("chunks")
+        offsets = entry.get("offsets")
+        if chunks is None:
+            chunks = _split(entry["response"])
+            offsets = [entry["latency"]] * len(chunks)
+        # Chunks keep their recorded spacing, scaled to the simulated latency
+        scale = 1.0
+        if self.cassette.latency is not None and entry["latency"] > 0:
+            scale = self.cassette.latency(entry["latency"]) / entry["latency"]
+        elapsed = 0.0
+        for chunk, offset in zip(chunks, offsets):
+            if self.cassette.latency is not None:
+                await asyncio.sleep(max(0.0, offset * scale - elapsed))
+                elapsed = offset * scale
+            yield ChatCompletionChunk.model_validate(chunk)
+
+    async def _delay(self, recorded: float):
+        if self.cassette.latency is not None:
+            await asyncio.sleep(self.cassette.latency(recorded))
+
+
+def _assemble(chunks: List[Dict]) -> Dict:
+    """A chat completion from recorded stream chunks"""
+    first = chunks[0] if chunks else {}
+    parts, finish_reason, usage = [], None, None
+    for chunk in chunks:
+        usage = chunk.get("usage") or usage
+        for choice in chunk.get("choices", []):
+            parts.append(choice.get("delta", {}).get("content") or "")
+            finish_reason = choice.get("finish_reason") or finish_reason
+    return {
+        "id": first.get("id", "chatcmpl-cassette"),
+        "object": "chat.completion",
+        "created": first.get("created", 0),
+        "model": first.get("model", ""),
+        "choices": [{"index": 0, "finish_reason": finish_reason or "stop", "message": {"role": "assistant", "content": "".join(parts)}}],
+        "usage": usage
+    }
+
+
+def _split(response: Dict) -> List[Dict]:
+    """Stream chunks for a recorded plain response: its content, then the finish reason and usage"""
+    choice = response["choices"][0]
+    base = {"id": response["id"], "object": "chat.completion.chunk", "created": response["created"], "model": response["model"]}
+    return [
+        {**base, "choices": [{"index": 0, "delta": {"role": "assistant", "content": choice["message"].get("content") or ""}, "finish_reason": None}]},
+        {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": choice.get("finish_reason") or "stop"}], "usage": response.get("usage")}
+    ]
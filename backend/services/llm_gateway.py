@@ -0,0 +1,303 @@
+import asyncio
+import os
+import random
+import time
+from types import SimpleNamespace
+from typing import AsyncIterator, Dict, NamedTuple, Optional
+
+import openai
+from dotenv import load_dotenv
+from openai.types.chat import ChatCompletion
+
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.hedging import Hedger
+from services.llm_backends import LLMBackend, create_backend
+from services.llm_cache import LLMCache, llm_cache
+from services.llm_cassette import Cassette
+from services.llm_routing import RouteStats, RoutingTable
+from services.prompt_context import estimate_tokens
+from services.rate_limiter import RateLimiter
+
+load_dotenv()
+
+# Per-endpoint model parameters; each can be overridden with LLM_<ENDPOINT>_<PARAM>
+# (e.g. LLM_CAREER_ADVICE_MODEL=gpt-4o). The model defaults to LLM_MODEL and the
+# timeout (seconds for the whole call) to LLM_TIMEOUT. The routing table can send
+# a call to another model or backend by its prompt size, unless the model is pinned.
+ENDPOINT_SETTINGS = {
+    "resume_analysis": {"model": "gpt-3.5-turbo", "temperature": 0.3, "max_tokens": 2000},
+    "job_matching": {"model": "gpt-3.5-turbo", "temperature": 0.2, "max_tokens": 1500},
+    "recommendations": {"temperature": 0.7, "max_tokens": 600},
+    "combined_analysis": {"temperature": 0.3, "max_tokens": 3500, "timeout": 120},
+    "resume_suggestions": {"temperature": 0.7, "max_tokens": 1000},
+    "job_description_analysis": {"temperature": 0.6, "max_tokens": 800},
+    "resume_optimization_tips": {"temperature": 0.7, "max_tokens": 600},
+    "interview_preparation": {"temperature": 0.6, "max_tokens": 700},
+    "career_advice": {"temperature": 0.7, "max_tokens": 600},
+    "optimized_resume": {"temperature": 0.7, "max_tokens": 1500, "timeout": 120},
+}
+SETTING_TYPES = {"model": str, "temperature": float, "max_tokens": int, "timeout": float}
+
+# Transient upstream failures worth another attempt: 429, 5xx, timeouts and dropped connections
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError)
+
+
+class Target(NamedTuple):
+    """Where one call goes: the backend, the route that chose it and the prompt size it was chosen for"""
+    backend: LLMBackend
+    route: str
+    input_tokens: int
+
+
+class LLMGateway:
+    """
+    The single way out to the chat completions API. Each backend keeps one pooled
+    keep-alive client shared by every call site; models, parameters and timeouts come
+    from configuration and the routing table picks the backend and model per call,
+    calls queue for per-model rate-limit budgets, and transient failures are retried
+    with exponential backoff and full jitter. While the circuit breaker is open calls
+    fail fast with `CircuitOpenError`. Slow calls can be hedged with a duplicate.
+    Responses go through the LLM cache.
+    """
+
+    def __init__(
+        self,
+        client: Optional[openai.AsyncOpenAI] = None,
+        cache: Optional[LLMCache] = None,
+        limiter: Optional[RateLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        hedger: Optional[Hedger] = None,
+        routes: Optional[RoutingTable] = None,
+        cassette: Optional[Cassette] = None,
+        base_url: Optional[str] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        backoff_max: Optional[float] = None
+    ):
+        self.default_model = os.getenv("LLM_MODEL", "gpt-4")
+        self.default_timeout = float(os.getenv("LLM_TIMEOUT", "60"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("LLM_MAX_RETRIES", "3"))
+        self.backoff_base = backoff_base if backoff_base is not None else float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+        self.backoff_max = backoff_max if backoff_max is not None else float(os.getenv("LLM_BACKOFF_MAX", "8"))
+
+        self.routes = routes or RoutingTable.load()
+        self.route_stats = RouteStats()
+        self.backends: Dict[str, LLMBackend] = {}
+        for name, backend_settings in self.routes.backends.items():
+            if name == self.routes.default_backend and client is not None:
+                self.backends[name] = LLMBackend(name, client)
+                continue
+            backend_settings = {"timeout": self.default_timeout, **backend_settings}
+            if name == self.routes.default_backend and base_url:
+                backend_settings["base_url"] = base_url
+            self.backends[name] = create_backend(name, backend_settings)
+        # Record every call to a cassette file, or answer from one without going upstream
+        self.cassette = cassette or Cassette.from_env()
+        if self.cassette is not None:
+            for backend in self.backends.values():
+                backend.client = self.cassette.wrap(backend.client)
+        replaying = self.cassette is not None and self.cassette.mode == "replay"
+        self.cache = cache or llm_cache
+        # Replayed calls spend no upstream budget
+        self.limiter = limiter or RateLimiter(enabled=False if replaying else None)
+        self.breaker = breaker or CircuitBreaker()
+        self.hedger = hedger or Hedger()
+
+        self._stats = {"requests": 0, "retries": 0, "failures": 0}
+        # endpoint -> upstream calls and estimated prompt tokens sent (cache hits send nothing)
+        self._prompt_tokens: Dict[str, Dict[str, int]] = {}
+        # endpoint -> upstream calls cancelled mid-flight and the completion tokens that were never generated
+        self._cancelled: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def client(self):
+        """Client of the default backend"""
+        return self.backends[self.routes.default_backend].client
+
+    @client.setter
+    def client(self, client):
+        self.backends[self.routes.default_backend].client = client
+
+    def settings(self, endpoint: str) -> Dict:
+        """Model, temperature, max_tokens and timeout for one endpoint"""
+        settings = {"model": self.default_model, "timeout": self.default_timeout, **ENDPOINT_SETTINGS.get(endpoint, {})}
+        for name, cast in SETTING_TYPES.items():
+            value = os.getenv(f"LLM_{endpoint.upper()}_{name.upper()}")
+            if value:
+                settings[name] = cast(value)
+        return settings
+
+    async def create(self, *, endpoint: str, use_cache: bool = True, **params) -> ChatCompletion:
+        """Chat completion for `endpoint`; explicit `params` override the configured ones"""
+        upstream, params = self._prepare(endpoint, params)
+        return await self.cache.create(upstream, endpoint=endpoint, use_cache=use_cache, **params)
+
+    async def stream(self, *, endpoint: str, use_cache: bool = True, **params) -> AsyncIterator[str]:
+        """Streaming variant of `create`; only opening the stream is retried"""
+        upstream, params = self._prepare(endpoint, params)
+        parts = []
+        try:
+            async for text in self.cache.stream(upstream, endpoint=endpoint, use_cache=use_cache, **params):
+                parts.append(text)
+                yield text
+        except (asyncio.CancelledError, GeneratorExit):
+            if parts:
+                # Closed mid-answer: the rest of the completion is never generated
+                self._record_cancelled(endpoint, (params.get("max_tokens") or 0) - estimate_tokens("".join(parts)))
+            raise
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            "rate_limits": self.limiter.stats(),
+            "circuit_breaker": self.breaker.stats(),
+            "hedging": self.hedger.stats(),
+            "routes": self.route_stats.stats(),
+            "cassette": self.cassette.stats() if self.cassette is not None else None,
+            "prompt_tokens": {
+                endpoint: {**counts, "mean": round(counts["total"] / counts["calls"], 1)}
+                for endpoint, counts in self._prompt_tokens.items()
+            },
+            "cancelled": {endpoint: dict(counts) for endpoint, counts in self._cancelled.items()}
+        }
+
+    async def aclose(self):
+        for backend in self.backends.values():
+            await backend.aclose()
+
+    def _prepare(self, endpoint: str, params: Dict):
+        settings = self.settings(endpoint)
+        input_tokens = sum(estimate_tokens(message.get("content") or "") for message in params.get("messages", []))
+        backend_name = self.routes.default_backend
+        route_name = "default"
+        # A model pinned by the caller or LLM_<ENDPOINT>_MODEL is never rerouted
+        pinned = "model" in params or os.getenv(f"LLM_{endpoint.upper()}_MODEL")
+        route = None if pinned else self.routes.route(endpoint, input_tokens)
+        if route is not None:
+            route_name = route.name
+            backend_name = route.backend or backend_name
+            settings["model"] = route.model or settings["model"]
+        params = {**settings, **params}
+        # The timeout shapes the call, not the answer, so it stays out of the cache key
+        timeout = params.pop("timeout")
+        if backend_name != self.routes.default_backend:
+            # Part of the cache key, so answers from different backends are kept apart
+            params["backend"] = backend_name
+        target = Target(self.backends[backend_name], f"{route_name}: {backend_name}/{params['model']}", input_tokens)
+
+        async def create(**request):
+            request.pop("backend", None)
+            self._record_prompt(endpoint, input_tokens)
+            # Rate limits count the completion budget as well as the prompt
+            estimated = input_tokens + (request.get("max_tokens") or 0)
+            return await self._call(endpoint, timeout, request, estimated, target)
+
+        return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))), params
+
+    def _record_prompt(self, endpoint: str, tokens: int):
+        counts = self._prompt_tokens.setdefault(endpoint, {"calls": 0, "total": 0, "last": 0})
+        counts["calls"] += 1
+        counts["total"] += tokens
+        counts["last"] = tokens
+
+    def _record_cancelled(self, endpoint: str, completion_tokens: int):
+        counts = self._cancelled.setdefault(endpoint, {"calls": 0, "completion_tokens": 0})
+        counts["calls"] += 1
+        counts["completion_tokens"] += max(0, completion_tokens)
+
+    async def _call(self, endpoint: str, timeout: float, params: Dict, estimated: int, target: Target):
+        model = params["model"]
+        for attempt in range(self.max_retries + 1):
+            permit = self.breaker.allow()
+            if permit is None:
+                raise CircuitOpenError(self.breaker.retry_after())
+            # Bound before anything can raise; reset once the limiter lets the call through
+            started = time.monotonic()
+            try:
+                await self.limiter.acquire(model, estimated, endpoint)
+                self._stats["requests"] += 1
+                started = time.monotonic()
+                # Past the endpoint's usual latency a duplicate is sent; the first answer wins.
+                # Opening a stream only waits for the first bytes, so streams keep their own latencies
+                response = await self.hedger.run(
+                    endpoint,
+                    f"{model}:stream" if params.get("stream") else model,
+                    lambda: self._send_metered(target.backend, model, timeout, params, estimated),
+                    lambda: self._send_hedge(target.backend, endpoint, model, timeout, params, estimated)
+                )
+            except RETRYABLE_ERRORS as e:
+                self._record_route(endpoint, target, started, False)
+                if isinstance(e, openai.RateLimitError):
+                    # Throttling is the rate limiter's business, not a sign of an unhealthy service
+                    self.breaker.release(permit)
+                else:
+                    self.breaker.record(False, time.monotonic() - started, permit)
+                if attempt == self.max_retries:
+                    self._stats["failures"] += 1
+                    raise
+                delay = self._backoff(attempt, e)
+                self._stats["retries"] += 1
+                print(f"LLM call failed ({e.__class__.__name__}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+                if isinstance(e, openai.RateLimitError) and self.limiter.enabled:
+                    # Every queued call for this model waits out the limit, not just this one
+                    self.limiter.penalize(model, e.response.headers, delay)
+                else:
+                    await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                # Deadline passed or client gone: the completion is never generated
+                self.breaker.release(permit)
+                self._record_cancelled(endpoint, params.get("max_tokens") or 0)
+                raise
+            except Exception:
+                # The service answered; a rejected request says nothing about its health
+                self._record_route(endpoint, target, started, False)
+                self.breaker.record(True, time.monotonic() - started, permit)
+                self._stats["failures"] += 1
+                raise
+            else:
+                self._record_route(endpoint, target, started, True)
+                self.breaker.record(True, time.monotonic() - started, permit)
+                return response
+
+    def _record_route(self, endpoint: str, target: Target, started: float, ok: bool):
+        self.route_stats.record(endpoint, target.route, target.input_tokens, time.monotonic() - started, ok)
+
+    async def _send(self, backend: LLMBackend, model: str, timeout: float, params: Dict):
+        completions = backend.client.chat.completions
+        raw = getattr(completions, "with_raw_response", None)
+        if raw is None:
+            return await completions.create(timeout=timeout, **params)
+        response = await raw.create(timeout=timeout, **params)
+        self.limiter.observe(model, response.headers)
+        return response.parse()
+
+    async def _send_hedge(self, backend: LLMBackend, endpoint: str, model: str, timeout: float, params: Dict, estimated: int):
+        # The duplicate costs as much as the original, so it pays into the rate limits too
+        await self.limiter.acquire(model, estimated, endpoint)
+        self._stats["requests"] += 1
+        return await self._send_metered(backend, model, timeout, params, estimated)
+
+    async def _send_metered(self, backend: LLMBackend, model: str, timeout: float, params: Dict, estimated: int):
+        """`_send` for a call that reserved `estimated` tokens: settled from its usage, or refunded if it is cancelled"""
+        try:
+            response = await self._send(backend, model, timeout, params)
+        except asyncio.CancelledError:
+            # Lost a hedge race, or the caller gave up: the prompt was sent but the completion is never generated
+            self.limiter.settle(model, estimated, estimated - (params.get("max_tokens") or 0))
+            raise
+        usage = getattr(response, "usage", None)
+        self.limiter.settle(model, estimated, getattr(usage, "total_tokens", None))
+        return response
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        # Full jitter keeps a burst of callers that failed together from retrying together
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            return max(delay, min(float(retry_after), self.backoff_max))
+        except (TypeError, ValueError):
+            return delay
+
+
+llm_gateway = LLMGateway()
@@ -0,0 +1,110 @@
+import json
+import os
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from services.hedging import percentile
+
+DEFAULT_ROUTES_PATH = Path(__file__).resolve().parent.parent / "data" / "llm_routes.json"
+DEFAULT_BACKENDS = {"openai": {"type": "openai", "base_url_env": "OPENAI_BASE_URL", "api_key_env": "OPENAI_API_KEY"}}
+
+
+class Route(NamedTuple):
+    name: str
+    # Empty matches every endpoint
+    endpoints: Tuple[str, ...]
+    min_input_tokens: int
+    max_input_tokens: Optional[int]
+    backend: Optional[str]
+    model: Optional[str]
+
+    def matches(self, endpoint: str, input_tokens: int) -> bool:
+        if self.endpoints and endpoint not in self.endpoints:
+            return False
+        if input_tokens < self.min_input_tokens:
+            return False
+        return self.max_input_tokens is None or input_tokens <= self.max_input_tokens
+
+
+class RoutingTable:
+    """
+    Which backend and model serve a call, by endpoint and prompt size. Routes are
+    tried in order and the first match wins; calls no route matches keep the
+    endpoint's configured model on the default backend.
+    """
+
+    def __init__(self, backends: Optional[Dict[str, Dict]] = None, routes: Optional[List[Route]] = None, default_backend: str = "openai"):
+        self.backends = backends or dict(DEFAULT_BACKENDS)
+        self.routes = routes or []
+        self.default_backend = default_backend
+        for route in self.routes:
+            if route.backend is not None and route.backend not in self.backends:
+                raise ValueError(f"LLM route '{route.name}' uses unknown backend '{route.backend}'")
+        if default_backend not in self.backends:
+            raise ValueError(f"Unknown default LLM backend '{default_backend}'")
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "RoutingTable":
+        """Read the table from `path`, LLM_ROUTES_PATH or data/llm_routes.json (no routes if there is none)"""
+        path = Path(path or os.getenv("LLM_ROUTES_PATH") or DEFAULT_ROUTES_PATH)
+        if not path.exists():
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        routes = [
+            Route(
+                name=entry.get("name") or f"route{index}",
+                endpoints=tuple(entry.get("endpoints", [])),
+                min_input_tokens=int(entry.get("min_input_tokens", 0)),
+                max_input_tokens=int(entry["max_input_tokens"]) if entry.get("max_input_tokens") is not None else None,
+                backend=entry.get("backend"),
+                model=entry.get("model")
+            )
+            for index, entry in enumerate(data.get("routes", []))
+        ]
+        return cls(data.get("backends"), routes, data.get("default_backend", "openai"))
+
+    def route(self, endpoint: str, input_tokens: int) -> Optional[Route]:
+        for route in self.routes:
+            if route.matches(endpoint, input_tokens):
+                return route
+        return None
+
+
+class RouteStats:
+    """Upstream latency and prompt size per endpoint and route, to tune the routing table from data"""
+
+    def __init__(self, window: Optional[int] = None, log: Optional[bool] = None):
+        self.window = window or int(os.getenv("LLM_ROUTE_STATS_WINDOW", "500"))
+        if log is None:
+            log = os.getenv("LLM_ROUTE_LOG", "False").lower() == "true"
+        self.log = log
+        # (endpoint, route) -> calls, failures, input token total
+        self._counts: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self._latencies: Dict[Tuple[str, str], Deque[float]] = {}
+
+    def record(self, endpoint: str, route: str, input_tokens: int, latency: float, ok: bool):
+        key = (endpoint, route)
+        counts = self._counts.setdefault(key, {"calls": 0, "failures": 0, "input_tokens": 0})
+        counts["calls"] += 1
+        counts["input_tokens"] += input_tokens
+        if not ok:
+            counts["failures"] += 1
+        self._latencies.setdefault(key, deque(maxlen=self.window)).append(latency)
+        if self.log:
+            print(f"LLM route endpoint={endpoint} route={route} input_tokens={input_tokens} latency={latency:.3f}s ok={ok}")
+
+    def stats(self) -> Dict:
+        summary: Dict[str, Dict] = {}
+        for (endpoint, route), counts in self._counts.items():
+            latencies = self._latencies[(endpoint, route)]
+            summary.setdefault(endpoint, {})[route] = {
+                "calls": counts["calls"],
+                "failures": counts["failures"],
+                "input_tokens_mean": round(counts["input_tokens"] / counts["calls"], 1),
+                "latency_mean": round(sum(latencies) / len(latencies), 4),
+                "latency_p50": round(percentile(latencies, 50), 4),
+                "latency_p95": round(percentile(latencies, 95), 4)
+            }
+        return summary
@@ -0,0 +1,144 @@
+import os
+import re
+from bisect import bisect_right
+from typing import Dict, List, Optional
+
+from services.resume_features import HEADING_MAX_LENGTH, SECTION_HEADINGS
+from services.similarity import SKILL_BOOST, content_words
+from services.skill_taxonomy import get_skill_taxonomy
+
+# Token budgets for the resume and job description excerpts of each prompt;
+# override with CONTEXT_BUDGET_<ENDPOINT>_RESUME / CONTEXT_BUDGET_<ENDPOINT>_JOB
+CONTEXT_BUDGETS = {
+    "resume_analysis": {"resume": 1500, "job": 0},
+    "job_matching": {"resume": 1200, "job": 900},
+    "recommendations": {"resume": 300, "job": 250},
+    "combined_analysis": {"resume": 1500, "job": 900},
+}
+
+# Letter runs, digit runs and single symbols: close to how BPE splits resume text
+TOKEN_PIECE_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+PIECE_CHARACTERS = 5
+# Lines longer than this are split into sentences so a wall of text can still be excerpted
+MAX_UNIT_TOKENS = 80
+SENTENCE_BREAK = re.compile(r"(?<=[.;!?•])\s+")
+OMITTED_MARKER = "[...]"
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate prompt tokens (errs high on plain English, which keeps budgets safe)"""
+    return sum(1 + (len(piece) - 1) // PIECE_CHARACTERS for piece in TOKEN_PIECE_PATTERN.findall(text))
+
+
+def context_budget(endpoint: str, part: str) -> int:
+    """Token budget for the `part` ("resume" or "job") of `endpoint`'s prompt"""
+    value = os.getenv(f"CONTEXT_BUDGET_{endpoint.upper()}_{part.upper()}")
+    if value:
+        return int(value)
+    return CONTEXT_BUDGETS.get(endpoint, {}).get(part, 0)
+
+
+class _Document:
+    """Text split once into excerptable units, each with its token cost, words and skills"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = estimate_tokens(text)
+        self.units: List[Dict] = []
+
+        starts = []
+        for line in re.finditer(r"[^\n]+", text):
+            if not line.group().strip():
+                continue
+            pieces = [line.group().strip()]
+            if estimate_tokens(pieces[0]) > MAX_UNIT_TOKENS:
+                pieces = [piece for piece in SENTENCE_BREAK.split(pieces[0]) if piece]
+            offset = line.start()
+            for piece in pieces:
+                offset = text.index(piece, offset)
+                starts.append(offset)
+                first_word = piece.split(None, 1)[0].lower().strip(":") if piece else ""
+                self.units.append({
+                    "text": piece,
+                    "tokens": estimate_tokens(piece),
+                    "words": set(content_words(piece)),
+                    "skills": set(),
+                    "heading": len(piece) <= HEADING_MAX_LENGTH and first_word in SECTION_HEADINGS
+                })
+                offset += len(piece)
+
+        # One taxonomy pass over the whole text, mapped back to units by offset
+        for match in get_skill_taxonomy().find(text):
+            index = bisect_right(starts, match.start) - 1
+            if index >= 0:
+                self.units[index]["skills"].add(match.name)
+
+        self.words = set().union(*(unit["words"] for unit in self.units))
+        self.skills = set().union(*(unit["skills"] for unit in self.units))
+
+
+class PromptContext:
+    """
+    A resume (and optionally a job description) tokenized once per request. Digests
+    keep the lines most relevant to the other document within a token budget, in
+    their original order, so every prompt gets the best content it can afford.
+    """
+
+    def __init__(self, resume_text: str, job_description: str = "", _resume: Optional[_Document] = None):
+        self.resume = _resume or _Document(resume_text)
+        self.job = _Document(job_description)
+
+    def for_job(self, job_description: str) -> "PromptContext":
+        """The same resume (not re-tokenized) against another job description"""
+        return PromptContext(self.resume.text, job_description, _resume=self.resume)
+
+    def resume_digest(self, budget: int, job_relevance: bool = True) -> str:
+        """The resume within `budget` tokens, favouring lines that mention the job's skills and words"""
+        other = self.job if job_relevance else None
+        return _digest(self.resume, other, budget)
+
+    def job_digest(self, budget: int) -> str:
+        """The job description within `budget` tokens, favouring what the resume covers"""
+        return _digest(self.job, self.resume, budget)
+
+
+def _digest(document: _Document, other: Optional[_Document], budget: int) -> str:
+    if document.tokens <= budget:
+        return document.text
+    if budget <= 0 or not document.units:
+        return ""
+
+    def relevance(unit: Dict) -> float:
+        # Skills count on their own (a skills line is always worth keeping), more when the other side shares them
+        score = float(len(unit["skills"]))
+        if other is not None:
+            score += SKILL_BOOST * len(unit["skills"] & other.skills) + len(unit["words"] & other.words)
+        return score
+
+    # Headings and the first line (usually the name) keep the excerpt readable
+    order = sorted(
+        range(len(document.units)),
+        key=lambda index: (
+            not (index == 0 or document.units[index]["heading"]),
+            -relevance(document.units[index]),
+            index
+        )
+    )
+
+    # Each kept line costs its tokens and, at worst, one new omission marker
+    overhead = estimate_tokens(OMITTED_MARKER)
+    kept = set()
+    remaining = budget - overhead
+    for index in order:
+        cost = document.units[index]["tokens"] + overhead
+        if cost <= remaining:
+            kept.add(index)
+            remaining -= cost
+
+    lines = []
+    for index in range(len(document.units)):
+        if index in kept:
+            lines.append(document.units[index]["text"])
+        elif not lines or lines[-1] != OMITTED_MARKER:
+            lines.append(OMITTED_MARKER)
+    return "\n".join(lines)
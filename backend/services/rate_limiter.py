@@ -0,0 +1,158 @@
+import asyncio
+import os
+import re
+import time
+from typing import Dict, Mapping, Optional, Tuple
+
+# Requests and tokens per minute by model (roughly OpenAI usage tier 3); set your
+# account's limits with LLM_RPM_<MODEL> / LLM_TPM_<MODEL>, e.g. LLM_TPM_GPT_4=10000
+DEFAULT_LIMITS = {
+    "gpt-4": (5_000, 80_000),
+    "gpt-3.5-turbo": (3_500, 800_000),
+}
+FALLBACK_LIMITS = (5_000, 80_000)
+
+RESET_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+RESET_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """Seconds from an x-ratelimit-reset-* header ("1s", "6m0s", "120ms")"""
+    if not value:
+        return None
+    parts = RESET_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * RESET_UNITS[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    """Capacity refilled continuously over a minute; the level may go negative to block callers"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / 60
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be taken (0 if it can be taken now)"""
+        self.refill(now)
+        # A request larger than the whole bucket only waits for a full bucket
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def take(self, amount: float):
+        self.level -= amount
+
+
+class RateLimiter:
+    """
+    Client-side requests-per-minute and tokens-per-minute budgets per model. Calls
+    wait in FIFO order until both buckets can pay for them instead of being sent
+    into a 429. Rate-limit headers from responses correct the local estimate.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None):
+        if enabled is None:
+            enabled = os.getenv("LLM_RATE_LIMIT_ENABLED", "True").lower() == "true"
+        self.enabled = enabled
+        self._buckets: Dict[str, Tuple[TokenBucket, TokenBucket]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._waits: Dict[str, Dict[str, float]] = {}
+
+    def limits(self, model: str) -> Tuple[float, float]:
+        """(requests, tokens) per minute for a model"""
+        rpm, tpm = DEFAULT_LIMITS.get(model, FALLBACK_LIMITS)
+        name = re.sub(r"[^A-Z0-9]+", "_", model.upper())
+        return float(os.getenv(f"LLM_RPM_{name}", rpm)), float(os.getenv(f"LLM_TPM_{name}", tpm))
+
+    async def acquire(self, model: str, tokens: int, endpoint: str = "default") -> float:
+        """Wait until `model` has room for one request of about `tokens` tokens; returns the wait"""
+        if not self.enabled:
+            return 0.0
+        requests, token_bucket = self._model_buckets(model)
+        lock = self._locks.setdefault(model, asyncio.Lock())
+        started = time.monotonic()
+        # The lock queues callers in arrival order, so a large request is not starved by small ones
+        async with lock:
+            while True:
+                now = time.monotonic()
+                wait = max(requests.wait_time(1, now), token_bucket.wait_time(tokens, now))
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            requests.take(1)
+            token_bucket.take(tokens)
+        waited = time.monotonic() - started
+        self._record_wait(endpoint, waited)
+        return waited
+
+    def settle(self, model: str, estimated: int, actual: Optional[int]):
+        """Return (or charge) the difference once the response reports real usage"""
+        if self.enabled and actual is not None and model in self._buckets:
+            self._buckets[model][1].take(actual - estimated)
+
+    def observe(self, model: str, headers: Mapping[str, str]):
+        """Adopt the server's view from x-ratelimit-* headers"""
+        if not self.enabled or not headers:
+            return
+        now = time.monotonic()
+        for bucket, kind in zip(self._model_buckets(model), ("requests", "tokens")):
+            limit = headers.get(f"x-ratelimit-limit-{kind}")
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            try:
+                if limit is not None:
+                    bucket.refill(now)
+                    bucket.capacity = float(limit)
+                if remaining is not None:
+                    bucket.refill(now)
+                    bucket.level = min(bucket.level, float(remaining))
+            except ValueError:
+                continue
+
+    def penalize(self, model: str, headers: Optional[Mapping[str, str]], fallback_delay: float):
+        """After a 429, hold every queued call for the model until the limit resets"""
+        if not self.enabled:
+            return
+        headers = headers or {}
+        delays = [parse_reset(headers.get(name)) for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")]
+        delay = max([delay for delay in delays if delay is not None] or [fallback_delay])
+        now = time.monotonic()
+        for bucket in self._model_buckets(model):
+            bucket.refill(now)
+            bucket.level = min(bucket.level, -delay * bucket.rate)
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "models": {
+                model: {"requests_available": round(requests.level, 1), "tokens_available": round(tokens.level)}
+                for model, (requests, tokens) in self._buckets.items()
+            },
+            "queue_wait": {
+                endpoint: {**waits, "mean": round(waits["total"] / waits["calls"], 4)}
+                for endpoint, waits in self._waits.items()
+            }
+        }
+
+    def _model_buckets(self, model: str) -> Tuple[TokenBucket, TokenBucket]:
+        if model not in self._buckets:
+            rpm, tpm = self.limits(model)
+            self._buckets[model] = (TokenBucket(rpm), TokenBucket(tpm))
+        return self._buckets[model]
+
+    def _record_wait(self, endpoint: str, waited: float):
+        waits = self._waits.setdefault(endpoint, {"calls": 0, "queued": 0, "total": 0.0, "max": 0.0})
+        waits["calls"] += 1
+        if waited > 0.001:
+            waits["queued"] += 1
+        waits["total"] = round(waits["total"] + waited, 4)
+        waits["max"] = round(max(waits["max"], waited), 4)
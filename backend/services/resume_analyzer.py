@@ -1,28 +1,30 @@
-import os
-import re
 from typing import Dict, List, Optional
-import openai
 from dotenv import load_dotenv
+from services.circuit_breaker import mark_degraded
+from services.llm_gateway import LLMGateway, llm_gateway
+from services.prompt_context import PromptContext, context_budget
+from services.resume_features import extract_resume_features
+from services.skill_taxonomy import get_skill_taxonomy
 
 load_dotenv()
 
 class ResumeAnalyzer:
-    def __init__(self):
-       self.client = openai.OpenAI(
-            api_key=os.getenv("OPENAI_API_KEY", "your-openai-api-key")
-        )
+    def __init__(self, gateway: Optional[LLMGateway] = None):
+        self.gateway = gateway or llm_gateway
     
-    def analyze_resume(self, resume_text: str) -> Dict:
+    async def analyze_resume(self, resume_text: str, context: Optional[PromptContext] = None) -> Dict:
         """
         Analyze resume text and extract key information using AI
         """
         try:
-            # Use OpenAI API for sophisticated analysis
-            analysis_prompt = self._create_resume_analysis_prompt(resume_text)
+            # Use OpenAI API for sophisticated analysis; the analysis is about the resume alone
+            context = context or PromptContext(resume_text)
+            resume_digest = context.resume_digest(context_budget("resume_analysis", "resume"), job_relevance=False)
+            analysis_prompt = self._create_resume_analysis_prompt(resume_digest)
             
             try:
-                response = self.client.chat.completions.create(
-                    model="gpt-3.5-turbo",
+                response = await self.gateway.create(
+                    endpoint="resume_analysis",
                     messages=[
                         {
                             "role": "system",
@@ -32,43 +34,17 @@ class ResumeAnalyzer:
                             "role": "user",
                             "content": analysis_prompt
                         }
-                    ],
-                    temperature=0.3,
-                    max_tokens=2000
+                    ]
                 )
                 
                 # Parse AI response
                 ai_analysis = self._parse_ai_response(response.choices[0].message.content)
-                
-                # Combine AI analysis with regex-based extraction for comprehensive results
-                analysis = {
-                    "skills": ai_analysis.get("skills", self._extract_skills(resume_text)),
-                    "experience": ai_analysis.get("experience", self._extract_experience(resume_text)),
-                    "education": ai_analysis.get("education", self._extract_education(resume_text)),
-                    "contact_info": self._extract_contact_info(resume_text),
-                    "summary": ai_analysis.get("summary", self._generate_summary(resume_text)),
-                    "strengths": ai_analysis.get("strengths", self._identify_strengths(resume_text)),
-                    "areas_for_improvement": ai_analysis.get("areas_for_improvement", self._identify_improvements(resume_text)),
-                    "ai_insights": ai_analysis.get("ai_insights", []),
-                    "overall_score": ai_analysis.get("overall_score", 0)
-                }
-                
-                return analysis
+                return self._combine_analysis(resume_text, ai_analysis)
                 
             except Exception as ai_error:
                 print(f"AI analysis failed, falling back to regex: {str(ai_error)}")
                 # Fallback to regex-based analysis
-                return {
-                    "skills": self._extract_skills(resume_text),
-                    "experience": self._extract_experience(resume_text),
-                    "education": self._extract_education(resume_text),
-                    "contact_info": self._extract_contact_info(resume_text),
-                    "summary": self._generate_summary(resume_text),
-                    "strengths": self._identify_strengths(resume_text),
-                    "areas_for_improvement": self._identify_improvements(resume_text),
-                    "ai_insights": [],
-                    "overall_score": 0
-                }
+                return self._fallback_analysis(resume_text)
             
         except Exception as e:
             print(f"Error analyzing resume: {str(e)}")
@@ -83,138 +59,80 @@ class ResumeAnalyzer:
                 "areas_for_improvement": []
             }
     
+    def _combine_analysis(self, resume_text: str, ai_analysis: Dict) -> Dict:
+        """Combine AI analysis with regex-based extraction for comprehensive results"""
+        return {
+            "skills": ai_analysis.get("skills", self._extract_skills(resume_text)),
+            "experience": ai_analysis.get("experience", self._extract_experience(resume_text)),
+            "education": ai_analysis.get("education", self._extract_education(resume_text)),
+            "contact_info": self._extract_contact_info(resume_text),
+            "summary": ai_analysis.get("summary", self._generate_summary(resume_text)),
+            "strengths": ai_analysis.get("strengths", self._identify_strengths(resume_text)),
+            "areas_for_improvement": ai_analysis.get("areas_for_improvement", self._identify_improvements(resume_text)),
+            "ai_insights": ai_analysis.get("ai_insights", []),
+            "overall_score": ai_analysis.get("overall_score", 0)
+        }
+    
+    def _fallback_analysis(self, resume_text: str) -> Dict:
+        """Local single-pass analysis used when the AI call is unavailable"""
+        mark_degraded("resume_analysis")
+        return {
+            "skills": self._extract_skills(resume_text),
+            "experience": self._extract_experience(resume_text),
+            "education": self._extract_education(resume_text),
+            "contact_info": self._extract_contact_info(resume_text),
+            "summary": self._generate_summary(resume_text),
+            "strengths": self._identify_strengths(resume_text),
+            "areas_for_improvement": self._identify_improvements(resume_text),
+            "ai_insights": [],
+            "overall_score": 0
+        }
+    
     def _extract_skills(self, text: str) -> List[str]:
-        """Extract technical skills from resume text"""
-        # Common technical skills to look for
-        skill_patterns = [
-            r'\b(?:Python|Java|JavaScript|React|Node\.js|Angular|Vue\.js|TypeScript|HTML|CSS|SQL|MongoDB|PostgreSQL|MySQL|AWS|Azure|Docker|Kubernetes|Git|GitHub|Agile|Scrum|JIRA|Jenkins|CI/CD|REST API|GraphQL|Microservices|Machine Learning|AI|Data Science|Tableau|Power BI|Excel|Word|PowerPoint|Photoshop|Illustrator|Figma|Sketch)\b',
-            r'\b(?:Programming|Development|Coding|Software|Web|Mobile|Database|Cloud|DevOps|Testing|QA|UI/UX|Design|Analytics|Business Intelligence|Project Management|Leadership|Communication|Problem Solving|Critical Thinking|Teamwork|Collaboration)\b'
-        ]
-        
-        skills = set()
-        for pattern in skill_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            skills.update(matches)
-        
-        return list(skills)
+        """Extract technical skills from resume text as canonical skill names"""
+        return get_skill_taxonomy().extract(text)
     
     def _extract_experience(self, text: str) -> List[Dict]:
         """Extract work experience from resume text"""
-        # This is a simplified extraction - in production, you'd use more sophisticated NLP
-        experience_sections = re.findall(
-            r'(?:experience|work|employment|job).*?(?=\n\n|\n[A-Z]|$)',
-            text,
-            re.IGNORECASE | re.DOTALL
-        )
-        
-        experiences = []
-        for section in experience_sections:
-            # Extract company name (simplified)
-            company_match = re.search(r'at\s+([A-Z][A-Za-z\s&]+)', section, re.IGNORECASE)
-            company = company_match.group(1).strip() if company_match else "Unknown Company"
-            
-            # Extract duration (simplified)
-            duration_match = re.search(r'(\d{4}\s*[-–]\s*\d{4}|\d{4}\s*[-–]\s*present)', section, re.IGNORECASE)
-            duration = duration_match.group(1) if duration_match else "Duration not specified"
-            
-            experiences.append({
-                "company": company,
-                "duration": duration,
-                "description": section.strip()
-            })
-        
-        return experiences
+        return [dict(entry) for entry in extract_resume_features(text)["experience"]]
     
     def _extract_education(self, text: str) -> List[Dict]:
         """Extract education information from resume text"""
-        education_sections = re.findall(
-            r'(?:education|degree|university|college|school).*?(?=\n\n|\n[A-Z]|$)',
-            text,
-            re.IGNORECASE | re.DOTALL
-        )
-        
-        education = []
-        for section in education_sections:
-            # Extract degree (simplified)
-            degree_match = re.search(r'(Bachelor|Master|PhD|BSc|MSc|MBA|Associate|Diploma)', section, re.IGNORECASE)
-            degree = degree_match.group(1) if degree_match else "Degree not specified"
-            
-            # Extract institution (simplified)
-            institution_match = re.search(r'at\s+([A-Z][A-Za-z\s&]+)', section, re.IGNORECASE)
-            institution = institution_match.group(1).strip() if institution_match else "Institution not specified"
-            
-            education.append({
-                "degree": degree,
-                "institution": institution,
-                "description": section.strip()
-            })
-        
-        return education
+        return [dict(entry) for entry in extract_resume_features(text)["education"]]
     
     def _extract_contact_info(self, text: str) -> Dict:
         """Extract contact information from resume text"""
-        contact_info = {}
-        
-        # Extract email
-        email_match = re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
-        if email_match:
-            contact_info["email"] = email_match.group(0)
-        
-        # Extract phone number
-        phone_match = re.search(r'(\+?1?[-.\s]?)?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})', text)
-        if phone_match:
-            contact_info["phone"] = phone_match.group(0)
-        
-        # Extract LinkedIn
-        linkedin_match = re.search(r'linkedin\.com/in/[A-Za-z0-9-]+', text, re.IGNORECASE)
-        if linkedin_match:
-            contact_info["linkedin"] = linkedin_match.group(0)
-        
-        return contact_info
+        return dict(extract_resume_features(text)["contact_info"])
     
     def _generate_summary(self, text: str) -> str:
         """Generate a summary of the resume"""
-        # In production, you'd use OpenAI API for this
-        lines = text.split('\n')
-        summary_lines = [line.strip() for line in lines if line.strip() and len(line.strip()) > 20]
-        
-        if summary_lines:
-            return summary_lines[0][:200] + "..." if len(summary_lines[0]) > 200 else summary_lines[0]
+        summary = extract_resume_features(text)["summary"]
+        if summary:
+            return summary[:200] + "..." if len(summary) > 200 else summary
         else:
             return "Professional summary not found in resume."
     
     def _identify_strengths(self, text: str) -> List[str]:
         """Identify strengths in the resume"""
-        strengths = []
-        
-        # Look for positive indicators
-        positive_indicators = [
-            "achieved", "improved", "increased", "decreased", "led", "managed",
-            "developed", "created", "implemented", "designed", "optimized",
-            "awarded", "recognized", "certified", "expert", "senior", "lead"
-        ]
-        
-        for indicator in positive_indicators:
-            if re.search(rf'\b{indicator}\b', text, re.IGNORECASE):
-                strengths.append(f"Demonstrates {indicator} experience")
-        
-        return strengths[:5]  # Limit to top 5 strengths
+        verbs = extract_resume_features(text)["action_verbs"]
+        return [f"Demonstrates {verb} experience" for verb in verbs[:5]]  # Limit to top 5 strengths
     
     def _identify_improvements(self, text: str) -> List[str]:
         """Identify areas for improvement in the resume"""
+        features = extract_resume_features(text)
         improvements = []
         
         # Check for common resume issues
         if len(text) < 500:
             improvements.append("Resume appears too short - consider adding more details")
         
-        if not re.search(r'\b\d{4}\b', text):
+        if not features["years"] and not features["date_ranges"]:
             improvements.append("Consider adding specific dates and durations")
         
-        if not re.search(r'\b(?:achieved|improved|increased|decreased)\b', text, re.IGNORECASE):
+        if not features["has_quantified_achievements"]:
             improvements.append("Consider adding quantifiable achievements")
         
-        if not re.search(r'\b(?:Python|Java|JavaScript|React|SQL)\b', text, re.IGNORECASE):
+        if not features["has_core_tech"]:
             improvements.append("Consider highlighting technical skills more prominently")
         
         return improvements
@@ -0,0 +1,181 @@
+import re
+from functools import lru_cache
+from typing import Dict, List
+
+# Words a fallback strength can be built from, in reporting order
+ACTION_VERBS = [
+    "achieved", "improved", "increased", "decreased", "led", "managed",
+    "developed", "created", "implemented", "designed", "optimized",
+    "awarded", "recognized", "certified", "expert", "senior", "lead"
+]
+QUANTIFIABLE_VERBS = frozenset(("achieved", "improved", "increased", "decreased"))
+CORE_TECH_WORDS = frozenset(("python", "java", "javascript", "react", "sql"))
+
+DEGREE_WORDS = {
+    "bachelor": "Bachelor", "bachelors": "Bachelor", "master": "Master", "masters": "Master",
+    "phd": "PhD", "bsc": "BSc", "msc": "MSc", "mba": "MBA", "associate": "Associate",
+    "diploma": "Diploma"
+}
+INSTITUTION_WORDS = frozenset(("university", "college", "institute", "school", "academy"))
+
+# First word of a heading line -> section kind
+SECTION_HEADINGS = {
+    "experience": "experience", "work": "experience", "employment": "experience",
+    "professional": "experience", "career": "experience", "relevant": "experience",
+    "education": "education", "academic": "education", "qualifications": "education",
+    "skills": "skills", "technical": "skills", "core": "skills", "competencies": "skills",
+    "summary": "summary", "profile": "summary", "objective": "summary", "about": "summary",
+    "projects": "projects", "certifications": "certifications", "licenses": "certifications",
+    "awards": "other", "achievements": "other", "publications": "other", "volunteer": "other",
+    "languages": "other", "interests": "other", "references": "other", "contact": "other"
+}
+HEADING_MAX_LENGTH = 40
+
+# One alternation scanned once over the whole resume; order matters where
+# alternatives overlap (a date range before a bare year, an email before a word)
+TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<email>(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,})
+    |(?P<linkedin>linkedin\.com/in/[A-Za-z0-9-]+)
+    |(?P<range>(?:19|20)\d{2}\s*[-–]\s*(?:(?:19|20)\d{2}|present|current)\b)
+    |(?P<phone>(?:\+?1[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b)
+    |(?P<year>\b(?:19|20)\d{2}\b)
+    |(?P<word>[A-Za-z][A-Za-z']*)
+    |(?P<newline>\n)
+    """,
+    re.IGNORECASE | re.VERBOSE
+)
+
+AT_NAME_PATTERN = re.compile(r"\bat\s+([A-Z][A-Za-z&]*(?:[ \t]+[A-Z&][A-Za-z&]*)*)")
+
+
+def _heading_kind(line: str, first_word: str) -> str:
+    """Section kind if the line looks like a heading ("EXPERIENCE", "Work History:")"""
+    if not first_word or len(line) > HEADING_MAX_LENGTH or line.endswith("."):
+        return ""
+    return SECTION_HEADINGS.get(first_word, "")
+
+
+def _new_line() -> Dict:
+    return {"start": 0, "first_word": "", "range": "", "degree": "", "institution": False}
+
+
+@lru_cache(maxsize=256)
+def extract_resume_features(text: str) -> Dict:
+    """
+    Every regex-fallback feature of a resume from a single tokenizing pass:
+    sections, dates, action verbs, contact fields, experience and education entries.
+    The result is cached per text and must be treated as read-only.
+    """
+    contact: Dict[str, str] = {}
+    words = set()
+    years: List[str] = []
+    date_ranges: List[str] = []
+    degrees: List[str] = []
+    lines: List[Dict] = []
+
+    line = _new_line()
+    for token in TOKEN_PATTERN.finditer(text):
+        kind = token.lastgroup
+        value = token.group()
+        if kind == "word":
+            lowered = value.lower()
+            if not line["first_word"]:
+                line["first_word"] = lowered
+            if lowered in DEGREE_WORDS:
+                degrees.append(DEGREE_WORDS[lowered])
+                line["degree"] = line["degree"] or value
+            elif lowered in INSTITUTION_WORDS:
+                line["institution"] = True
+            else:
+                words.add(lowered)
+        elif kind == "newline":
+            line["end"] = token.start()
+            lines.append(line)
+            line = _new_line()
+            line["start"] = token.end()
+        elif kind == "range":
+            date_ranges.append(value)
+            line["range"] = line["range"] or value
+        elif kind == "year":
+            years.append(value)
+        elif kind not in contact:
+            # email, phone and linkedin: the first one seen wins
+            contact[kind] = value
+    line["end"] = len(text)
+    lines.append(line)
+
+    summary = ""
+    sections: List[Dict] = []
+    experience: List[Dict] = []
+    education: List[Dict] = []
+    section_kind = ""
+    entry = None
+
+    for line in lines:
+        content = text[line["start"]:line["end"]].strip()
+        if not content:
+            entry = None
+            continue
+        if not summary and len(content) > 20:
+            summary = content
+
+        heading = _heading_kind(content.rstrip(":"), line["first_word"])
+        if heading:
+            section_kind = heading
+            entry = None
+            if sections:
+                sections[-1]["end"] = line["start"]
+            sections.append({"kind": heading, "title": content.rstrip(":"), "start": line["start"], "end": len(text)})
+            continue
+
+        if section_kind == "education" or (section_kind != "experience" and line["degree"]):
+            if entry is None or entry["kind"] != "education" or (line["degree"] and entry["degree"]):
+                entry = {"kind": "education", "degree": "", "institution": "", "lines": []}
+                education.append(entry)
+            entry["degree"] = entry["degree"] or line["degree"]
+            if not entry["institution"]:
+                at_name = AT_NAME_PATTERN.search(content)
+                if at_name:
+                    entry["institution"] = at_name.group(1).strip()
+                elif line["institution"]:
+                    entry["institution"] = content.split(",")[0].strip()
+            entry["lines"].append(content)
+        elif section_kind == "experience" or line["range"]:
+            if entry is None or entry["kind"] != "experience" or (line["range"] and entry["duration"]):
+                entry = {"kind": "experience", "company": "", "duration": "", "lines": []}
+                experience.append(entry)
+            entry["duration"] = entry["duration"] or line["range"]
+            if not entry["company"]:
+                at_name = AT_NAME_PATTERN.search(content)
+                if at_name:
+                    entry["company"] = at_name.group(1).strip()
+            entry["lines"].append(content)
+
+    return {
+        "sections": sections,
+        "contact_info": contact,
+        "years": years,
+        "date_ranges": date_ranges,
+        "degrees": list(dict.fromkeys(degrees)),
+        "action_verbs": [verb for verb in ACTION_VERBS if verb in words],
+        "has_quantified_achievements": not QUANTIFIABLE_VERBS.isdisjoint(words),
+        "has_core_tech": not CORE_TECH_WORDS.isdisjoint(words),
+        "summary": summary,
+        "experience": [
+            {
+                "company": item["company"] or "Unknown Company",
+                "duration": item["duration"] or "Duration not specified",
+                "description": "\n".join(item["lines"])
+            }
+            for item in experience
+        ],
+        "education": [
+            {
+                "degree": item["degree"] or "Degree not specified",
+                "institution": item["institution"] or "Institution not specified",
+                "description": "\n".join(item["lines"])
+            }
+            for item in education
+        ]
+    }
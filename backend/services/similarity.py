@@ -0,0 +1,119 @@
+import re
+from collections import Counter
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from services.job_description import segment_job_description
+from services.skill_taxonomy import get_skill_taxonomy
+
+WORD_PATTERN = re.compile(r"[a-z][a-z0-9+#]{2,}")
+STOPWORDS = frozenset("""
+and the for with you are our will have has that this from your who what when where which their they them
+all any can able about into within across over more most other such than then there these those also not
+but its it's job role team work working experience years year strong plus including using use etc
+""".split())
+
+# Job description skills count by tier; canonical skills outweigh plain words and bigrams
+SKILL_TIER_WEIGHTS = {"required": 3.0, "preferred": 1.5, "other": 0.5}
+SKILL_BOOST = 3.0
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def content_words(text: str) -> List[str]:
+    """Lowercased words of three or more characters, minus stopwords, in order"""
+    return [word for word in WORD_PATTERN.findall(text.lower()) if word not in STOPWORDS]
+
+
+def _ngram_terms(words: List[str]) -> Counter:
+    terms = Counter(f"w:{word}" for word in words)
+    terms.update(f"b:{first} {second}" for first, second in zip(words, words[1:]))
+    return terms
+
+
+def job_terms(job_description: str) -> Counter:
+    """Term frequencies of a job description: words, bigrams and tier-weighted skills"""
+    terms = _ngram_terms(content_words(job_description))
+    for tier, skills in segment_job_description(job_description)["skills"].items():
+        for skill in skills:
+            terms[f"s:{skill}"] = SKILL_TIER_WEIGHTS[tier]
+    return terms
+
+
+def resume_terms(resume_text: str) -> List[str]:
+    """Distinct query terms of a resume: canonical skills, words and bigrams"""
+    skills = [f"s:{skill}" for skill in get_skill_taxonomy().extract(resume_text)]
+    return skills + list(_ngram_terms(content_words(resume_text)))
+
+
+class SimilarityEngine:
+    """
+    BM25 over a fixed set of job descriptions, stored term-major (CSC) in NumPy
+    arrays so one resume is scored against every job in a single vectorized pass.
+    """
+
+    def __init__(self, documents: Sequence[Counter], k1: float = BM25_K1, b: float = BM25_B):
+        self.size = len(documents)
+        self.vocabulary: Dict[str, int] = {}
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        frequencies: List[float] = []
+        for doc_id, terms in enumerate(documents):
+            for term, frequency in terms.items():
+                term_ids.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                doc_ids.append(doc_id)
+                frequencies.append(frequency)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        tf = np.asarray(frequencies, dtype=np.float64)
+
+        doc_lengths = np.bincount(doc_ids, weights=tf, minlength=self.size)
+        average_length = doc_lengths.mean() if self.size else 0.0
+        document_frequency = np.bincount(term_ids, minlength=len(self.vocabulary))
+        idf = np.log1p((self.size - document_frequency + 0.5) / (document_frequency + 0.5))
+
+        length_norm = 1 - b + b * doc_lengths[doc_ids] / (average_length or 1.0)
+        weights = idf[term_ids] * tf * (k1 + 1) / (tf + k1 * length_norm)
+        skill_terms = np.fromiter((term.startswith("s:") for term in self.vocabulary), dtype=bool, count=len(self.vocabulary))
+        weights[skill_terms[term_ids]] *= SKILL_BOOST
+
+        order = np.argsort(term_ids, kind="stable")
+        self.doc_ids = doc_ids[order]
+        self.weights = weights[order]
+        self.indptr = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(document_frequency, out=self.indptr[1:])
+        # Best score each job can reach: a resume containing every one of its terms
+        self.max_scores = np.bincount(doc_ids, weights=weights, minlength=self.size)
+
+    @classmethod
+    def from_job_descriptions(cls, job_descriptions: Sequence[str], **kwargs) -> "SimilarityEngine":
+        return cls([job_terms(job_description) for job_description in job_descriptions], **kwargs)
+
+    def scores(self, resume_text: str) -> np.ndarray:
+        """Raw BM25 score of the resume against every job"""
+        term_ids = [self.vocabulary[term] for term in resume_terms(resume_text) if term in self.vocabulary]
+        if not term_ids:
+            return np.zeros(self.size)
+        entries = np.concatenate([np.arange(self.indptr[term_id], self.indptr[term_id + 1]) for term_id in term_ids])
+        return np.bincount(self.doc_ids[entries], weights=self.weights[entries], minlength=self.size)
+
+    def coverage(self, resume_text: str) -> np.ndarray:
+        """Share (0-100) of each job's BM25 weight the resume covers"""
+        scores = self.scores(resume_text)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            coverage = np.where(self.max_scores > 0, scores / self.max_scores * 100, 0.0)
+        return np.round(np.minimum(coverage, 100.0), 2)
+
+
+def similarity_percentage(resume_text: str, job_description: str) -> float:
+    """Deterministic 0-100 similarity of one resume and one job description"""
+    return float(SimilarityEngine.from_job_descriptions([job_description]).coverage(resume_text)[0])
+
+
+def rank_jobs(resume_text: str, job_descriptions: Sequence[str]) -> List[float]:
+    """Similarity of one resume to many job descriptions, scored in one vectorized pass"""
+    if not job_descriptions:
+        return []
+    return SimilarityEngine.from_job_descriptions(job_descriptions).coverage(resume_text).tolist()
@@ -0,0 +1,62 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key onto one shared task.
+    Waiters are shielded from each other: a waiter that is cancelled (e.g. its
+    client disconnected) leaves the shared call running for everyone else. When
+    the last waiter goes away the shared call is cancelled too.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self._stats = {"calls": 0, "coalesced": 0, "abandoned": 0, "cancelled": 0}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._flights
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Await `factory()`, or the identical call already in flight for `key`"""
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.create_task(factory())
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self._stats["calls"] += 1
+            return await self._await(task)
+        return await self.join(key)
+
+    async def join(self, key: str) -> Any:
+        """Await the call already in flight for `key` (check `in_flight` first)"""
+        self._stats["coalesced"] += 1
+        return await self._await(self._flights[key])
+
+    def stats(self) -> Dict:
+        return {**self._stats, "in_flight": len(self._flights)}
+
+    async def _await(self, task: asyncio.Task) -> Any:
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done():
+                self._stats["abandoned"] += 1
+                if self._waiters[task] == 1:
+                    # Nobody is left to use the answer
+                    task.cancel()
+                    self._stats["cancelled"] += 1
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        # Mark the error as retrieved even if every waiter has gone away
+        if not task.cancelled():
+            task.exception()
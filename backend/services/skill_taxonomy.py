@@ -0,0 +1,174 @@
+import json
+import os
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+DEFAULT_TAXONOMY_PATH = Path(__file__).resolve().parent.parent / "data" / "skills.json"
+
+
+class SkillMatch(NamedTuple):
+    skill_id: str
+    name: str
+    start: int
+    end: int
+    surface: str
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class _Automaton:
+    """Aho-Corasick automaton over normalized (whitespace-collapsed) patterns"""
+
+    def __init__(self):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # Per node: (skill index, pattern length, needs left boundary, needs right boundary)
+        self.out: List[List[tuple]] = [[]]
+
+    def add(self, pattern: str, skill_index: int):
+        node = 0
+        for ch in pattern:
+            next_node = self.goto[node].get(ch)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto[node][ch] = next_node
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            node = next_node
+        entry = (skill_index, len(pattern), _is_word_char(pattern[0]), _is_word_char(pattern[-1]))
+        if entry not in self.out[node]:
+            self.out[node].append(entry)
+
+    def build(self):
+        """Compute failure links breadth-first and merge outputs along them"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(ch, 0)
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def step(self, state: int, ch: str) -> int:
+        goto, fail = self.goto, self.fail
+        while state and ch not in goto[state]:
+            state = fail[state]
+        return goto[state].get(ch, 0)
+
+
+def _normalize(surface: str) -> str:
+    return " ".join(surface.split())
+
+
+class SkillTaxonomy:
+    """
+    Canonical skills with aliases, matched in a single pass over the text.
+    Names and `aliases` match case-insensitively; `case_sensitive_aliases`
+    (e.g. "Go", "R") only match exactly as written.
+    """
+
+    def __init__(self, skills: Iterable[Dict]):
+        self.skills: List[Dict] = []
+        self.by_id: Dict[str, Dict] = {}
+        self._insensitive = _Automaton()
+        self._sensitive = _Automaton()
+
+        for skill in skills:
+            index = len(self.skills)
+            self.skills.append(skill)
+            self.by_id[skill["id"]] = skill
+
+            case_sensitive = {_normalize(alias) for alias in skill.get("case_sensitive_aliases", [])}
+            for alias in case_sensitive:
+                self._sensitive.add(alias, index)
+            for surface in [skill["name"], *skill.get("aliases", [])]:
+                surface = _normalize(surface)
+                if surface and surface not in case_sensitive:
+                    self._insensitive.add(surface.lower(), index)
+
+        self._insensitive.build()
+        self._sensitive.build()
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "SkillTaxonomy":
+        """Load a taxonomy JSON file ({"skills": [{"id", "name", "aliases", ...}]})"""
+        with open(path or DEFAULT_TAXONOMY_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["skills"])
+
+    def __len__(self) -> int:
+        return len(self.skills)
+
+    def find(self, text: str) -> List[SkillMatch]:
+        """All non-overlapping skill mentions (leftmost-longest), with positions"""
+        if not text:
+            return []
+
+        candidates = []
+        # Original text index of every normalized character fed to the automata
+        positions: List[int] = []
+        insensitive_state = sensitive_state = 0
+        previous_space = False
+        insensitive, sensitive = self._insensitive, self._sensitive
+
+        for index, ch in enumerate(text):
+            if ch.isspace():
+                if previous_space:
+                    continue
+                previous_space = True
+                ch = " "
+            else:
+                previous_space = False
+
+            positions.append(index)
+            sensitive_state = sensitive.step(sensitive_state, ch)
+            if sensitive.out[sensitive_state]:
+                self._collect(candidates, sensitive.out[sensitive_state], positions, text)
+
+            lowered = ch.lower()
+            if len(lowered) != 1:
+                # Rare characters whose lowercase form is longer would shift positions
+                lowered = ch
+            insensitive_state = insensitive.step(insensitive_state, lowered)
+            if insensitive.out[insensitive_state]:
+                self._collect(candidates, insensitive.out[insensitive_state], positions, text)
+
+        candidates.sort(key=lambda match: (match[0], -match[1]))
+        matches = []
+        last_end = 0
+        for start, end, skill_index in candidates:
+            if start < last_end:
+                continue
+            skill = self.skills[skill_index]
+            matches.append(SkillMatch(skill["id"], skill["name"], start, end, text[start:end]))
+            last_end = end
+        return matches
+
+    def extract(self, text: str) -> List[str]:
+        """Canonical names of the skills mentioned in the text, in first-seen order"""
+        return list(dict.fromkeys(match.name for match in self.find(text)))
+
+    def _collect(self, candidates: list, outputs: List[tuple], positions: List[int], text: str):
+        last = len(positions) - 1
+        for skill_index, length, left_boundary, right_boundary in outputs:
+            start = positions[last - length + 1]
+            end = positions[last] + 1
+            if left_boundary and start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if right_boundary and end < len(text) and _is_word_char(text[end]):
+                continue
+            candidates.append((start, end, skill_index))
+
+
+@lru_cache(maxsize=1)
+def get_skill_taxonomy() -> SkillTaxonomy:
+    """Shared taxonomy loaded from SKILL_TAXONOMY_PATH (or the bundled data/skills.json)"""
+    return SkillTaxonomy.load(os.getenv("SKILL_TAXONOMY_PATH") or None)
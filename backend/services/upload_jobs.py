@@ -0,0 +1,268 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+STAGES = ("extracting", "analyzing", "matching", "recommending")
+FINISHED = ("done", "failed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS upload_jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    stages TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    file BLOB,
+    fields TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+STATUS_COLUMNS = "id, status, stages, result, error, created_at, updated_at"
+
+
+class UploadJobStore:
+    """SQLite table of upload jobs: the uploaded file and form until done, then progress and result"""
+
+    def __init__(self, path: Optional[str] = None):
+        path = path if path is not None else os.getenv("UPLOAD_JOBS_DB", ".cache/upload_jobs.sqlite3")
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(SCHEMA)
+
+    def create(self, filename: str, file: bytes, fields: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        stages = json.dumps({stage: "pending" for stage in STAGES})
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO upload_jobs (id, status, stages, filename, file, fields, created_at, updated_at)"
+                " VALUES (?, 'queued', ?, ?, ?, ?, ?, ?)",
+                (job_id, stages, filename, file, json.dumps(fields), now, now)
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Public state of a job (no file), or None"""
+        with self._lock:
+            row = self._db.execute(f"SELECT {STATUS_COLUMNS} FROM upload_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row["id"],
+            "status": row["status"],
+            "stages": json.loads(row["stages"]),
+            "result": json.loads(row["result"]) if row["result"] is not None else None,
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
+        }
+
+    def inputs(self, job_id: str) -> Optional[Dict]:
+        """The uploaded file and form fields of an unfinished job"""
+        with self._lock:
+            row = self._db.execute("SELECT filename, file, fields FROM upload_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or row["file"] is None:
+            return None
+        return {"filename": row["filename"], "file": bytes(row["file"]), **json.loads(row["fields"])}
+
+    def update(self, job_id: str, status: Optional[str] = None, stages: Optional[Dict] = None, result: Any = None, error: Optional[str] = None):
+        columns = {"updated_at": time.time()}
+        if status is not None:
+            columns["status"] = status
+            if status in FINISHED:
+                # The upload is only needed to (re)run the job
+                columns["file"] = None
+        if stages is not None:
+            columns["stages"] = json.dumps(stages)
+        if result is not None:
+            columns["result"] = json.dumps(result)
+        if error is not None:
+            columns["error"] = error
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        with self._lock, self._db:
+            self._db.execute(f"UPDATE upload_jobs SET {assignments} WHERE id = ?", (*columns.values(), job_id))
+
+    def unfinished(self) -> List[str]:
+        """Queued jobs and jobs interrupted mid-run, oldest first"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id FROM upload_jobs WHERE status NOT IN (?, ?) ORDER BY created_at", FINISHED
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def prune(self, max_age: float) -> int:
+        """Delete finished jobs last updated more than `max_age` seconds ago"""
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "DELETE FROM upload_jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (*FINISHED, time.time() - max_age)
+            )
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+Handler = Callable[[Dict, Callable[[str, str], None]], Awaitable[Dict]]
+
+
+class UploadJobQueue:
+    """
+    Runs submitted uploads on a bounded pool of worker tasks. Every change of a
+    job's status or stage is written to the store and pushed to its watchers, and
+    jobs that were queued or running when the process stopped are picked up again
+    by `start`.
+    """
+
+    def __init__(
+        self,
+        handler: Handler,
+        store: Optional[UploadJobStore] = None,
+        workers: Optional[int] = None,
+        max_age: Optional[float] = None,
+        prune_interval: Optional[float] = None
+    ):
+        self.handler = handler
+        # Opened by `start`, so importing the app creates no database
+        self.store = store
+        self.workers = workers or int(os.getenv("UPLOAD_JOB_WORKERS", "4"))
+        self.max_age = max_age if max_age is not None else float(os.getenv("UPLOAD_JOB_TTL", str(24 * 3600)))
+        self.prune_interval = prune_interval if prune_interval is not None else float(os.getenv("UPLOAD_JOB_PRUNE_INTERVAL", "600"))
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._watchers: Dict[str, Set[asyncio.Queue]] = {}
+
+    async def start(self):
+        """Start the workers on the running loop and requeue unfinished jobs"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        if self.store is None:
+            self.store = await asyncio.to_thread(UploadJobStore)
+        pruned = await asyncio.to_thread(self.store.prune, self.max_age)
+        unfinished = await asyncio.to_thread(self.store.unfinished)
+        if unfinished or pruned:
+            print(f"Upload jobs: {len(unfinished)} requeued, {pruned} expired")
+        for job_id in unfinished:
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._prune()))
+
+    async def stop(self):
+        """Stop the workers; jobs they were running stay unfinished and rerun on the next start"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks, self._loop = [], None
+
+    async def submit(self, filename: str, file: bytes, fields: Dict[str, Any]) -> Dict:
+        """Persist an upload and queue it; returns the job's initial state"""
+        await self.start()
+        job_id = await asyncio.to_thread(self.store.create, filename, file, fields)
+        self._queue.put_nowait(job_id)
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        await self.start()
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def watch(self, job_id: str) -> AsyncIterator[Dict]:
+        """The job's current state, then every change until it finishes"""
+        changes: asyncio.Queue = asyncio.Queue()
+        self._watchers.setdefault(job_id, set()).add(changes)
+        try:
+            job = await self.get(job_id)
+            if job is None:
+                return
+            yield job
+            while job["status"] not in FINISHED:
+                job = await changes.get()
+                yield job
+        finally:
+            watchers = self._watchers.get(job_id)
+            if watchers is not None:
+                watchers.discard(changes)
+                if not watchers:
+                    del self._watchers[job_id]
+
+    async def _work(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _prune(self):
+        """Expire finished jobs while the server runs, not just at startup"""
+        while True:
+            await asyncio.sleep(self.prune_interval)
+            try:
+                pruned = await asyncio.to_thread(self.store.prune, self.max_age)
+            except sqlite3.Error as e:
+                print(f"Upload jobs: pruning failed: {str(e)}")
+                continue
+            if pruned:
+                print(f"Upload jobs: {pruned} expired")
+
+    async def _run(self, job_id: str):
+        inputs = await asyncio.to_thread(self.store.inputs, job_id)
+        if inputs is None:
+            return
+        stages = {stage: "pending" for stage in STAGES}
+        # Progress is reported synchronously; each write waits for the one before it
+        last: Optional[asyncio.Task] = None
+
+        def progress(stage: str, state: str):
+            nonlocal last
+            stages[stage] = state
+            last = asyncio.create_task(self._update(job_id, after=last, stages=dict(stages)))
+
+        await self._update(job_id, status="running", stages=dict(stages))
+        try:
+            result = await self.handler(inputs, progress)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Upload job {job_id} failed: {str(e)}")
+            for stage, state in stages.items():
+                if state == "running":
+                    stages[stage] = "failed"
+            await self._update(job_id, after=last, status="failed", stages=stages, error=str(e))
+            return
+        await self._update(job_id, after=last, status="done", stages=stages, result=result)
+
+    async def _update(self, job_id: str, after: Optional[asyncio.Task] = None, **changes):
+        if after is not None:
+            await asyncio.wait({after})
+        # The write, the result's JSON dump and the read-back stay off the event loop
+        watched = bool(self._watchers.get(job_id))
+        job = await asyncio.to_thread(self._write, job_id, changes, watched)
+        watchers = self._watchers.get(job_id)
+        if watchers:
+            if job is None:
+                # Someone started watching during the write
+                job = await asyncio.to_thread(self.store.get, job_id)
+            for changes_queue in watchers:
+                changes_queue.put_nowait(job)
+
+    def _write(self, job_id: str, changes: Dict, read_back: bool) -> Optional[Dict]:
+        self.store.update(job_id, **changes)
+        return self.store.get(job_id) if read_back else None
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for the multi-job batch matching endpoint
+
+These run fully offline against fake OpenAI clients that sleep before answering.
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import main
+from services.llm_gateway import LLMGateway
+from services.llm_cache import llm_cache
+from services.similarity import rank_jobs
+
+SAMPLE_RESUME = b"""Jane Doe
+Experience
+Senior Developer at Tech Corp, 2019 - Present
+- Built Python and React services on AWS with Docker
+"""
+
+JOBS = [
+    {"job_title": "Data Engineer", "company": "A", "job_description": "Requirements:\n- Spark\n- Scala\n- Airflow"},
+    {"job_title": "Full Stack", "company": "B", "job_description": "Requirements:\n- Python\n- React\n- Docker"},
+    {"job_title": "Backend", "company": "C", "job_description": "Requirements:\n- Python\n- Go\nNice to have\n- AWS"},
+]
+
+
+@pytest.fixture(autouse=True)
+def no_llm_cache(monkeypatch):
+    monkeypatch.setattr(llm_cache, "enabled", False)
+    monkeypatch.setattr(llm_cache, "coalesce", False)
+
+
+class CountingCompletions:
+    """Fake `chat.completions` that records how many calls run at once"""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        message = SimpleNamespace(content="{}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def _client(completions: CountingCompletions):
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+
+def _post_batch(jobs):
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(
+                "/api/match-batch",
+                files={"resume": ("resume.txt", SAMPLE_RESUME, "text/plain")},
+                data={"jobs": json.dumps(jobs)},
+            )
+
+    return asyncio.run(scenario())
+
+
+def test_pre_score_ranks_by_weighted_similarity():
+    scores = rank_jobs(SAMPLE_RESUME.decode(), [job["job_description"] for job in JOBS])
+
+    assert scores[0] == 0.0
+    assert scores[1] > scores[2] > scores[0]
+    assert scores[1] > 80
+
+
+def test_batch_streams_ranked_ndjson_and_analyzes_once(monkeypatch):
+    analysis = CountingCompletions()
+    matching = CountingCompletions()
+    monkeypatch.setattr(main.resume_analyzer, "gateway", LLMGateway(client=_client(analysis)))
+    monkeypatch.setattr(main.job_matcher, "gateway", LLMGateway(client=_client(matching)))
+
+    response = _post_batch(JOBS)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+
+    assert events[0]["type"] == "ranking"
+    assert [item["index"] for item in events[0]["jobs"]] == [1, 2, 0]
+    assert [event["type"] for event in events[1:-1]].count("analysis") == 1
+    assert sorted(event["index"] for event in events if event["type"] == "match") == [0, 1, 2]
+    assert events[-1] == {"type": "done", "count": 3}
+    assert analysis.calls == 1
+    assert matching.calls == 3
+
+
+def test_batch_bounds_concurrent_matches(monkeypatch):
+    matching = CountingCompletions()
+    monkeypatch.setattr(main.resume_analyzer, "gateway", LLMGateway(client=_client(CountingCompletions())))
+    monkeypatch.setattr(main.job_matcher, "gateway", LLMGateway(client=_client(matching)))
+    monkeypatch.setattr(main.batch_matcher, "concurrency", 3)
+
+    response = _post_batch(JOBS * 4)
+
+    assert response.status_code == 200
+    assert matching.calls == 12
+    assert matching.max_in_flight == 3
+
+
+def test_batch_rejects_bad_job_lists():
+    assert _post_batch([]).status_code == 400
+    assert _post_batch([{"job_title": "No description"}]).status_code == 400
+    assert _post_batch(JOBS * 20).status_code == 400
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
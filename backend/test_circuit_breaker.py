@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Tests for the LLM circuit breaker and degraded upload responses (offline, no OpenAI key required)
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import main
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from services.llm_cache import LLMCache
+from services.llm_gateway import LLMGateway
+from test_llm_gateway import MESSAGES, _run, fake_server, make_gateway  # noqa: F401 (fixture)
+from test_prompt_context import JOB_DESCRIPTION, long_resume
+
+
+class OutageCompletions:
+    """Fake `chat.completions` that fails like an unreachable API until `healthy` is set"""
+
+    def __init__(self):
+        self.calls = 0
+        self.healthy = False
+
+    async def create(self, **params):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if not self.healthy:
+            raise openai.APIConnectionError(request=httpx.Request("POST", "http://fake/v1/chat/completions"))
+        message = SimpleNamespace(content='["Add Terraform projects"]')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def test_failure_rate_opens_and_a_probe_closes():
+    breaker = CircuitBreaker(enabled=True, min_calls=4, failure_rate=0.5, open_seconds=0.1)
+    for success in (True, False, True):
+        assert breaker.allow()
+        breaker.record(success, 0.1)
+    assert breaker.state == CLOSED
+
+    breaker.record(False, 0.1)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.15)
+    assert breaker.state == HALF_OPEN
+    # One probe at a time
+    probe = breaker.allow()
+    assert probe.probe
+    assert not breaker.allow()
+    breaker.record(True, 0.1, probe)
+    assert breaker.state == CLOSED
+    assert breaker.stats()["window"]["calls"] == 0
+
+
+def test_failed_probe_opens_again():
+    breaker = CircuitBreaker(enabled=True, min_calls=1, open_seconds=0.05)
+    breaker.record(False, 0.1)
+    time.sleep(0.06)
+
+    probe = breaker.allow()
+    breaker.record(False, 0.1, probe)
+
+    assert breaker.state == OPEN
+    assert breaker.stats()["opened"] == 2
+
+
+def test_slow_calls_open_the_circuit():
+    breaker = CircuitBreaker(enabled=True, min_calls=3, slow_call_seconds=1, slow_call_rate=0.6)
+    for latency in (0.2, 5, 6):
+        breaker.record(True, latency)
+
+    assert breaker.state == OPEN
+
+
+def test_cancelled_probe_frees_the_slot():
+    breaker = CircuitBreaker(enabled=True, min_calls=1, open_seconds=0.01)
+    breaker.record(False, 0.1)
+    time.sleep(0.02)
+
+    breaker.release(breaker.allow())
+    assert breaker.allow()
+
+
+def test_only_the_probe_settles_a_half_open_circuit():
+    breaker = CircuitBreaker(enabled=True, min_calls=2, open_seconds=0.01)
+    stale, cancelled = breaker.allow(), breaker.allow()
+    breaker.record(False, 0.1)
+    breaker.record(False, 0.1)
+    time.sleep(0.02)
+
+    probe = breaker.allow()
+    # Calls admitted before the circuit opened neither close it nor free the probe slot
+    breaker.record(True, 0.1, stale)
+    breaker.release(cancelled)
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record(True, 0.1, probe)
+    assert breaker.state == CLOSED
+    # ... nor count towards the new window
+    breaker.record(False, 0.1, stale)
+    assert breaker.stats()["window"]["calls"] == 0
+
+
+def test_open_circuit_fails_fast_without_calling_upstream(fake_server):
+    fake_server.statuses = [500] * 3
+    gateway = make_gateway(fake_server, max_retries=0, breaker=CircuitBreaker(enabled=True, min_calls=3, open_seconds=60))
+
+    async def scenario():
+        for _ in range(3):
+            with pytest.raises(openai.InternalServerError):
+                await gateway.create(endpoint="career_advice", messages=MESSAGES)
+        started = time.monotonic()
+        with pytest.raises(CircuitOpenError):
+            await gateway.create(endpoint="career_advice", messages=MESSAGES)
+        return time.monotonic() - started
+
+    elapsed = _run(gateway, scenario)
+
+    assert elapsed < 0.05
+    assert len(fake_server.requests) == 3
+    assert gateway.stats()["circuit_breaker"]["rejected"] == 1
+
+
+def test_rate_limits_do_not_open_the_circuit(fake_server):
+    fake_server.statuses = [429] * 3
+    gateway = make_gateway(fake_server, max_retries=3, breaker=CircuitBreaker(enabled=True, min_calls=1))
+
+    response = _run(gateway, lambda: gateway.create(endpoint="career_advice", messages=MESSAGES))
+
+    assert response.choices[0].message.content == "ok"
+    assert gateway.breaker.state == CLOSED
+
+
+def test_upload_during_an_outage_is_degraded_and_then_fails_fast(monkeypatch):
+    completions = OutageCompletions()
+    gateway = LLMGateway(
+        client=SimpleNamespace(chat=SimpleNamespace(completions=completions)),
+        cache=LLMCache(cache_dir="", enabled=False),
+        breaker=CircuitBreaker(enabled=True, min_calls=3, open_seconds=0.2),
+        max_retries=0
+    )
+    monkeypatch.setattr(main.resume_analyzer, "gateway", gateway)
+    monkeypatch.setattr(main.job_matcher, "gateway", gateway)
+    monkeypatch.setattr(main, "llm_gateway", gateway)
+
+    async def upload():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post(
+                "/api/upload",
+                files={"resume": ("resume.txt", long_resume().encode(), "text/plain")},
+                data={"job_title": "Engineer", "company": "Acme", "job_description": JOB_DESCRIPTION},
+            )
+            health = await client.get("/health")
+        assert response.status_code == 200
+        return response.json(), health.json()["llm"]
+
+    first, state = asyncio.run(upload())
+    assert first["degraded"] is True
+    assert first["degraded_sections"] == ["job_matching", "recommendations", "resume_analysis"]
+    assert state == OPEN
+    assert completions.calls == 3
+
+    # Open: straight to the fallbacks without touching the API
+    second, _ = asyncio.run(upload())
+    assert second["degraded"] is True
+    assert second["job_matching"]["match_percentage"] == first["job_matching"]["match_percentage"]
+    assert completions.calls == 3
+
+    # Half-open: one call probes while its siblings still fall back; the probe succeeds and closes the circuit
+    completions.healthy = True
+    time.sleep(0.25)
+    third, state = asyncio.run(upload())
+    assert completions.calls == 4
+    assert len(third["degraded_sections"]) == 2
+    assert state == CLOSED
+
+    fourth, _ = asyncio.run(upload())
+    assert completions.calls == 7
+    assert fourth["degraded"] is False
+
+
+def test_free_text_endpoints_answer_503_while_the_circuit_is_open(monkeypatch):
+    breaker = CircuitBreaker(enabled=True, min_calls=1, open_seconds=30)
+    breaker.record(False, 0.1)
+    gateway = LLMGateway(
+        client=SimpleNamespace(chat=SimpleNamespace(completions=OutageCompletions())),
+        cache=LLMCache(cache_dir="", enabled=False),
+        breaker=breaker
+    )
+    monkeypatch.setattr(main, "llm_gateway", gateway)
+    payload = {"job_title": "Engineer", "company": "Acme", "job_description": JOB_DESCRIPTION}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            plain = await client.post("/api/career-advice", json=payload)
+            streamed = await client.post("/api/career-advice?stream=true", json=payload)
+        return plain, streamed
+
+    plain, streamed = asyncio.run(scenario())
+
+    assert plain.status_code == 503
+    assert 29 <= int(plain.headers["retry-after"]) <= 30
+    assert "circuit is open" in plain.json()["detail"]
+    assert "event: error" in streamed.text
+    assert '"retry_after": 30' in streamed.text
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Tests for the one-call combined upload analysis (offline, no OpenAI key required)
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import main
+from services.combined_analysis import CombinedAnalyzer
+from services.llm_cache import LLMCache
+from services.llm_gateway import LLMGateway
+from test_prompt_context import JOB_DESCRIPTION, long_resume
+
+ANALYSIS = {
+    "skills": ["Python", "Kubernetes"],
+    "experience": [{"company": "Acme", "duration": "2015-Present", "description": "Operations lead"}],
+    "education": [],
+    "summary": "Operations lead moving into platform work.",
+    "strengths": ["Kubernetes migration"],
+    "areas_for_improvement": ["Quantify more results"],
+    "ai_insights": ["Strong infrastructure trajectory"],
+    "overall_score": 78,
+}
+MATCHING = {
+    "match_percentage": 81.5,
+    "matching_skills": ["Python", "Kubernetes", "AWS"],
+    "missing_skills": [],
+    "extra_skills": ["React"],
+    "ai_analysis": {"overall_fit": "Good fit"},
+    "skill_gaps": [],
+    "transferable_skills": [],
+}
+RECOMMENDATIONS = ["Lead with the Kubernetes migration", "Add Terraform projects"]
+
+
+class EndpointCompletions:
+    """Fake `chat.completions` that answers by endpoint (told apart by the configured max_tokens)"""
+
+    def __init__(self, gateway_settings, answers):
+        self.by_max_tokens = {gateway_settings(endpoint)["max_tokens"]: endpoint for endpoint in answers}
+        self.answers = answers
+        self.calls = []
+
+    async def create(self, **params):
+        endpoint = self.by_max_tokens[params["max_tokens"]]
+        self.calls.append(endpoint)
+        answer = self.answers[endpoint]
+        if isinstance(answer, Exception):
+            raise answer
+        message = SimpleNamespace(content=answer if isinstance(answer, str) else json.dumps(answer))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def install(monkeypatch, combined_answer):
+    """Route every LLM call of the upload to one fake; returns it and the gateway"""
+    gateway = LLMGateway(client=None, cache=LLMCache(cache_dir="", enabled=False))
+    completions = EndpointCompletions(gateway.settings, {
+        "combined_analysis": combined_answer,
+        "resume_analysis": ANALYSIS,
+        "job_matching": MATCHING,
+        "recommendations": RECOMMENDATIONS,
+    })
+    gateway.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(main.resume_analyzer, "gateway", gateway)
+    monkeypatch.setattr(main.job_matcher, "gateway", gateway)
+    monkeypatch.setattr(main, "combined_analyzer", CombinedAnalyzer(main.resume_analyzer, main.job_matcher, gateway))
+    return completions, gateway
+
+
+def _upload(resume: str, combined: bool):
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(
+                "/api/upload",
+                files={"resume": ("resume.txt", resume.encode(), "text/plain")},
+                data={
+                    "job_title": "Engineer",
+                    "company": "Acme",
+                    "job_description": JOB_DESCRIPTION,
+                    "combined": str(combined).lower(),
+                },
+            )
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_complete_answer_needs_one_call_and_matches_the_separate_shapes(monkeypatch):
+    resume = long_resume()
+    completions, _ = install(monkeypatch, {
+        "resume_analysis": ANALYSIS,
+        "job_matching": MATCHING,
+        "recommendations": RECOMMENDATIONS,
+    })
+    combined = _upload(resume, combined=True)
+    assert completions.calls == ["combined_analysis"]
+
+    completions.calls.clear()
+    separate = _upload(resume, combined=False)
+    assert sorted(completions.calls) == ["job_matching", "recommendations", "resume_analysis"]
+
+    assert combined == separate
+    assert combined["job_matching"]["match_percentage"] == 81.5
+    assert combined["resume_analysis"]["contact_info"]["email"] == "john@example.com"
+
+
+def test_only_missing_or_invalid_sections_are_requested_again(monkeypatch):
+    completions, _ = install(monkeypatch, "Here you go: " + json.dumps({
+        "resume_analysis": {**ANALYSIS, "summary": "From the combined call"},
+        "job_matching": {**MATCHING, "match_percentage": "very high"},
+    }))
+
+    result = _upload(long_resume(), combined=True)
+
+    assert completions.calls[0] == "combined_analysis"
+    assert sorted(completions.calls[1:]) == ["job_matching", "recommendations"]
+    assert result["resume_analysis"]["summary"] == "From the combined call"
+    assert result["job_matching"]["match_percentage"] == 81.5
+    assert result["recommendations"] == RECOMMENDATIONS
+    stats = main.combined_analyzer.stats()
+    assert stats["section_fallbacks"] == {"resume_analysis": 0, "job_matching": 1, "recommendations": 1}
+
+
+def test_failed_combined_call_falls_back_to_separate_calls(monkeypatch):
+    completions, _ = install(monkeypatch, RuntimeError("upstream down"))
+
+    result = _upload(long_resume(), combined=True)
+
+    assert sorted(completions.calls[1:]) == ["job_matching", "recommendations", "resume_analysis"]
+    assert result["job_matching"]["match_percentage"] == 81.5
+    assert main.combined_analyzer.stats()["complete"] == 0
+
+
+def test_combined_mode_sends_far_fewer_prompt_tokens(monkeypatch):
+    resume = long_resume(300)
+    answer = {"resume_analysis": ANALYSIS, "job_matching": MATCHING, "recommendations": RECOMMENDATIONS}
+
+    _, gateway = install(monkeypatch, answer)
+    _upload(resume, combined=False)
+    separate = sum(counts["total"] for counts in gateway.stats()["prompt_tokens"].values())
+
+    _, gateway = install(monkeypatch, answer)
+    _upload(resume, combined=True)
+    combined = sum(counts["total"] for counts in gateway.stats()["prompt_tokens"].values())
+
+    assert gateway.stats()["requests"] == 1
+    assert combined < separate * 0.6
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
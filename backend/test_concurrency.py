@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Concurrency tests for JobWiz AI Backend
+
+These run fully offline: the OpenAI clients are swapped for a fake that
+simply sleeps before answering, standing in for a slow upstream model.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import main
+from services.llm_gateway import LLMGateway
+from services.llm_cache import llm_cache
+
+SLOW_CALL_SECONDS = 1.0
+
+
+@pytest.fixture(autouse=True)
+def no_llm_cache(monkeypatch):
+    """Every fake call must reach the (slow) upstream for timings to mean anything"""
+    monkeypatch.setattr(llm_cache, "enabled", False)
+    monkeypatch.setattr(llm_cache, "coalesce", False)
+
+
+class SlowCompletions:
+    """Fake `chat.completions` namespace whose calls take a long time"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.in_flight = 0
+
+    async def create(self, **kwargs):
+        self.in_flight += 1
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        message = SimpleNamespace(content="Slow but steady suggestion")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def _slow_client(completions: SlowCompletions):
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+
+def test_health_responds_while_llm_calls_pending(monkeypatch):
+    """/health must answer promptly while many slow LLM calls are in flight"""
+    completions = SlowCompletions(SLOW_CALL_SECONDS)
+    monkeypatch.setattr(main, "llm_gateway", LLMGateway(client=_slow_client(completions)))
+
+    payload = {
+        "job_title": "Software Engineer",
+        "company": "Tech Corp",
+        "job_description": "Python and React developer",
+    }
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            slow_requests = [
+                asyncio.create_task(client.post("/api/career-advice", json=payload))
+                for _ in range(20)
+            ]
+            # Give the slow requests time to reach the upstream call
+            while completions.in_flight < len(slow_requests):
+                await asyncio.sleep(0.01)
+
+            started = time.perf_counter()
+            health = await client.get("/health")
+            health_latency = time.perf_counter() - started
+            pending_during_health = completions.in_flight
+
+            responses = await asyncio.gather(*slow_requests)
+            return health, health_latency, pending_during_health, responses
+
+    started = time.perf_counter()
+    health, health_latency, pending, responses = asyncio.run(scenario())
+    total = time.perf_counter() - started
+
+    assert health.status_code == 200
+    assert pending == 20
+    assert health_latency < SLOW_CALL_SECONDS / 4
+    assert all(response.status_code == 200 for response in responses)
+    # Twenty 1s calls sharing one event loop finish together, not in sequence
+    assert total < SLOW_CALL_SECONDS * 3
+
+
+SAMPLE_RESUME = b"""
+John Doe
+john.doe@email.com
+
+EXPERIENCE
+Senior Developer at Tech Corp (2020-2023)
+- Developed web applications using Python and React
+
+SKILLS
+Python, JavaScript, React, SQL, Git, AWS, Docker
+"""
+
+UPLOAD_FORM = {
+    "job_title": "Senior Software Engineer",
+    "company": "Tech Company Inc.",
+    "job_description": "Requirements: Python, React, Kubernetes and AWS experience",
+}
+
+
+def _post_upload():
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(
+                "/api/upload",
+                files={"resume": ("resume.txt", SAMPLE_RESUME, "text/plain")},
+                data=UPLOAD_FORM,
+            )
+
+    return asyncio.run(scenario())
+
+
+def test_upload_stages_run_concurrently(monkeypatch):
+    """Upload latency tracks the slowest stage rather than the sum of all three"""
+    completions = SlowCompletions(SLOW_CALL_SECONDS / 2)
+    monkeypatch.setattr(main.resume_analyzer, "gateway", LLMGateway(client=_slow_client(completions)))
+    monkeypatch.setattr(main.job_matcher, "gateway", LLMGateway(client=_slow_client(completions)))
+
+    started = time.perf_counter()
+    response = _post_upload()
+    elapsed = time.perf_counter() - started
+
+    assert response.status_code == 200
+    assert set(response.json()) >= {"resume_analysis", "job_matching", "recommendations"}
+    assert elapsed < SLOW_CALL_SECONDS
+
+
+def test_failed_upload_stage_falls_back_without_cancelling_others(monkeypatch):
+    """A stage that raises is replaced by its regex fallback; siblings still finish"""
+    completions = SlowCompletions(0.05)
+    monkeypatch.setattr(main.resume_analyzer, "gateway", LLMGateway(client=_slow_client(completions)))
+    monkeypatch.setattr(main.job_matcher, "gateway", LLMGateway(client=_slow_client(completions)))
+
+    calls = []
+
+    async def broken_match_job(resume_text, job_description, context=None):
+        raise RuntimeError("matching exploded")
+
+    original_recommendations = main.job_matcher.generate_recommendations
+
+    async def tracked_recommendations(resume_text, job_description, context=None):
+        result = await original_recommendations(resume_text, job_description, context)
+        calls.append("recommendations")
+        return result
+
+    monkeypatch.setattr(main.job_matcher, "match_job", broken_match_job)
+    monkeypatch.setattr(main.job_matcher, "generate_recommendations", tracked_recommendations)
+
+    response = _post_upload()
+
+    assert response.status_code == 200
+    job_matching = response.json()["job_matching"]
+    assert job_matching["ai_analysis"] == {}
+    assert "Python" in job_matching["matching_skills"]
+    assert calls == ["recommendations"]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Tests for per-request deadlines and cancellation on client disconnect (offline, no OpenAI key required)
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import main
+from services.deadlines import ClientDisconnected, Deadline, cancel_on_disconnect, deadline_stats
+from test_combined_analysis import EndpointCompletions, install
+from test_prompt_context import JOB_DESCRIPTION, long_resume
+
+
+class SlowEndpoints(EndpointCompletions):
+    """`EndpointCompletions` whose answers take `delays[endpoint]` seconds"""
+
+    def __init__(self, gateway_settings, answers, delays):
+        super().__init__(gateway_settings, answers)
+        self.delays = delays
+        self.finished = []
+
+    async def create(self, **params):
+        endpoint = self.by_max_tokens[params["max_tokens"]]
+        await asyncio.sleep(self.delays.get(endpoint, 0))
+        self.finished.append(endpoint)
+        return await super().create(**params)
+
+
+def install_slow(monkeypatch, delays):
+    # Career advice needs its own max_tokens to be told apart from recommendations
+    monkeypatch.setenv("LLM_CAREER_ADVICE_MAX_TOKENS", "601")
+    completions, gateway = install(monkeypatch, RuntimeError("combined mode is not used here"))
+    slow = SlowEndpoints(gateway.settings, {**completions.answers, "career_advice": "Keep going"}, delays)
+    gateway.client = SimpleNamespace(chat=SimpleNamespace(completions=slow))
+    monkeypatch.setattr(main, "llm_gateway", gateway)
+    return slow, gateway
+
+
+def _post_upload(headers=None):
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            started = time.monotonic()
+            response = await client.post(
+                "/api/upload",
+                files={"resume": ("resume.txt", long_resume().encode(), "text/plain")},
+                data={"job_title": "Engineer", "company": "Acme", "job_description": JOB_DESCRIPTION},
+                headers=headers or {},
+            )
+            return response, time.monotonic() - started
+
+    return asyncio.run(scenario())
+
+
+def test_deadline_comes_from_configuration_or_header(monkeypatch):
+    monkeypatch.setenv("DEADLINE_UPLOAD", "30")
+    monkeypatch.setenv("DEADLINE_MAX", "90")
+
+    assert Deadline.for_request("upload", {}).seconds == 30
+    assert Deadline.for_request("optimized_resume", {}).seconds == 120
+    assert Deadline.for_request("upload", {"x-request-deadline": "12.5"}).seconds == 12.5
+    assert Deadline.for_request("upload", {"x-request-deadline": "600"}).seconds == 90
+    assert Deadline.for_request("upload", {"x-request-deadline": "soon"}).seconds == 30
+
+    deadline = Deadline("upload", 20)
+    assert deadline.budget("extracting") == pytest.approx(5, abs=0.1)
+    assert deadline.budget("matching") == pytest.approx(20, abs=0.1)
+
+
+def test_stage_past_its_budget_is_cancelled_and_answered_locally(monkeypatch):
+    slow, gateway = install_slow(monkeypatch, {"job_matching": 2})
+    expired_before = deadline_stats.stats().get("upload", {}).get("matching", 0)
+
+    response, elapsed = _post_upload({"X-Request-Deadline": "0.5"})
+
+    assert response.status_code == 200
+    assert elapsed < 1.5
+    body = response.json()
+    assert body["degraded_sections"] == ["job_matching"]
+    assert body["resume_analysis"]["summary"] == "Operations lead moving into platform work."
+    assert "job_matching" not in slow.finished
+    assert deadline_stats.stats()["upload"]["matching"] == expired_before + 1
+    assert gateway.stats()["cancelled"]["job_matching"] == {"calls": 1, "completion_tokens": 1500}
+
+
+def test_text_endpoint_past_its_deadline_returns_504(monkeypatch):
+    slow, gateway = install_slow(monkeypatch, {"career_advice": 2})
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(
+                "/api/career-advice",
+                json={"job_title": "Engineer", "company": "Acme", "job_description": JOB_DESCRIPTION},
+                headers={"X-Request-Deadline": "0.2"},
+            )
+
+    response = asyncio.run(scenario())
+
+    assert response.status_code == 504
+    assert "deadline exceeded" in response.json()["detail"]
+    assert gateway.stats()["cancelled"]["career_advice"]["calls"] == 1
+
+
+def test_client_disconnect_cancels_the_upload(monkeypatch):
+    slow, gateway = install_slow(monkeypatch, {"resume_analysis": 2, "job_matching": 2, "recommendations": 2})
+    upload = httpx.Request(
+        "POST",
+        "http://test/api/upload",
+        files={"resume": ("resume.txt", long_resume().encode(), "text/plain")},
+        data={"job_title": "Engineer", "company": "Acme", "job_description": JOB_DESCRIPTION},
+    )
+    body = upload.read()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/api/upload", "raw_path": b"/api/upload", "query_string": b"",
+        "root_path": "", "server": ("test", 80), "client": ("127.0.0.1", 1234),
+        "headers": [(name.lower(), value) for name, value in upload.headers.raw],
+    }
+    sent = []
+
+    async def scenario():
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            # The browser tab closes while the LLM calls are running
+            await asyncio.sleep(0.2)
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        started = time.monotonic()
+        await main.app(scope, receive, send)
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(scenario())
+
+    assert elapsed < 1
+    assert slow.finished == []
+    assert sent[0]["status"] == 499
+    cancelled = gateway.stats()["cancelled"]
+    assert {endpoint: counts["calls"] for endpoint, counts in cancelled.items()} == {
+        "resume_analysis": 1, "job_matching": 1, "recommendations": 1
+    }
+    assert deadline_stats.stats()["upload"]["disconnected"] >= 1
+
+
+def test_finished_work_is_returned_even_if_the_client_leaves_later():
+    class Request:
+        async def receive(self):
+            await asyncio.sleep(1)
+            return {"type": "http.disconnect"}
+
+    async def work():
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    assert asyncio.run(cancel_on_disconnect(Request(), work(), "test")) == "answer"
+
+    class GoneRequest:
+        async def receive(self):
+            return {"type": "http.disconnect"}
+
+    with pytest.raises(ClientDisconnected):
+        asyncio.run(cancel_on_disconnect(GoneRequest(), asyncio.sleep(1), "test"))
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Tests for upload handling and text extraction in FileHandler
+"""
+
+import asyncio
+import io
+import os
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils import file_handler
+from utils.extraction_pool import ExtractionPool, ExtractionTimeoutError, ExtractionWorkerCrashed
+from utils.file_handler import FileHandler, FileTooLargeError, parse_document
+from utils.text_cache import ExtractedTextCache
+
+SAMPLE_RESUME = b"John Doe\nSoftware Engineer\nPython, React, SQL\n"
+
+
+def make_pdf(text: str) -> bytes:
+    """Build a minimal one-page PDF showing `text`"""
+    content = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref_offset = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer << /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return pdf
+
+
+def make_upload(content: bytes, filename: str = "resume.txt"):
+    return SimpleNamespace(filename=filename, file=io.BytesIO(content))
+
+
+def test_repeat_upload_skips_parsing(monkeypatch):
+    handler = FileHandler()
+    parsed = []
+    original_parser = file_handler._extract_text_from_txt
+
+    def counting_parser(source):
+        parsed.append(source)
+        return original_parser(source)
+
+    monkeypatch.setattr(file_handler, "_extract_text_from_txt", counting_parser)
+
+    texts = []
+    for _ in range(3):
+        upload = make_upload(SAMPLE_RESUME)
+        file_digest, file_size = handler.read_upload(upload)
+        texts.append(asyncio.run(handler.extract_text_from_upload(upload, file_digest, file_size)))
+
+    assert len(parsed) == 1
+    assert texts == [SAMPLE_RESUME.decode().strip()] * 3
+    stats = handler.text_cache.stats()
+    assert stats["hits"] == 2
+    assert stats["bytes_saved"] == 2 * len(SAMPLE_RESUME)
+
+
+def test_oversize_upload_is_rejected_before_full_read(monkeypatch):
+    handler = FileHandler()
+    monkeypatch.setattr(handler, "max_file_size", 256 * 1024)
+    upload = make_upload(b"x" * (1024 * 1024))
+
+    with pytest.raises(FileTooLargeError):
+        handler.read_upload(upload)
+
+    # Reading stops at the first chunk past the limit
+    assert upload.file.tell() <= handler.max_file_size + handler.chunk_size
+
+
+def test_oversize_upload_returns_413(monkeypatch):
+    import main
+
+    monkeypatch.setattr(main.file_handler, "max_file_size", 1024)
+    client = TestClient(main.app)
+
+    response = client.post(
+        "/api/upload",
+        files={"resume": ("resume.txt", b"x" * (512 * 1024), "text/plain")},
+        data={"job_title": "Engineer", "company": "Tech Corp", "job_description": "Python"},
+    )
+
+    assert response.status_code == 413
+
+
+# Parsers below run inside spawned worker processes, so they must be module-level
+
+def _hanging_parser(data, file_extension):
+    time.sleep(60)
+
+
+def _crashing_parser(data, file_extension):
+    os._exit(1)
+
+
+def _memory_hog_parser(data, file_extension):
+    return bytearray(2 * 1024 * 1024 * 1024)
+
+
+def test_pool_extracts_pdf_text():
+    pool = ExtractionPool(parse_document, max_workers=1)
+    try:
+        text = asyncio.run(pool.extract(make_pdf("Python Developer"), ".pdf"))
+    finally:
+        pool.shutdown()
+
+    assert "Python Developer" in text
+
+
+def test_pool_times_out_and_replaces_worker():
+    pool = ExtractionPool(_hanging_parser, max_workers=1, timeout=0.5)
+    try:
+        started = time.perf_counter()
+        with pytest.raises(ExtractionTimeoutError):
+            asyncio.run(pool.extract(b"", ".pdf"))
+        assert time.perf_counter() - started < 10
+
+        # The replacement worker is killed on its own timeout too, proving it exists
+        with pytest.raises(ExtractionTimeoutError):
+            asyncio.run(pool.extract(b"", ".pdf"))
+    finally:
+        pool.shutdown()
+
+    assert pool.stats()["restarts"] == 2
+
+
+def test_pool_reports_crashed_worker():
+    pool = ExtractionPool(_crashing_parser, max_workers=1, timeout=30)
+    try:
+        with pytest.raises(ExtractionWorkerCrashed):
+            asyncio.run(pool.extract(b"", ".pdf"))
+    finally:
+        pool.shutdown()
+
+    assert pool.stats()["crashes"] == 1
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="memory cap relies on POSIX rlimits")
+def test_pool_enforces_memory_limit():
+    pool = ExtractionPool(_memory_hog_parser, max_workers=1, timeout=30, memory_limit=1024 * 1024 * 1024)
+    try:
+        with pytest.raises(ExtractionWorkerCrashed):
+            asyncio.run(pool.extract(b"", ".pdf"))
+    finally:
+        pool.shutdown()
+
+
+def test_text_cache_evicts_by_size():
+    cache = ExtractedTextCache(max_bytes=10)
+    cache.put("a", "12345", 100)
+    cache.put("b", "12345", 100)
+    cache.get("a")
+    cache.put("c", "12345", 100)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "12345"
+    assert cache.get("c") == "12345"
+    assert cache.stats()["current_bytes"] == 10
+    assert cache.stats()["evictions"] == 1
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Tests and benchmark for hedged LLM requests (offline, no OpenAI key required)
+
+Run directly (python test_hedging.py) to compare p50/p99 latency with and without
+hedging against a local fake server with injected stalls.
+"""
+
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from openai.types.chat import ChatCompletion
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.hedging import Hedger, percentile
+from services.llm_cache import LLMCache
+from services.llm_gateway import LLMGateway
+from services.rate_limiter import RateLimiter
+from test_llm_gateway import MESSAGES, _run, fake_server, make_gateway, start_fake_server
+from test_streaming import StreamingCompletions
+
+
+def warmed_hedger(latency: float = 0.01, **kwargs) -> Hedger:
+    kwargs = {"enabled": True, "percentile": 90, "budget": 1.0, "min_samples": 5, "window": 100, **kwargs}
+    hedger = Hedger(**kwargs)
+    for _ in range(5):
+        hedger.latencies.record("career_advice", "gpt-4", latency)
+    return hedger
+
+
+def answer_after(seconds: float, value, calls: list):
+    async def send():
+        calls.append(value)
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            calls.append(f"{value} cancelled")
+            raise
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    return send
+
+
+def test_slow_call_is_hedged_and_the_first_answer_wins():
+    hedger = warmed_hedger()
+    calls = []
+
+    async def scenario():
+        started = time.monotonic()
+        result = await hedger.run("career_advice", "gpt-4", answer_after(2, "slow", calls), answer_after(0.01, "hedge", calls))
+        return result, time.monotonic() - started
+
+    result, elapsed = asyncio.run(scenario())
+
+    assert result == "hedge"
+    assert elapsed < 0.5
+    assert calls == ["slow", "hedge", "slow cancelled"]
+    stats = hedger.stats()
+    assert (stats["hedged"], stats["hedge_wins"]) == (1, 1)
+
+
+def test_calls_are_not_hedged_without_history_or_when_disabled():
+    for hedger in (Hedger(enabled=True, min_samples=5), warmed_hedger(enabled=False), warmed_hedger(endpoints=["optimized_resume"])):
+        calls = []
+        result = asyncio.run(hedger.run("career_advice", "gpt-4", answer_after(0.05, "only", calls)))
+        assert result == "only"
+        assert calls == ["only"]
+        assert hedger.stats()["hedged"] == 0
+
+
+def test_budget_caps_the_share_of_hedged_calls():
+    hedger = warmed_hedger(latency=0.001, budget=0.1)
+
+    async def scenario():
+        await asyncio.gather(*(
+            hedger.run("career_advice", "gpt-4", answer_after(0.02, "answer", []))
+            for _ in range(100)
+        ))
+
+    asyncio.run(scenario())
+
+    stats = hedger.stats()
+    assert stats["calls"] == 100
+    assert 0 < stats["hedged"] <= 100 * 0.1 + hedger.budget.burst
+    assert stats["budget_exhausted"] == 100 - stats["hedged"]
+
+
+def test_hedge_covers_a_failed_call_and_the_first_error_is_raised_if_both_fail():
+    hedger = warmed_hedger()
+    calls = []
+    result = asyncio.run(hedger.run(
+        "career_advice", "gpt-4", answer_after(0.05, RuntimeError("stalled"), calls), answer_after(0.1, "hedge", calls)
+    ))
+    assert result == "hedge"
+
+    with pytest.raises(RuntimeError, match="first"):
+        asyncio.run(hedger.run(
+            "career_advice", "gpt-4", answer_after(0.05, RuntimeError("first"), []), answer_after(0.1, RuntimeError("second"), [])
+        ))
+
+
+def test_gateway_hedges_stalled_upstream_calls(fake_server):
+    # Every tenth request stalls for a second; the rest take long enough that scheduling noise cannot win a hedge
+    fake_server.delay = lambda index: 1.0 if index % 10 == 9 else 0.05
+    gateway = make_gateway(fake_server, hedger=Hedger(enabled=True, percentile=90, budget=0.5, min_samples=10))
+
+    async def scenario():
+        latencies = []
+        for _ in range(40):
+            started = time.monotonic()
+            response = await gateway.create(endpoint="career_advice", messages=MESSAGES)
+            assert response.choices[0].message.content == "ok"
+            latencies.append(time.monotonic() - started)
+        return latencies
+
+    latencies = _run(gateway, scenario)
+
+    # The first stall comes before there is enough history to hedge
+    assert max(latencies[:10]) >= 1.0
+    assert max(latencies[10:]) < 0.5
+    hedging = gateway.stats()["hedging"]
+    assert hedging["hedge_wins"] == 3
+    assert gateway.stats()["requests"] == 40 + hedging["hedged"]
+    # A hedge cancelled while it was still connecting never reaches the server
+    assert 40 + hedging["hedge_wins"] <= len(fake_server.requests) <= 40 + hedging["hedged"]
+
+
+def test_stream_opens_do_not_set_the_bar_for_full_completions():
+    completions = StreamingCompletions()
+    gateway = LLMGateway(
+        client=SimpleNamespace(chat=SimpleNamespace(completions=completions)),
+        cache=LLMCache(cache_dir="", enabled=False, coalesce=False),
+        hedger=Hedger(enabled=True, percentile=90, budget=1.0, min_samples=5)
+    )
+
+    async def scenario():
+        for _ in range(5):
+            async for _ in gateway.stream(endpoint="career_advice", messages=MESSAGES):
+                pass
+        for _ in range(5):
+            await gateway.create(endpoint="career_advice", messages=MESSAGES)
+
+    _run(gateway, scenario)
+
+    hedging = gateway.stats()["hedging"]
+    # Streams open at once; had they counted, every full completion would have been hedged
+    assert hedging["hedged"] == 0
+    assert len(completions.calls) == 10
+    latency = hedging["latency"]["career_advice"]
+    assert latency["gpt-4:stream"]["p99"] < latency["gpt-4"]["p50"]
+
+
+class LedgerLimiter(RateLimiter):
+    """Keeps no buckets, only the net tokens reserved and settled"""
+
+    def __init__(self):
+        super().__init__(enabled=False)
+        self.charged = 0
+
+    async def acquire(self, model, tokens, endpoint="default"):
+        self.charged += tokens
+        return 0.0
+
+    def settle(self, model, estimated, actual):
+        if actual is not None:
+            self.charged += actual - estimated
+
+
+class UsageCompletions:
+    """Fake `chat.completions` answering after `delays[n]` seconds for the n-th call, with 50 tokens of usage"""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.calls = 0
+
+    async def create(self, **params):
+        delay = self.delays[self.calls]
+        self.calls += 1
+        await asyncio.sleep(delay)
+        return ChatCompletion.model_validate({
+            "id": "chatcmpl-usage", "object": "chat.completion", "created": 0, "model": params["model"],
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 40, "total_tokens": 50}
+        })
+
+
+def test_losing_calls_give_their_completion_budget_back():
+    # First call: the hedge wins. Second call: the primary wins and the hedge is cancelled
+    completions = UsageCompletions([0.5, 0.0, 0.05, 0.5])
+    limiter = LedgerLimiter()
+    hedger = warmed_hedger(latency=0.01, budget=1.0)
+    gateway = LLMGateway(
+        client=SimpleNamespace(chat=SimpleNamespace(completions=completions)),
+        cache=LLMCache(cache_dir="", enabled=False, coalesce=False),
+        limiter=limiter,
+        hedger=hedger
+    )
+
+    async def scenario():
+        await gateway.create(endpoint="career_advice", messages=MESSAGES)
+        await gateway.create(endpoint="career_advice", messages=MESSAGES)
+
+    _run(gateway, scenario)
+
+    assert completions.calls == 4
+    assert hedger.stats()["hedged"] == 2
+    prompt = gateway.stats()["prompt_tokens"]["career_advice"]["last"]
+    # Each call pays its answer's usage plus the prompt of the duplicate that lost
+    assert limiter.charged == 2 * (50 + prompt)
+
+
+def run_benchmark(calls: int = 400, concurrency: int = 8, stall_rate: float = 0.03, stall: float = 1.0):
+    server = start_fake_server()
+
+    def delay(index: int) -> float:
+        # Seeded by request index, so both runs see the same upstream behaviour
+        rng = random.Random(index)
+        return stall if rng.random() < stall_rate else rng.uniform(0.02, 0.06)
+
+    server.delay = delay
+
+    async def measure(hedger: Hedger):
+        # Local budgets would throttle hundreds of gpt-4 calls a minute
+        gateway = make_gateway(server, hedger=hedger, limiter=RateLimiter(enabled=False))
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def call():
+            async with semaphore:
+                started = time.perf_counter()
+                await gateway.create(endpoint="optimized_resume", messages=MESSAGES)
+                latencies.append(time.perf_counter() - started)
+
+        try:
+            await asyncio.gather(*(call() for _ in range(calls)))
+        finally:
+            await gateway.aclose()
+        return latencies, gateway.stats()
+
+    print(f"{calls} calls, {concurrency} concurrent, {stall_rate:.0%} of upstream calls stall for {stall:.1f}s")
+    for label, hedger in [
+        ("without hedging", Hedger(enabled=False)),
+        ("with hedging (p90, 10% budget)", Hedger(enabled=True, percentile=90, budget=0.1, min_samples=20))
+    ]:
+        server.requests.clear()
+        latencies, stats = asyncio.run(measure(hedger))
+        extra = len(server.requests) / calls - 1
+        print(
+            f"{label:32} p50 {percentile(latencies, 50) * 1000:7.1f} ms   "
+            f"p99 {percentile(latencies, 99) * 1000:7.1f} ms   "
+            f"extra upstream calls {extra:.1%} ({stats['hedging']['hedge_wins']} hedges won)"
+        )
+    server.shutdown()
+    server.server_close()
+
+
+if __name__ == "__main__":
+    run_benchmark()
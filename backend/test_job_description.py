@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-pass job description segmenter, including pathological inputs
+
+Run directly (python test_job_description.py) to compare against the old DOTALL scans.
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.job_description import segment_job_description
+from services.job_matcher import JobMatcher
+
+SAMPLE_JOB_DESCRIPTION = """
+Senior Software Engineer Position
+
+We are looking for a Senior Software Engineer with experience in:
+- Python development and web frameworks
+- React and JavaScript frontend development
+
+Requirements:
+- 5+ years of software development experience
+- Bachelor's degree in Computer Science or related field
+- Experience with Docker and containerization
+- Terraform experience is a plus
+
+Nice to have
+- Experience with Kubernetes
+- Machine learning background
+
+About us
+Our teams chat on Slack.
+"""
+
+# The lazy DOTALL scans the segmenter replaced, kept for the comparison report
+LEGACY_SKILL_INDICATORS = [
+    r'required.*?skills?.*?[:;]',
+    r'qualifications.*?[:;]',
+    r'requirements.*?[:;]',
+    r'experience.*?with.*?[:;]',
+    r'proficient.*?in.*?[:;]',
+    r'familiar.*?with.*?[:;]',
+    r'expertise.*?in.*?[:;]'
+]
+
+
+def pathological_description(repeats: int) -> str:
+    """Long, colon-free posting full of the words the old lazy patterns anchored on"""
+    return "required experience with proficient in familiar with expertise in skills Python " * repeats
+
+
+def _timed(func, *args) -> float:
+    segment_job_description.cache_clear()
+    started = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - started
+
+
+def test_skills_are_tagged_by_section():
+    skills = segment_job_description(SAMPLE_JOB_DESCRIPTION)["skills"]
+
+    assert {"Python", "React", "JavaScript", "Docker"} <= set(skills["required"])
+    assert {"Kubernetes", "Machine Learning", "Terraform"} <= set(skills["preferred"])
+    assert "Slack" in skills["other"]
+
+
+def test_sections_and_key_requirements_come_from_the_same_pass():
+    result = segment_job_description(SAMPLE_JOB_DESCRIPTION)
+
+    assert [section["kind"] for section in result["sections"]] == ["required", "required", "preferred", "other"]
+    assert "5+ years of software development experience" in result["key_requirements"]
+    assert JobMatcher()._identify_key_requirements(SAMPLE_JOB_DESCRIPTION) == result["key_requirements"][:5]
+
+
+def test_job_matcher_lists_required_skills_first():
+    job_skills = JobMatcher()._extract_skills_from_job_description(SAMPLE_JOB_DESCRIPTION)
+
+    assert job_skills.index("Docker") < job_skills.index("Kubernetes") < job_skills.index("Slack")
+
+
+def test_pathological_input_scales_linearly():
+    small = _timed(segment_job_description, pathological_description(2_000))
+    large = _timed(segment_job_description, pathological_description(8_000))
+
+    # 4x the input (~700KB) must stay well under quadratic growth (16x)
+    assert large < max(small, 0.01) * 8
+    assert large < 5
+
+
+def run_benchmark():
+    def legacy(job_description):
+        for indicator in LEGACY_SKILL_INDICATORS:
+            re.findall(indicator, job_description, re.IGNORECASE | re.DOTALL)
+
+    print("🧪 Job description segmentation on colon-free input")
+    print("=" * 50)
+    for repeats in (25, 50, 100, 10_000):
+        text = pathological_description(repeats)
+        # The legacy scans grow roughly cubically; skip them beyond a few KB
+        legacy_ms = f"{_timed(legacy, text) * 1000:>9.1f} ms" if repeats <= 100 else "   (skipped)"
+        print(f"{len(text):>8,} chars: legacy {legacy_ms}   segmenter {_timed(segment_job_description, text) * 1000:>7.1f} ms")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Tests and benchmark for the on-disk inverted job index
+
+Run directly (python test_job_index.py) to time build, load and top-k search on a synthetic corpus.
+"""
+
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import main
+from services.llm_gateway import LLMGateway
+from services.job_index import JobIndex
+from services.llm_cache import llm_cache
+from services.skill_taxonomy import get_skill_taxonomy
+
+RESUME = "Senior engineer: Python, React, Docker, AWS and PostgreSQL for fintech payment products"
+
+POSTINGS = {
+    "fullstack": "Requirements:\n- Python\n- React\n- Docker\nNice to have\n- AWS",
+    "data": "Requirements:\n- Spark\n- Scala\n- Airflow",
+    "payments": "Requirements:\n- Python\n- PostgreSQL\nAbout us\nWe build fintech payment products.",
+    "frontend": "Requirements:\n- React\n- TypeScript\n- CSS",
+}
+
+
+def synthetic_postings(count: int, seed: int = 3):
+    rng = random.Random(seed)
+    names = [skill["name"] for skill in get_skill_taxonomy().skills]
+    domains = ["fintech", "health", "retail", "games", "logistics", "media"]
+    for number in range(count):
+        skills = rng.sample(names, 8)
+        yield {
+            "job_id": f"job-{number}",
+            "job_title": "Engineer",
+            "company": f"Company {number % 97}",
+            "job_description": (
+                "Requirements:\n" + "\n".join(f"- {skill}" for skill in skills[:5])
+                + "\nNice to have\n" + "\n".join(f"- {skill}" for skill in skills[5:])
+                + f"\nAbout us\nWe build {rng.choice(domains)} products."
+            )
+        }
+
+
+def build_index(directory, postings=POSTINGS, **kwargs) -> JobIndex:
+    index = JobIndex(str(directory), **kwargs)
+    index.add_many({"job_id": job_id, "job_description": text} for job_id, text in postings.items())
+    return index
+
+
+def test_top_k_ranks_by_skill_overlap(tmp_path):
+    results = build_index(tmp_path).search(RESUME, k=3)
+
+    assert [result["job_id"] for result in results] == ["fullstack", "payments", "frontend"]
+    assert results[0]["matched_skills"] == ["Python", "React", "Docker", "AWS"]
+
+
+def test_incremental_add_remove_and_replace(tmp_path):
+    index = build_index(tmp_path)
+
+    assert index.remove("fullstack")
+    assert not index.remove("fullstack")
+    index.add("frontend", "Requirements:\n- Python\n- React\n- Docker\n- AWS\n- PostgreSQL", job_title="Staff Engineer")
+
+    results = index.search(RESUME, k=2)
+    assert [result["job_id"] for result in results] == ["frontend", "payments"]
+    assert results[0]["job_title"] == "Staff Engineer"
+    assert len(index) == 3
+
+
+def test_delta_log_and_compacted_segment_survive_reload(tmp_path):
+    index = build_index(tmp_path)
+    expected = index.search(RESUME, k=4)
+    index.close()
+
+    # Uncompacted: the delta log is replayed
+    reloaded = JobIndex(str(tmp_path))
+    assert reloaded.search(RESUME, k=4) == expected
+
+    reloaded.compact()
+    reloaded.remove("data")
+    reloaded.close()
+
+    # Compacted segment (memory-mapped) plus one pending removal
+    compacted = JobIndex(str(tmp_path))
+    assert compacted.stats()["segment_jobs"] == 4
+    assert [result["job_id"] for result in compacted.search(RESUME, k=4)] == [
+        result["job_id"] for result in expected if result["job_id"] != "data"
+    ]
+    assert compacted.get("payments")["job_description"] == POSTINGS["payments"]
+    compacted.close()
+
+
+def test_large_corpus_search_is_fast(tmp_path):
+    index = JobIndex(str(tmp_path), compact_threshold=10**9)
+    index.add_many(synthetic_postings(5_000))
+    index.compact()
+    index.close()
+
+    started = time.perf_counter()
+    loaded = JobIndex(str(tmp_path))
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    results = loaded.search(RESUME, k=20)
+    search_seconds = time.perf_counter() - started
+
+    assert len(results) == 20
+    assert load_seconds < 1
+    assert search_seconds < 0.25
+    loaded.close()
+
+
+def test_match_endpoint_sends_only_top_k_to_llm(tmp_path, monkeypatch):
+    calls = []
+
+    class Completions:
+        async def create(self, **kwargs):
+            calls.append(kwargs)
+            message = SimpleNamespace(content="{}")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=Completions()))
+    monkeypatch.setattr(llm_cache, "enabled", False)
+    monkeypatch.setattr(main.resume_analyzer, "gateway", LLMGateway(client=client))
+    monkeypatch.setattr(main.job_matcher, "gateway", LLMGateway(client=client))
+    monkeypatch.setattr(main, "job_index", build_index(tmp_path))
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            files = {"resume": ("resume.txt", RESUME.encode(), "text/plain")}
+            search = await http.post("/api/jobs/search", files=files, data={"k": "2"})
+            match = await http.post("/api/jobs/match", files=files, data={"k": "2"})
+            return search, match
+
+    search, match = asyncio.run(scenario())
+
+    assert [result["job_id"] for result in search.json()["results"]] == ["fullstack", "payments"]
+    matched = [line for line in match.text.splitlines() if '"type": "match"' in line]
+    assert len(matched) == 2
+    assert all('"job_id": "fullstack"' in line or '"job_id": "payments"' in line for line in matched)
+    # One resume analysis plus one match per top-k job
+    assert len(calls) == 3
+
+
+def run_benchmark(directory: str = "job_index_benchmark", count: int = 20_000):
+    print("🧪 Job index")
+    print("=" * 50)
+    index = JobIndex(directory, compact_threshold=10**9)
+    started = time.perf_counter()
+    index.add_many(synthetic_postings(count))
+    index.compact()
+    print(f"Build + compact {count:,} postings: {time.perf_counter() - started:>8.2f} s")
+    index.close()
+
+    started = time.perf_counter()
+    index = JobIndex(directory)
+    print(f"Load (memory-mapped):            {(time.perf_counter() - started) * 1000:>8.1f} ms")
+    timings = []
+    for _ in range(20):
+        started = time.perf_counter()
+        index.search(RESUME, k=20)
+        timings.append(time.perf_counter() - started)
+    print(f"Top-20 search (best of 20):      {min(timings) * 1000:>8.1f} ms")
+    index.close()
+
+
+if __name__ == "__main__":
+    run_benchmark()
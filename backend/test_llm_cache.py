@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tests for the LLM response cache (offline, no OpenAI key required)
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+from openai.types.chat import ChatCompletion
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.llm_cache import ENDPOINT_TTLS, LLMCache
+
+
+def make_completion(content: str, model: str = "gpt-4") -> ChatCompletion:
+    return ChatCompletion.model_validate({
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": content}
+        }]
+    })
+
+
+class CountingClient:
+    """Fake OpenAI client that answers with the prompt and counts upstream calls"""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **params):
+        self.calls += 1
+        return make_completion(f"answer to {params['messages'][-1]['content']}", params["model"])
+
+
+def request(prompt: str, **overrides):
+    params = {
+        "model": "gpt-4",
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": 100,
+        "temperature": 0.6
+    }
+    params.update(overrides)
+    return params
+
+
+def test_repeated_prompt_is_served_from_memory(tmp_path):
+    cache = LLMCache(cache_dir=str(tmp_path))
+    client = CountingClient()
+
+    async def scenario():
+        first = await cache.create(client, endpoint="career_advice", **request("advice"))
+        second = await cache.create(client, endpoint="career_advice", **request("advice"))
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert client.calls == 1
+    assert second.choices[0].message.content == first.choices[0].message.content
+    stats = cache.stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["endpoints"]["career_advice"] == {"hits": 1, "misses": 1, "bypassed": 0, "coalesced": 0}
+
+
+def test_key_covers_model_temperature_and_max_tokens():
+    base = LLMCache.make_key(request("same"))
+    assert LLMCache.make_key(request("same")) == base
+    assert LLMCache.make_key(request("same", model="gpt-3.5-turbo")) != base
+    assert LLMCache.make_key(request("same", temperature=0.7)) != base
+    assert LLMCache.make_key(request("same", max_tokens=101)) != base
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    client = CountingClient()
+    asyncio.run(LLMCache(cache_dir=str(tmp_path)).create(client, endpoint="career_advice", **request("advice")))
+
+    restarted = LLMCache(cache_dir=str(tmp_path))
+    response = asyncio.run(restarted.create(client, endpoint="career_advice", **request("advice")))
+
+    assert client.calls == 1
+    assert response.choices[0].message.content == "answer to advice"
+    assert restarted.stats()["disk_hits"] == 1
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LLMCache(max_entries=2, cache_dir="")
+    client = CountingClient()
+
+    async def scenario():
+        await cache.create(client, endpoint="career_advice", **request("a"))
+        await cache.create(client, endpoint="career_advice", **request("b"))
+        await cache.create(client, endpoint="career_advice", **request("a"))
+        await cache.create(client, endpoint="career_advice", **request("c"))
+        await cache.create(client, endpoint="career_advice", **request("a"))
+        await cache.create(client, endpoint="career_advice", **request("b"))
+
+    asyncio.run(scenario())
+
+    # a, b, c are fetched once each; "b" was evicted by "c" and fetched again
+    assert client.calls == 4
+    assert cache.stats()["evictions"] == 2
+
+
+def test_expired_entries_are_refetched(tmp_path, monkeypatch):
+    monkeypatch.setitem(ENDPOINT_TTLS, "career_advice", -1)
+    cache = LLMCache(cache_dir=str(tmp_path))
+    client = CountingClient()
+
+    async def scenario():
+        await cache.create(client, endpoint="career_advice", **request("advice"))
+        await cache.create(client, endpoint="career_advice", **request("advice"))
+
+    asyncio.run(scenario())
+
+    assert client.calls == 2
+
+
+def test_disk_tier_is_capped_and_swept(tmp_path, monkeypatch):
+    cache = LLMCache(cache_dir=str(tmp_path), max_disk_bytes=2000)
+    client = CountingClient()
+
+    async def scenario():
+        monkeypatch.setitem(ENDPOINT_TTLS, "career_advice", -1)
+        await cache.create(client, endpoint="career_advice", **request("expired"))
+        monkeypatch.setitem(ENDPOINT_TTLS, "career_advice", 3600)
+        for index in range(20):
+            await cache.create(client, endpoint="career_advice", **request(f"advice {index}"))
+
+    asyncio.run(scenario())
+
+    files = list(tmp_path.glob("*/*.json"))
+    assert sum(path.stat().st_size for path in files) <= 2000
+    assert 0 < len(files) < 20
+    assert cache.stats()["disk_evictions"] > 0
+    # The expired entry was swept without ever being read again
+    assert cache._disk_path(LLMCache.make_key(request("expired"))) not in files
+    # The newest entries are kept
+    assert cache._disk_path(LLMCache.make_key(request("advice 19"))) in files
+
+
+def test_opt_out_always_calls_upstream(tmp_path):
+    cache = LLMCache(cache_dir=str(tmp_path))
+    client = CountingClient()
+
+    async def scenario():
+        for _ in range(3):
+            await cache.create(client, endpoint="optimized_resume", use_cache=False, **request("resume"))
+
+    asyncio.run(scenario())
+
+    assert client.calls == 3
+    assert cache.stats()["bypassed"] == 3
+    assert not any(tmp_path.iterdir())
+
+
+if __name__ == "__main__":
+    import pytest
+
+    sys.exit(pytest.main([__file__, "-q"]))
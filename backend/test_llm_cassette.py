@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Tests and benchmark for the record/replay LLM cassette (offline, no OpenAI key required)
+
+Run directly (python test_llm_cassette.py) to measure how many uploads per second the
+full /api/upload pipeline handles when every LLM call is replayed from a cassette.
+"""
+
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import main
+from services.combined_analysis import CombinedAnalyzer
+from services.llm_cache import LLMCache
+from services.llm_cassette import Cassette, CassetteMissError, latency_model
+from services.llm_gateway import LLMGateway
+from test_combined_analysis import ANALYSIS, MATCHING, RECOMMENDATIONS, EndpointCompletions, _upload
+from test_llm_gateway import MESSAGES, _run, fake_server, make_gateway
+from test_prompt_context import JOB_DESCRIPTION, long_resume
+from test_streaming import TOKENS, make_chunk
+
+USAGE = {"prompt_tokens": 12, "completion_tokens": 4, "total_tokens": 16}
+UPLOAD_ANSWERS = {"resume_analysis": ANALYSIS, "job_matching": MATCHING, "recommendations": RECOMMENDATIONS}
+
+
+class UsageCompletions:
+    """Fake `chat.completions` that reports usage, streamed as a final chunk without choices"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, stream=False, stream_options=None, **params):
+        self.calls += 1
+        self.stream_options = stream_options
+        if not stream:
+            return ChatCompletion.model_validate({
+                "id": "chatcmpl-usage",
+                "object": "chat.completion",
+                "created": 0,
+                "model": params["model"],
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "".join(TOKENS)}}],
+                "usage": USAGE
+            })
+        return self._chunks(bool((stream_options or {}).get("include_usage")))
+
+    async def _chunks(self, include_usage: bool):
+        for token in TOKENS:
+            await asyncio.sleep(0.05)
+            yield make_chunk(token)
+        yield make_chunk(finish_reason="stop")
+        if not include_usage:
+            # Like the OpenAI API, usage is only streamed on request
+            return
+        yield ChatCompletionChunk.model_validate({
+            "id": "chatcmpl-stream-test", "object": "chat.completion.chunk", "created": 0, "model": "gpt-4",
+            "choices": [], "usage": USAGE
+        })
+
+
+def usage(recorded: dict) -> dict:
+    return {name: recorded[name] for name in USAGE}
+
+
+class CompletionEndpoints(EndpointCompletions):
+    """`EndpointCompletions` answering with real ChatCompletion objects, as the OpenAI client does"""
+
+    async def create(self, **params):
+        response = await super().create(**params)
+        return ChatCompletion.model_validate({
+            "id": "chatcmpl-upload",
+            "object": "chat.completion",
+            "created": 0,
+            "model": params["model"],
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": response.choices[0].message.content}}]
+        })
+
+
+def offline_client():
+    """A client that must never be called: replay answers everything"""
+    return SimpleNamespace(chat=SimpleNamespace(completions=None))
+
+
+def replay_gateway(path, latency=None) -> LLMGateway:
+    return LLMGateway(
+        client=offline_client(),
+        cache=LLMCache(cache_dir="", enabled=False, coalesce=False),
+        cassette=Cassette(str(path), "replay", latency)
+    )
+
+
+def use_gateway(monkeypatch, gateway: LLMGateway):
+    monkeypatch.setattr(main.resume_analyzer, "gateway", gateway)
+    monkeypatch.setattr(main.job_matcher, "gateway", gateway)
+    monkeypatch.setattr(main, "combined_analyzer", CombinedAnalyzer(main.resume_analyzer, main.job_matcher, gateway))
+
+
+def test_calls_are_recorded_and_replayed_without_the_server(fake_server, tmp_path):
+    path = tmp_path / "cassette.jsonl"
+    recorder = make_gateway(fake_server, cassette=Cassette(str(path), "record"))
+
+    async def record():
+        await recorder.create(endpoint="career_advice", messages=MESSAGES)
+        await recorder.create(endpoint="job_matching", messages=MESSAGES)
+
+    _run(recorder, record)
+    entries = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [entry["request"]["max_tokens"] for entry in entries] == [600, 1500]
+    assert entries[0]["response"]["choices"][0]["message"]["content"] == "ok"
+    assert "timeout" not in entries[0]["request"]
+
+    player = replay_gateway(path)
+    spaced = [{"role": "user", "content": "  career\n advice "}]
+
+    async def replay():
+        response = await player.create(endpoint="career_advice", messages=spaced)
+        with pytest.raises(CassetteMissError):
+            await player.create(endpoint="career_advice", messages=[{"role": "user", "content": "something new"}])
+        return response
+
+    response = _run(player, replay)
+
+    assert response.choices[0].message.content == "ok"
+    assert len(fake_server.requests) == 2
+    assert player.stats()["cassette"] == {
+        "mode": "replay", "path": str(path), "requests": 2, "recorded": 0, "replayed": 1, "misses": 1
+    }
+
+
+def test_streams_keep_their_chunks_usage_and_timing(tmp_path):
+    path = tmp_path / "cassette.jsonl"
+    inner = UsageCompletions()
+    recorder = LLMGateway(
+        client=SimpleNamespace(chat=SimpleNamespace(completions=inner)),
+        cache=LLMCache(cache_dir="", enabled=False, coalesce=False),
+        cassette=Cassette(str(path), "record")
+    )
+
+    async def stream(gateway):
+        started = time.monotonic()
+        parts = [text async for text in gateway.stream(endpoint="career_advice", messages=MESSAGES)]
+        return "".join(parts), time.monotonic() - started
+
+    text, _ = _run(recorder, lambda: stream(recorder))
+    _run(recorder, lambda: recorder.create(endpoint="job_matching", messages=MESSAGES))
+    assert text == "".join(TOKENS)
+    streamed, plain = [json.loads(line) for line in path.read_text().splitlines()]
+    assert streamed["request"]["stream_options"] == {"include_usage": True}
+    assert usage(streamed["chunks"][-1]["usage"]) == USAGE
+    assert len(streamed["offsets"]) == len(TOKENS) + 2
+    assert usage(plain["response"]["usage"]) == USAGE
+
+    fast = replay_gateway(path)
+    text, elapsed = _run(fast, lambda: stream(fast))
+    assert text == "".join(TOKENS)
+    assert elapsed < 0.1
+
+    timed = replay_gateway(path, latency="recorded")
+    text, elapsed = _run(timed, lambda: stream(timed))
+    assert text == "".join(TOKENS)
+    assert elapsed >= streamed["latency"] * 0.9
+
+    # A streamed recording answers a plain call, and a plain recording a streamed one
+    response = _run(fast, lambda: fast.create(endpoint="career_advice", messages=MESSAGES))
+    assert response.choices[0].message.content == "".join(TOKENS)
+    assert response.usage.total_tokens == USAGE["total_tokens"]
+    text, _ = _run(fast, lambda: stream_endpoint(fast, "job_matching"))
+    assert text == "".join(TOKENS)
+    assert inner.calls == 2
+
+
+async def stream_endpoint(gateway, endpoint):
+    parts = [text async for text in gateway.stream(endpoint=endpoint, messages=MESSAGES)]
+    return "".join(parts), None
+
+
+def test_latency_models():
+    assert latency_model(None) is None
+    assert latency_model("none") is None
+    assert latency_model("recorded")(1.5) == 1.5
+    assert latency_model("fixed:0.25")(9) == 0.25
+    samples = [latency_model("uniform:0.2,0.4", seed=1)(0) for _ in range(50)]
+    assert all(0.2 <= sample <= 0.4 for sample in samples)
+    lognormal = latency_model("lognormal:0.8,0.5", seed=1)
+    assert sorted(lognormal(0) for _ in range(101))[50] == pytest.approx(0.8, rel=0.3)
+    with pytest.raises(ValueError):
+        latency_model("gamma:1")
+
+
+def record_uploads(path, monkeypatch):
+    """Record one upload's LLM calls (separate and combined) against canned answers"""
+    gateway = LLMGateway(client=None, cache=LLMCache(cache_dir="", enabled=False, coalesce=False))
+    completions = CompletionEndpoints(gateway.settings, {**UPLOAD_ANSWERS, "combined_analysis": UPLOAD_ANSWERS})
+    gateway.client = Cassette(str(path), "record").wrap(SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    use_gateway(monkeypatch, gateway)
+    results = [_upload(long_resume(), combined=False), _upload(long_resume(), combined=True)]
+    return completions, results
+
+
+def test_upload_pipeline_replays_hermetically(tmp_path, monkeypatch):
+    path = tmp_path / "uploads.jsonl"
+    completions, recorded = record_uploads(path, monkeypatch)
+    assert sorted(completions.calls) == ["combined_analysis", "job_matching", "recommendations", "resume_analysis"]
+
+    use_gateway(monkeypatch, replay_gateway(path))
+    replayed = [_upload(long_resume(), combined=False), _upload(long_resume(), combined=True)]
+
+    assert replayed == recorded
+    assert not replayed[0]["degraded"]
+    assert len(completions.calls) == 4
+
+
+def run_benchmark(uploads: int = 2000, concurrency: int = 50):
+    class Patch:
+        """Enough of pytest's monkeypatch to swap the upload gateway outside pytest"""
+
+        def setattr(self, target, name, value):
+            setattr(target, name, value)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "uploads.jsonl"
+        record_uploads(path, Patch())
+        gateway = replay_gateway(path)
+        use_gateway(Patch(), gateway)
+
+        async def scenario():
+            transport = httpx.ASGITransport(app=main.app)
+            semaphore = asyncio.Semaphore(concurrency)
+            resume = long_resume().encode()
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                async def upload():
+                    async with semaphore:
+                        response = await client.post(
+                            "/api/upload",
+                            files={"resume": ("resume.txt", resume, "text/plain")},
+                            data={"job_title": "Engineer", "company": "Acme", "job_description": JOB_DESCRIPTION},
+                        )
+                        assert response.status_code == 200 and not response.json()["degraded"]
+
+                started = time.perf_counter()
+                await asyncio.gather(*(upload() for _ in range(uploads)))
+                return time.perf_counter() - started
+
+        elapsed = asyncio.run(scenario())
+        calls = gateway.stats()["cassette"]["replayed"]
+        print(f"{uploads} uploads replayed in {elapsed:.2f}s: {uploads / elapsed:,.0f} uploads/s, {calls / elapsed:,.0f} LLM calls/s")
+
+
+if __name__ == "__main__":
+    run_benchmark()
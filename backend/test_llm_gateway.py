@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Tests for the LLM gateway against a local fake OpenAI server (offline, no OpenAI key required)
+"""
+
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import openai
+import pytest
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.llm_cache import LLMCache
+from services.llm_gateway import LLMGateway
+
+MESSAGES = [{"role": "user", "content": "career advice"}]
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        try:
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        except ValueError:
+            # The client went away before sending the whole body
+            self.close_connection = True
+            return
+        server.requests.append(body)
+        server.connections.add(self.client_address)
+
+        status = server.statuses.pop(0) if server.statuses else 200
+        # A callable delay gets the request's index, to inject latency into chosen requests
+        time.sleep(server.delay(len(server.requests) - 1) if callable(server.delay) else server.delay)
+        if status == 200:
+            payload = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}]
+            }
+        else:
+            payload = {"error": {"message": f"fake {status}", "type": "server_error"}}
+
+        data = json.dumps(payload).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in server.headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client cancelled the call (deadline, disconnect or a losing hedge)
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fake_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAIHandler)
+    server.daemon_threads = True
+    server.requests, server.connections, server.statuses, server.delay = [], set(), [], 0
+    server.headers = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    return server
+
+
+@pytest.fixture
+def fake_server():
+    server = start_fake_server()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_gateway(server, **kwargs) -> LLMGateway:
+    kwargs.setdefault("backoff_base", 0.01)
+    return LLMGateway(base_url=server.base_url, cache=LLMCache(cache_dir="", enabled=False, coalesce=False), **kwargs)
+
+
+def _run(gateway: LLMGateway, scenario):
+    async def wrapper():
+        try:
+            return await scenario()
+        finally:
+            await gateway.aclose()
+
+    return asyncio.run(wrapper())
+
+
+def test_calls_reuse_one_keep_alive_connection(fake_server):
+    gateway = make_gateway(fake_server)
+
+    async def scenario():
+        for endpoint in ["resume_analysis", "job_matching", "recommendations", "career_advice"] * 5:
+            await gateway.create(endpoint=endpoint, messages=MESSAGES)
+
+    _run(gateway, scenario)
+
+    assert len(fake_server.requests) == 20
+    assert len(fake_server.connections) == 1
+
+
+def test_models_and_parameters_come_from_configuration(fake_server, monkeypatch):
+    monkeypatch.setenv("LLM_CAREER_ADVICE_MODEL", "gpt-4o-mini")
+    monkeypatch.setenv("LLM_CAREER_ADVICE_MAX_TOKENS", "321")
+    gateway = make_gateway(fake_server)
+
+    async def scenario():
+        await gateway.create(endpoint="resume_analysis", messages=MESSAGES)
+        await gateway.create(endpoint="career_advice", messages=MESSAGES)
+        await gateway.create(endpoint="career_advice", messages=MESSAGES, temperature=0)
+
+    _run(gateway, scenario)
+
+    analysis, advice, explicit = fake_server.requests
+    assert (analysis["model"], analysis["max_tokens"], analysis["temperature"]) == ("gpt-3.5-turbo", 2000, 0.3)
+    assert (advice["model"], advice["max_tokens"], advice["temperature"]) == ("gpt-4o-mini", 321, 0.7)
+    assert explicit["temperature"] == 0
+
+
+def test_rate_limits_and_server_errors_are_retried(fake_server):
+    fake_server.statuses = [429, 503]
+    gateway = make_gateway(fake_server, max_retries=3)
+
+    response = _run(gateway, lambda: gateway.create(endpoint="career_advice", messages=MESSAGES))
+
+    assert response.choices[0].message.content == "ok"
+    assert len(fake_server.requests) == 3
+    stats = gateway.stats()
+    assert (stats["requests"], stats["retries"], stats["failures"]) == (3, 2, 0)
+    # One logical call, however many attempts it took
+    assert stats["prompt_tokens"]["career_advice"]["calls"] == 1
+
+
+def test_retries_are_bounded_and_client_errors_are_not_retried(fake_server):
+    fake_server.statuses = [500] * 10
+    gateway = make_gateway(fake_server, max_retries=2)
+
+    with pytest.raises(openai.InternalServerError):
+        _run(gateway, lambda: gateway.create(endpoint="career_advice", messages=MESSAGES))
+    assert len(fake_server.requests) == 3
+
+    fake_server.statuses = [400]
+    gateway = make_gateway(fake_server, max_retries=2)
+    with pytest.raises(openai.BadRequestError):
+        _run(gateway, lambda: gateway.create(endpoint="career_advice", messages=MESSAGES))
+    assert len(fake_server.requests) == 4
+
+
+def test_endpoint_timeout_is_enforced(fake_server, monkeypatch):
+    monkeypatch.setenv("LLM_CAREER_ADVICE_TIMEOUT", "0.2")
+    fake_server.delay = 1
+    gateway = make_gateway(fake_server, max_retries=0)
+
+    started = time.perf_counter()
+    with pytest.raises(openai.APITimeoutError):
+        _run(gateway, lambda: gateway.create(endpoint="career_advice", messages=MESSAGES))
+
+    assert time.perf_counter() - started < 0.9
+
+
+def test_backoff_grows_exponentially_with_jitter():
+    gateway = LLMGateway(client=object(), backoff_base=0.5, backoff_max=4)
+    delays = [[gateway._backoff(attempt, RuntimeError()) for _ in range(200)] for attempt in range(5)]
+
+    assert all(0 <= delay <= min(4, 0.5 * 2 ** attempt) for attempt, row in enumerate(delays) for delay in row)
+    # Jittered: retries from one burst are spread out rather than synchronized
+    assert len(set(delays[2])) > 100
+    assert max(delays[4]) > max(delays[0])
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for LLM backends and size/endpoint-aware model routing (offline, no OpenAI key required)
+"""
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.llm_backends import BACKEND_TYPES, LLMBackend
+from services.llm_cache import LLMCache
+from services.llm_gateway import LLMGateway
+from services.llm_routing import Route, RoutingTable
+from test_llm_cache import make_completion
+from test_llm_gateway import MESSAGES, _run, fake_server, make_gateway, start_fake_server
+
+LONG_MESSAGES = [{"role": "user", "content": "Rewrite this resume section. " + "Led platform migrations. " * 400}]
+
+
+def write_routes(tmp_path, routes, backends=None) -> str:
+    path = tmp_path / "llm_routes.json"
+    path.write_text(json.dumps({"version": 1, "backends": backends, "routes": routes}))
+    return str(path)
+
+
+def test_default_table_sends_small_rewrites_to_the_faster_model(fake_server, monkeypatch):
+    gateway = make_gateway(fake_server)
+
+    async def scenario():
+        await gateway.create(endpoint="resume_suggestions", messages=MESSAGES)
+        await gateway.create(endpoint="resume_suggestions", messages=LONG_MESSAGES)
+        await gateway.create(endpoint="optimized_resume", messages=MESSAGES)
+        await gateway.create(endpoint="optimized_resume", messages=LONG_MESSAGES)
+        await gateway.create(endpoint="resume_suggestions", messages=MESSAGES, model="gpt-4o")
+
+    _run(gateway, scenario)
+
+    assert [request["model"] for request in fake_server.requests] == ["gpt-3.5-turbo", "gpt-4", "gpt-3.5-turbo", "gpt-4", "gpt-4o"]
+    routes = gateway.stats()["routes"]
+    assert set(routes["resume_suggestions"]) == {
+        "short-section-rewrite: openai/gpt-3.5-turbo", "default: openai/gpt-4", "default: openai/gpt-4o"
+    }
+    assert set(routes["optimized_resume"]) == {
+        "short-section-generation: openai/gpt-3.5-turbo", "full-resume-generation: openai/gpt-4"
+    }
+
+
+def test_model_pinned_by_configuration_is_not_rerouted(fake_server, monkeypatch):
+    monkeypatch.setenv("LLM_RESUME_SUGGESTIONS_MODEL", "gpt-4o-mini")
+    gateway = make_gateway(fake_server)
+
+    _run(gateway, lambda: gateway.create(endpoint="resume_suggestions", messages=MESSAGES))
+
+    assert fake_server.requests[0]["model"] == "gpt-4o-mini"
+
+
+def test_routes_can_send_calls_to_a_local_openai_compatible_server(fake_server, tmp_path, monkeypatch):
+    local = start_fake_server()
+    monkeypatch.setenv("LLM_ROUTES_PATH", write_routes(tmp_path, [
+        {"name": "small-to-local", "endpoints": ["career_advice"], "max_input_tokens": 100, "backend": "local", "model": "llama3"}
+    ], backends={
+        "openai": {"type": "openai"},
+        "local": {"type": "openai", "base_url": local.base_url, "api_key": "unused"}
+    }))
+    gateway = make_gateway(fake_server)
+
+    async def scenario():
+        await gateway.create(endpoint="career_advice", messages=MESSAGES)
+        await gateway.create(endpoint="career_advice", messages=LONG_MESSAGES)
+
+    try:
+        _run(gateway, scenario)
+    finally:
+        local.shutdown()
+        local.server_close()
+
+    assert [request["model"] for request in local.requests] == ["llama3"]
+    assert [request["model"] for request in fake_server.requests] == ["gpt-4"]
+    assert "backend" not in local.requests[0]
+
+
+def test_backend_types_are_pluggable(tmp_path, monkeypatch, capsys):
+    calls = []
+
+    async def create(**params):
+        calls.append(params)
+        return make_completion("canned", params["model"])
+
+    monkeypatch.setitem(BACKEND_TYPES, "canned", lambda name, **settings: LLMBackend(name, SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )))
+    monkeypatch.setenv("LLM_ROUTE_LOG", "True")
+    monkeypatch.setenv("LLM_ROUTES_PATH", write_routes(tmp_path, [
+        {"name": "everything", "backend": "canned"}
+    ], backends={"openai": {"type": "openai"}, "canned": {"type": "canned"}}))
+    gateway = LLMGateway(cache=LLMCache(cache_dir="", enabled=True))
+
+    async def scenario():
+        first = await gateway.create(endpoint="career_advice", messages=MESSAGES)
+        second = await gateway.create(endpoint="career_advice", messages=MESSAGES)
+        return first, second
+
+    first, second = _run(gateway, scenario)
+
+    assert first.choices[0].message.content == second.choices[0].message.content == "canned"
+    # The second answer came from the cache
+    assert len(calls) == 1
+    assert "backend" not in calls[0]
+    assert "LLM route endpoint=career_advice route=everything: canned/gpt-4" in capsys.readouterr().out
+
+
+def test_table_rejects_routes_to_unknown_backends():
+    with pytest.raises(ValueError, match="unknown backend 'local'"):
+        RoutingTable(routes=[Route("small", (), 0, 100, "local", "llama3")])
+
+    table = RoutingTable(routes=[Route("small", ("career_advice",), 10, 100, None, "gpt-3.5-turbo")])
+    assert table.route("career_advice", 50).name == "small"
+    assert table.route("career_advice", 5) is None
+    assert table.route("career_advice", 500) is None
+    assert table.route("job_matching", 50) is None
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for the progressive upload response (offline, no OpenAI key required)
+"""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import main
+from test_combined_analysis import ANALYSIS, MATCHING, RECOMMENDATIONS, install
+from test_deadlines import install_slow
+from test_prompt_context import JOB_DESCRIPTION, long_resume
+
+
+def _stream_upload(combined: bool = False, headers: dict = None):
+    """POST a progressive upload straight to the app; returns its events, each with the seconds it was sent after"""
+    upload = httpx.Request(
+        "POST",
+        "http://test/api/upload",
+        files={"resume": ("resume.txt", long_resume().encode(), "text/plain")},
+        data={
+            "job_title": "Engineer",
+            "company": "Acme",
+            "job_description": JOB_DESCRIPTION,
+            "combined": str(combined).lower(),
+            "progressive": "true",
+        },
+        headers=headers or {},
+    )
+    body = upload.read()
+    # httpx's ASGI transport buffers the whole body, so the events are timed as the app sends them
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/api/upload", "raw_path": b"/api/upload", "query_string": b"",
+        "root_path": "", "server": ("test", 80), "client": ("127.0.0.1", 1234),
+        "headers": [(name.lower(), value) for name, value in upload.headers.raw],
+    }
+    events = []
+
+    async def scenario():
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+        started = time.monotonic()
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            # The client stays connected
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                assert message["status"] == 200
+                assert dict(message["headers"])[b"content-type"] == b"application/x-ndjson"
+            elif message["type"] == "http.response.body":
+                for line in message.get("body", b"").decode().splitlines():
+                    if line:
+                        events.append((json.loads(line), time.monotonic() - started))
+
+        await main.app(scope, receive, send)
+
+    asyncio.run(scenario())
+    return events
+
+
+def test_local_analysis_arrives_first_and_each_llm_section_replaces_it(monkeypatch):
+    slow, _ = install_slow(monkeypatch, {"recommendations": 0.2, "job_matching": 0.4, "resume_analysis": 0.6})
+
+    events = _stream_upload()
+
+    provisional, first_at = events[0]
+    assert provisional["type"] == "provisional"
+    assert set(provisional) >= {"resume_analysis", "job_matching", "recommendations", "originalResume"}
+    assert provisional["job_matching"]["match_percentage"] != MATCHING["match_percentage"]
+    assert first_at < 0.2
+
+    sections = events[1:-1]
+    assert [event["section"] for event, _ in sections] == ["recommendations", "job_matching", "resume_analysis"]
+    assert sections[1][0]["job_matching"]["match_percentage"] == MATCHING["match_percentage"]
+    assert sections[2][0]["resume_analysis"]["summary"] == ANALYSIS["summary"]
+    assert sections[0][0]["recommendations"] == RECOMMENDATIONS
+    assert not any(event["degraded"] for event, _ in sections)
+    assert sections[0][1] < sections[2][1]
+
+    assert events[-1][0] == {"type": "done", "degraded": False, "degraded_sections": []}
+    assert sorted(slow.finished) == ["job_matching", "recommendations", "resume_analysis"]
+
+
+def test_failed_section_keeps_the_local_answer_and_is_reported_degraded(monkeypatch):
+    slow, _ = install_slow(monkeypatch, {})
+    slow.answers["job_matching"] = RuntimeError("upstream down")
+
+    events = [event for event, _ in _stream_upload()]
+
+    matching = next(event for event in events if event.get("section") == "job_matching")
+    assert matching["degraded"] is True
+    assert matching["job_matching"] == events[0]["job_matching"]
+    assert events[-1] == {"type": "done", "degraded": True, "degraded_sections": ["job_matching"]}
+
+
+def test_section_past_the_deadline_keeps_the_local_answer_and_is_reported_degraded(monkeypatch):
+    slow, _ = install_slow(monkeypatch, {"job_matching": 5})
+
+    events = _stream_upload(headers={"X-Request-Deadline": "0.5"})
+
+    matching, matching_at = next((event, at) for event, at in events if event.get("section") == "job_matching")
+    assert matching["degraded"] is True
+    assert matching["job_matching"] == events[0][0]["job_matching"]
+    assert matching_at < 1.5
+    assert not next(event for event, _ in events if event.get("section") == "resume_analysis")["degraded"]
+    assert events[-1][0] == {"type": "done", "degraded": True, "degraded_sections": ["job_matching"]}
+    assert "job_matching" not in slow.finished
+
+
+def test_combined_mode_upgrades_all_sections_from_one_call(monkeypatch):
+    completions, _ = install(monkeypatch, {
+        "resume_analysis": ANALYSIS,
+        "job_matching": MATCHING,
+        "recommendations": RECOMMENDATIONS,
+    })
+
+    events = [event for event, _ in _stream_upload(combined=True)]
+
+    assert completions.calls == ["combined_analysis"]
+    assert [event["type"] for event in events] == ["provisional", "section", "section", "section", "done"]
+    assert events[2]["job_matching"]["match_percentage"] == MATCHING["match_percentage"]
+    assert events[-1]["degraded"] is False
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
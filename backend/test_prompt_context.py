@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Tests for the token-budgeted prompt context (offline, no OpenAI key required)
+
+Run directly (python test_prompt_context.py) to compare prompt sizes with the old full-text prompts.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import main
+from services.job_matcher import JobMatcher
+from services.llm_cache import LLMCache
+from services.llm_gateway import LLMGateway
+from services.prompt_context import OMITTED_MARKER, PromptContext, context_budget, estimate_tokens
+from services.resume_analyzer import ResumeAnalyzer
+
+SHORT_RESUME = """Jane Doe
+jane@example.com
+SKILLS
+Python, React, AWS"""
+
+JOB_DESCRIPTION = """Senior Platform Engineer
+Requirements:
+- Python
+- Kubernetes
+- AWS
+Nice to have
+- Terraform
+About us
+We are a friendly team that values kindness, curiosity and good coffee.
+Our office has plants, a ping-pong table and a library of board games."""
+
+FILLER = [
+    "Organised the quarterly offsite and coordinated catering for forty colleagues.",
+    "Mentored interns on presentation skills and wrote onboarding guides for the office.",
+    "Represented the company at regional career fairs and community meetups.",
+    "Maintained the shared calendar and booked meeting rooms for leadership.",
+]
+
+
+def long_resume(bullets: int = 60) -> str:
+    lines = ["John Smith", "john@example.com", "EXPERIENCE", "Operations Lead at Acme, 2015 - Present"]
+    lines += [f"- {FILLER[number % len(FILLER)]}" for number in range(bullets)]
+    lines += ["- Migrated billing services to Kubernetes on AWS, cutting costs 30%", "SKILLS", "Python, Kubernetes, Terraform, AWS, React"]
+    return "\n".join(lines)
+
+
+class RecordingCompletions:
+    def __init__(self):
+        self.prompts = {}
+
+    async def create(self, **params):
+        self.prompts[params["max_tokens"]] = params["messages"][-1]["content"]
+        message = SimpleNamespace(content="{}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def test_short_texts_are_passed_through_unchanged():
+    context = PromptContext(SHORT_RESUME, JOB_DESCRIPTION)
+
+    assert context.resume_digest(context_budget("resume_analysis", "resume")) == SHORT_RESUME
+    assert context.job_digest(context_budget("job_matching", "job")) == JOB_DESCRIPTION
+
+
+def test_digest_keeps_the_skills_section_within_budget():
+    resume = long_resume()
+    budget = context_budget("recommendations", "resume")
+    assert "SKILLS" not in resume[:1000]
+
+    digest = PromptContext(resume, JOB_DESCRIPTION).resume_digest(budget)
+
+    assert estimate_tokens(digest) <= budget < estimate_tokens(resume)
+    assert "Python, Kubernetes, Terraform, AWS, React" in digest
+    assert "Migrated billing services to Kubernetes on AWS" in digest
+    lines = digest.splitlines()
+    # Original order, name first, omissions marked once per gap
+    assert lines[0] == "John Smith"
+    assert lines.index("EXPERIENCE") < lines.index("SKILLS")
+    assert OMITTED_MARKER in lines
+    assert all(not (first == second == OMITTED_MARKER) for first, second in zip(lines, lines[1:]))
+
+
+def test_job_digest_favours_what_the_resume_covers():
+    digest = PromptContext(long_resume(), JOB_DESCRIPTION).job_digest(40)
+
+    assert estimate_tokens(digest) <= 40
+    assert "- Kubernetes" in digest
+    assert "ping-pong" not in digest
+
+
+def test_wall_of_text_is_split_into_sentences():
+    resume = " ".join(FILLER * 15) + " Built Python and Kubernetes tooling on AWS."
+    assert "\n" not in resume
+
+    digest = PromptContext(resume, JOB_DESCRIPTION).resume_digest(60)
+
+    assert 0 < estimate_tokens(digest) <= 60
+    assert "Built Python and Kubernetes tooling on AWS." in digest
+
+
+def test_upload_tokenizes_once_and_caps_every_prompt(monkeypatch):
+    completions = RecordingCompletions()
+    gateway = LLMGateway(
+        client=SimpleNamespace(chat=SimpleNamespace(completions=completions)),
+        cache=LLMCache(cache_dir="", enabled=False)
+    )
+    monkeypatch.setattr(main.resume_analyzer, "gateway", gateway)
+    monkeypatch.setattr(main.job_matcher, "gateway", gateway)
+
+    built = []
+
+    class CountingContext(PromptContext):
+        def __init__(self, *args, **kwargs):
+            built.append(args)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(main, "PromptContext", CountingContext)
+    resume = long_resume(300)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(
+                "/api/upload",
+                files={"resume": ("resume.txt", resume.encode(), "text/plain")},
+                data={"job_title": "Engineer", "company": "Acme", "job_description": JOB_DESCRIPTION},
+            )
+
+    response = asyncio.run(scenario())
+
+    assert response.status_code == 200
+    assert len(built) == 1
+    assert len(completions.prompts) == 3
+    stats = gateway.stats()["prompt_tokens"]
+    for endpoint in ["resume_analysis", "job_matching", "recommendations"]:
+        assert stats[endpoint]["calls"] == 1
+        # Prompt template plus capped excerpts, far below the full resume
+        assert stats[endpoint]["last"] < context_budget(endpoint, "resume") + context_budget(endpoint, "job") + 700
+        assert stats[endpoint]["last"] < estimate_tokens(resume)
+    assert all("Python, Kubernetes, Terraform, AWS, React" in prompt for prompt in completions.prompts.values())
+
+
+def run_benchmark():
+    resume = long_resume(300)
+    analyzer, matcher = ResumeAnalyzer(), JobMatcher()
+    context = PromptContext(resume, JOB_DESCRIPTION)
+    skills = matcher._extract_skills_from_text(resume), matcher._extract_skills_from_job_description(JOB_DESCRIPTION)
+
+    before = {
+        "resume_analysis": analyzer._create_resume_analysis_prompt(resume),
+        "job_matching": matcher._create_job_matching_prompt(resume, JOB_DESCRIPTION),
+        "recommendations": matcher._create_recommendations_prompt_simple(resume[:1000] + "...", JOB_DESCRIPTION[:1000] + "...", *skills),
+    }
+    after = {
+        "resume_analysis": analyzer._create_resume_analysis_prompt(
+            context.resume_digest(context_budget("resume_analysis", "resume"), job_relevance=False)
+        ),
+        "job_matching": matcher._create_job_matching_prompt(
+            context.resume_digest(context_budget("job_matching", "resume")),
+            context.job_digest(context_budget("job_matching", "job"))
+        ),
+        "recommendations": matcher._create_recommendations_prompt_simple(
+            context.resume_digest(context_budget("recommendations", "resume")),
+            context.job_digest(context_budget("recommendations", "job")),
+            *skills
+        ),
+    }
+
+    print(f"🧪 Prompt tokens for one upload ({estimate_tokens(resume):,}-token resume)")
+    print("=" * 50)
+    for endpoint in before:
+        has_skills = "SKILLS" in after[endpoint]
+        print(f"{endpoint:<18} {estimate_tokens(before[endpoint]):>7,} -> {estimate_tokens(after[endpoint]):>6,}   skills kept: {has_skills}")
+    total_before = sum(estimate_tokens(prompt) for prompt in before.values())
+    total_after = sum(estimate_tokens(prompt) for prompt in after.values())
+    print(f"{'total':<18} {total_before:>7,} -> {total_after:>6,}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
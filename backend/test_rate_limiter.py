@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for the outbound per-model rate limiter (offline, no OpenAI key required)
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.rate_limiter import RateLimiter, parse_reset
+from test_llm_gateway import MESSAGES, _run, fake_server, make_gateway  # noqa: F401 (fixture)
+
+
+@pytest.fixture
+def small_budgets(monkeypatch):
+    # 600 tokens per minute refills 10 tokens a second; tiny completions keep estimates small
+    monkeypatch.setenv("LLM_TPM_GPT_4", "600")
+    monkeypatch.setenv("LLM_CAREER_ADVICE_MAX_TOKENS", "5")
+
+
+def test_reset_headers_are_parsed():
+    assert parse_reset("1s") == 1
+    assert parse_reset("6m0s") == 360
+    assert parse_reset("120ms") == pytest.approx(0.12)
+    assert parse_reset("soon") is None
+    assert parse_reset(None) is None
+
+
+def test_models_are_budgeted_separately(small_budgets):
+    limiter = RateLimiter(enabled=True)
+
+    async def scenario():
+        await limiter.acquire("gpt-4", 600, "career_advice")
+        other = await limiter.acquire("gpt-3.5-turbo", 5, "job_matching")
+        waited = await limiter.acquire("gpt-4", 5, "career_advice")
+        return other, waited
+
+    other, waited = asyncio.run(scenario())
+
+    assert other < 0.05
+    assert 0.4 < waited < 1.0
+    queue_wait = limiter.stats()["queue_wait"]
+    assert (queue_wait["career_advice"]["calls"], queue_wait["career_advice"]["queued"]) == (2, 1)
+    assert queue_wait["job_matching"]["queued"] == 0
+
+
+def test_reported_usage_returns_unused_budget(small_budgets):
+    limiter = RateLimiter(enabled=True)
+
+    async def scenario():
+        await limiter.acquire("gpt-4", 600)
+        limiter.settle("gpt-4", 600, 100)
+        return await limiter.acquire("gpt-4", 400)
+
+    assert asyncio.run(scenario()) < 0.05
+
+
+def test_disabled_limiter_never_waits(small_budgets):
+    limiter = RateLimiter(enabled=False)
+
+    async def scenario():
+        return [await limiter.acquire("gpt-4", 600) for _ in range(3)]
+
+    assert asyncio.run(scenario()) == [0.0, 0.0, 0.0]
+    assert limiter.stats()["queue_wait"] == {}
+
+
+def test_rate_limit_headers_slow_down_later_calls(fake_server, small_budgets, monkeypatch):
+    monkeypatch.delenv("LLM_TPM_GPT_4")
+    fake_server.headers = {"x-ratelimit-limit-tokens": "600", "x-ratelimit-remaining-tokens": "0"}
+    gateway = make_gateway(fake_server)
+
+    async def scenario():
+        await gateway.create(endpoint="career_advice", messages=MESSAGES)
+        await gateway.create(endpoint="career_advice", messages=MESSAGES)
+
+    _run(gateway, scenario)
+
+    # The server said the minute's tokens were spent, so the second call waited for a refill
+    queue_wait = gateway.stats()["rate_limits"]["queue_wait"]["career_advice"]
+    assert queue_wait["queued"] == 1
+    assert queue_wait["max"] >= 0.5
+
+
+def test_429_queues_calls_until_the_limit_resets(fake_server, small_budgets):
+    fake_server.statuses = [429]
+    fake_server.headers = {"x-ratelimit-reset-requests": "600ms"}
+    gateway = make_gateway(fake_server)
+
+    async def scenario():
+        started = time.monotonic()
+        responses = await asyncio.gather(*(
+            gateway.create(endpoint="career_advice", messages=MESSAGES + [{"role": "user", "content": str(number)}])
+            for number in range(3)
+        ))
+        return responses, time.monotonic() - started
+
+    responses, elapsed = _run(gateway, scenario)
+
+    assert [response.choices[0].message.content for response in responses] == ["ok"] * 3
+    assert elapsed >= 0.5
+    stats = gateway.stats()
+    assert (stats["retries"], stats["failures"]) == (1, 0)
+    assert stats["rate_limits"]["queue_wait"]["career_advice"]["max"] >= 0.5
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
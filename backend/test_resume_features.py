@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-pass resume feature extractor behind the fallback analysis
+
+Run directly (python test_resume_features.py) to compare against the old per-feature regexes.
+"""
+
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.resume_analyzer import ResumeAnalyzer
+from services.resume_features import ACTION_VERBS, extract_resume_features
+
+SAMPLE_RESUME = """John Doe
+john.doe@example.com | (555) 123-4567 | linkedin.com/in/johndoe
+
+Summary
+Senior software engineer who led teams building Python and React platforms.
+
+Experience
+Senior Developer at Tech Corp, 2020 - Present
+- Led a team of five engineers and improved deploy times by 40%
+- Designed REST APIs serving 2M requests a day
+Developer at Web Works, 2016-2020
+- Developed and optimized SQL reporting pipelines
+
+Education
+Bachelor of Science in Computer Science
+State University, 2012-2016
+
+Skills
+Python, JavaScript, React, SQL, Docker
+"""
+
+
+def _median_ms(func, text: str, runs: int = 50) -> float:
+    timings = []
+    for _ in range(runs):
+        extract_resume_features.cache_clear()
+        started = time.perf_counter()
+        func(text)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def test_sections_contact_and_dates_from_one_pass():
+    features = extract_resume_features(SAMPLE_RESUME)
+
+    assert [section["kind"] for section in features["sections"]] == ["summary", "experience", "education", "skills"]
+    assert features["contact_info"] == {
+        "email": "john.doe@example.com",
+        "phone": "(555) 123-4567",
+        "linkedin": "linkedin.com/in/johndoe"
+    }
+    assert features["date_ranges"] == ["2020 - Present", "2016-2020", "2012-2016"]
+    assert features["degrees"] == ["Bachelor"]
+
+
+def test_experience_and_education_entries():
+    features = extract_resume_features(SAMPLE_RESUME)
+
+    assert [(job["company"], job["duration"]) for job in features["experience"]] == [
+        ("Tech Corp", "2020 - Present"),
+        ("Web Works", "2016-2020"),
+    ]
+    assert "Designed REST APIs" in features["experience"][0]["description"]
+    assert features["education"] == [{
+        "degree": "Bachelor",
+        "institution": "State University",
+        "description": "Bachelor of Science in Computer Science\nState University, 2012-2016"
+    }]
+
+
+def test_fallback_analysis_keeps_its_shape():
+    analyzer = ResumeAnalyzer()
+    analysis = analyzer._fallback_analysis(SAMPLE_RESUME)
+
+    assert analysis["strengths"] == [
+        "Demonstrates improved experience",
+        "Demonstrates led experience",
+        "Demonstrates developed experience",
+        "Demonstrates designed experience",
+        "Demonstrates optimized experience",
+    ]
+    assert analysis["areas_for_improvement"] == []
+    assert analysis["summary"].startswith("john.doe@example.com")
+    assert "Python" in analysis["skills"]
+
+    # Callers get their own copies, not the cached entries
+    analysis["experience"][0]["company"] = "Changed"
+    assert analyzer._extract_experience(SAMPLE_RESUME)[0]["company"] == "Tech Corp"
+
+
+def test_sparse_resume_gets_every_improvement():
+    improvements = ResumeAnalyzer()._identify_improvements("Jane Roe\nLooking for work")
+
+    assert len(improvements) == 4
+
+
+def test_instant_tier_latency():
+    # A long (~4KB) resume must stay comfortably inside the 10ms budget
+    long_resume = SAMPLE_RESUME * 8
+    assert _median_ms(extract_resume_features, long_resume) < 10
+
+
+def run_benchmark():
+    def legacy(text):
+        re.findall(r'(?:experience|work|employment|job).*?(?=\n\n|\n[A-Z]|$)', text, re.IGNORECASE | re.DOTALL)
+        re.findall(r'(?:education|degree|university|college|school).*?(?=\n\n|\n[A-Z]|$)', text, re.IGNORECASE | re.DOTALL)
+        re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
+        re.search(r'(\+?1?[-.\s]?)?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})', text)
+        re.search(r'linkedin\.com/in/[A-Za-z0-9-]+', text, re.IGNORECASE)
+        for indicator in ACTION_VERBS:
+            re.search(rf'\b{indicator}\b', text, re.IGNORECASE)
+        re.search(r'\b\d{4}\b', text)
+        re.search(r'\b(?:achieved|improved|increased|decreased)\b', text, re.IGNORECASE)
+        re.search(r'\b(?:Python|Java|JavaScript|React|SQL)\b', text, re.IGNORECASE)
+
+    print("🧪 Resume fallback feature extraction (median per resume)")
+    print("=" * 50)
+    for repeats in (1, 8, 32):
+        text = SAMPLE_RESUME * repeats
+        print(
+            f"{len(text):>7,} chars: legacy {_median_ms(legacy, text):>6.2f} ms   "
+            f"single pass {_median_ms(extract_resume_features, text):>6.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests and benchmark for the vectorized BM25 similarity engine
+
+Run directly (python test_similarity.py) to compare it with the old set-based scoring.
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.job_matcher import JobMatcher
+from services.similarity import SimilarityEngine, rank_jobs, similarity_percentage
+from services.skill_taxonomy import get_skill_taxonomy
+
+RESUME = """Android developer building Kotlin apps with Jetpack Compose and Room.
+Shipped offline-first sync for a logistics fleet app. Also Python and SQL."""
+
+ANDROID_JOB = "We need an Android developer fluent in Kotlin and Jetpack Compose to build offline-first apps."
+HYDROLOGY_RESUME = "Hydrologist modelling groundwater flow, flood risk and river catchments for regional councils."
+HYDROLOGY_JOB = "Senior hydrologist to lead groundwater flow modelling and flood risk studies across river catchments."
+UNRELATED_JOB = "Pastry chef wanted for a busy bakery; laminated doughs and sourdough experience."
+
+
+job_matcher = JobMatcher()
+
+
+def set_based_percentage(resume_text: str, job_description: str) -> float:
+    """The scoring the engine replaced: taxonomy skill intersection over job skills"""
+    resume_skills = set(job_matcher._extract_skills_from_text(resume_text))
+    job_skills = set(job_matcher._extract_skills_from_job_description(job_description))
+    return len(resume_skills & job_skills) / len(job_skills) * 100 if job_skills else 0
+
+
+def synthetic_jobs(count: int, seed: int = 5):
+    rng = random.Random(seed)
+    names = [skill["name"] for skill in get_skill_taxonomy().skills]
+    words = ["platform", "customers", "payments", "pipeline", "mobile", "scale", "reliability", "growth", "search", "offline"]
+    return [
+        "Requirements:\n" + "\n".join(f"- {skill}" for skill in rng.sample(names, 6))
+        + "\nYou will work on " + " ".join(rng.sample(words, 4)) + "."
+        for _ in range(count)
+    ]
+
+
+def test_jobs_outside_the_taxonomy_still_score():
+    assert set_based_percentage(HYDROLOGY_RESUME, HYDROLOGY_JOB) == 0
+    assert similarity_percentage(HYDROLOGY_RESUME, HYDROLOGY_JOB) > 50
+    assert similarity_percentage(RESUME, UNRELATED_JOB) == 0
+
+
+def test_scores_are_deterministic_and_bounded():
+    jobs = synthetic_jobs(200)
+    first = rank_jobs(RESUME, jobs)
+
+    assert first == rank_jobs(RESUME, jobs)
+    assert all(0 <= score <= 100 for score in first)
+
+
+def test_one_vectorized_pass_scores_every_job():
+    jobs = [ANDROID_JOB, UNRELATED_JOB, "Requirements:\n- Python\n- SQL"]
+    engine = SimilarityEngine.from_job_descriptions(jobs)
+
+    batch = engine.coverage(RESUME)
+    assert batch.shape == (3,)
+    assert batch[1] == 0
+    assert batch[0] > 0 and batch[2] > 0
+    # Every job is scored from the same arrays
+    assert list(engine.scores(RESUME) > 0) == [True, False, True]
+
+
+def test_fallback_match_uses_similarity():
+    result = job_matcher._fallback_match(RESUME, ANDROID_JOB)
+
+    assert result["match_percentage"] == similarity_percentage(RESUME, ANDROID_JOB)
+    assert "Kotlin" in result["matching_skills"]
+
+
+def test_scoring_thousands_of_jobs_is_fast():
+    engine = SimilarityEngine.from_job_descriptions(synthetic_jobs(5_000))
+
+    started = time.perf_counter()
+    scores = engine.coverage(RESUME)
+    elapsed = time.perf_counter() - started
+
+    assert scores.shape == (5_000,)
+    assert elapsed < 0.05
+
+
+def run_benchmark(count: int = 5_000):
+    jobs = synthetic_jobs(count)
+
+    started = time.perf_counter()
+    for job in jobs:
+        set_based_percentage(RESUME, job)
+    set_based = time.perf_counter() - started
+
+    started = time.perf_counter()
+    engine = SimilarityEngine.from_job_descriptions(jobs)
+    build = time.perf_counter() - started
+
+    timings = []
+    for _ in range(20):
+        started = time.perf_counter()
+        engine.coverage(RESUME)
+        timings.append(time.perf_counter() - started)
+
+    print(f"🧪 Scoring one resume against {count:,} jobs")
+    print("=" * 50)
+    print(f"Set-based, job by job:            {set_based * 1000:>9.1f} ms")
+    print(f"BM25 engine build (once):         {build * 1000:>9.1f} ms")
+    print(f"BM25 vectorized score (best):     {min(timings) * 1000:>9.2f} ms")
+    print(f"Hydrology posting: set-based {set_based_percentage(HYDROLOGY_RESUME, HYDROLOGY_JOB):.1f}%, BM25 {similarity_percentage(HYDROLOGY_RESUME, HYDROLOGY_JOB):.1f}%")
+
+
+if __name__ == "__main__":
+    run_benchmark()
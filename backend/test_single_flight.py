@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Tests for coalescing identical in-flight LLM requests (offline, no OpenAI key required)
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.llm_cache import LLMCache
+from services.single_flight import SingleFlight
+from test_llm_cache import make_completion, request
+
+
+class SlowClient:
+    """Fake OpenAI client whose calls take a while, so identical requests overlap"""
+
+    def __init__(self, delay: float = 0.05, error: Exception = None):
+        self.calls = 0
+        self.finished = 0
+        self.delay = delay
+        self.error = error
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **params):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        self.finished += 1
+        if self.error is not None:
+            raise self.error
+        return make_completion(f"answer #{self.calls}", params["model"])
+
+
+def test_concurrent_identical_prompts_share_one_call():
+    # Coalescing does not depend on the response cache being enabled
+    cache = LLMCache(cache_dir="", enabled=False)
+    client = SlowClient()
+    prompts = ["career advice", "career  advice", "career advice\n"]
+
+    async def scenario():
+        return await asyncio.gather(*(
+            cache.create(client, endpoint="career_advice", **request(prompts[number % 3]))
+            for number in range(10)
+        ))
+
+    responses = asyncio.run(scenario())
+
+    assert client.calls == 1
+    assert {response.choices[0].message.content for response in responses} == {"answer #1"}
+    stats = cache.stats()
+    assert stats["coalesced"] == 9
+    assert stats["endpoints"]["career_advice"]["coalesced"] == 9
+    assert stats["single_flight"] == {"calls": 1, "coalesced": 9, "abandoned": 0, "cancelled": 0, "in_flight": 0}
+
+
+def test_different_parameters_are_not_coalesced():
+    cache = LLMCache(cache_dir="", enabled=False)
+    client = SlowClient()
+
+    async def scenario():
+        await asyncio.gather(
+            cache.create(client, endpoint="career_advice", **request("advice")),
+            cache.create(client, endpoint="career_advice", **request("advice", temperature=0.1)),
+            cache.create(client, endpoint="optimized_resume", use_cache=False, **request("advice")),
+        )
+
+    asyncio.run(scenario())
+
+    assert client.calls == 3
+    assert cache.stats()["coalesced"] == 0
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_call():
+    cache = LLMCache(cache_dir="", enabled=False)
+    client = SlowClient(delay=0.1)
+
+    async def scenario():
+        first = asyncio.create_task(cache.create(client, endpoint="career_advice", **request("advice")))
+        others = [asyncio.create_task(cache.create(client, endpoint="career_advice", **request("advice"))) for _ in range(3)]
+        await asyncio.sleep(0.02)
+        # The caller that started the upstream call disconnects
+        first.cancel()
+        results = await asyncio.gather(*others)
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert client.calls == 1
+    assert client.finished == 1
+    assert all(result.choices[0].message.content == "answer #1" for result in results)
+    assert cache.stats()["single_flight"]["abandoned"] == 1
+    assert cache.stats()["single_flight"]["cancelled"] == 0
+
+
+def test_call_is_cancelled_when_its_last_waiter_leaves():
+    cache = LLMCache(cache_dir="", enabled=False)
+    client = SlowClient(delay=0.1)
+
+    async def scenario():
+        waiters = [asyncio.create_task(cache.create(client, endpoint="career_advice", **request("advice"))) for _ in range(2)]
+        await asyncio.sleep(0.02)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0.15)
+
+    asyncio.run(scenario())
+
+    assert client.calls == 1
+    assert client.finished == 0
+    stats = cache.stats()["single_flight"]
+    assert (stats["abandoned"], stats["cancelled"], stats["in_flight"]) == (2, 1, 0)
+
+
+def test_upstream_error_reaches_every_waiter_and_is_not_remembered():
+    cache = LLMCache(cache_dir="", enabled=False)
+    client = SlowClient(error=RuntimeError("rate limited"))
+
+    async def scenario():
+        return await asyncio.gather(
+            *(cache.create(client, endpoint="career_advice", **request("advice")) for _ in range(4)),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert client.calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    client.error = None
+    response = asyncio.run(cache.create(client, endpoint="career_advice", **request("advice")))
+    assert client.calls == 2
+    assert response.choices[0].message.content == "answer #2"
+
+
+def test_stream_joins_an_identical_call_in_flight(tmp_path):
+    cache = LLMCache(cache_dir=str(tmp_path))
+    client = SlowClient()
+
+    async def scenario():
+        plain = asyncio.create_task(cache.create(client, endpoint="career_advice", **request("advice")))
+        await asyncio.sleep(0)
+        parts = [part async for part in cache.stream(client, endpoint="career_advice", **request("advice"))]
+        return await plain, parts
+
+    plain, parts = asyncio.run(scenario())
+
+    assert client.calls == 1
+    assert parts == [plain.choices[0].message.content]
+
+
+def test_finished_flights_are_forgotten():
+    flights = SingleFlight()
+
+    async def answer():
+        return 42
+
+    async def scenario():
+        assert await flights.do("key", answer) == 42
+        assert not flights.in_flight("key")
+        assert await flights.do("key", answer) == 42
+
+    asyncio.run(scenario())
+
+    assert flights.stats() == {"calls": 2, "coalesced": 0, "abandoned": 0, "cancelled": 0, "in_flight": 0}
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests and throughput benchmark for the shared skill taxonomy matcher
+
+Run directly (python test_skill_taxonomy.py) to print the benchmark report.
+"""
+
+import random
+import re
+import string
+import sys
+import time
+from pathlib import Path
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.skill_taxonomy import SkillTaxonomy, get_skill_taxonomy
+
+SAMPLE_TEXT = """
+Senior engineer working with python, React.js and k8s. Built REST APIs in Node.js,
+deployed with GitHub Actions and CI/CD pipelines to AWS. JavaScript, not Java.
+Some Go services (golang) and a little C++. Led the rest of the team.
+"""
+
+# The two alternation regexes the taxonomy replaced, kept for the benchmark baseline
+LEGACY_SKILL_PATTERNS = [
+    r'\b(?:Python|Java|JavaScript|React|Node\.js|Angular|Vue\.js|TypeScript|HTML|CSS|SQL|MongoDB|PostgreSQL|MySQL|AWS|Azure|Docker|Kubernetes|Git|GitHub|Agile|Scrum|JIRA|Jenkins|CI/CD|REST API|GraphQL|Microservices|Machine Learning|AI|Data Science|Tableau|Power BI|Excel|Word|PowerPoint|Photoshop|Illustrator|Figma|Sketch)\b',
+    r'\b(?:Programming|Development|Coding|Software|Web|Mobile|Database|Cloud|DevOps|Testing|QA|UI/UX|Design|Analytics|Business Intelligence|Project Management|Leadership|Communication|Problem Solving|Critical Thinking|Teamwork|Collaboration)\b'
+]
+
+
+def synthetic_taxonomy(size: int, seed: int = 7) -> SkillTaxonomy:
+    """The bundled taxonomy padded with random multi-word skills and aliases"""
+    rng = random.Random(seed)
+    skills = list(get_skill_taxonomy().skills)
+    for index in range(size - len(skills)):
+        words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))) for _ in range(rng.randint(1, 3))]
+        name = " ".join(word.capitalize() for word in words)
+        skills.append({"id": f"synthetic-{index}", "name": name, "aliases": [name.replace(" ", "") + "JS"]})
+    return SkillTaxonomy(skills)
+
+
+def benchmark_text(size: int = 100_000, seed: int = 11) -> str:
+    rng = random.Random(seed)
+    filler = [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10)))
+        for _ in range(2000)
+    ]
+    parts = []
+    while sum(map(len, parts)) < size:
+        parts.append(SAMPLE_TEXT)
+        parts.append(" ".join(rng.choices(filler, k=80)))
+    return "\n".join(parts)[:size]
+
+
+def _throughput(func, text: str, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - started)
+    return len(text) / best
+
+
+def test_aliases_resolve_to_canonical_names():
+    skills = get_skill_taxonomy().extract(SAMPLE_TEXT)
+
+    assert "React" in skills and "React.js" not in skills
+    assert "Kubernetes" in skills
+    assert "Python" in skills and "python" not in skills
+    assert skills.count("Go") == 1
+
+
+def test_case_variants_are_one_skill():
+    assert get_skill_taxonomy().extract("Python, python and PYTHON") == ["Python"]
+
+
+def test_case_sensitive_aliases_and_word_boundaries():
+    taxonomy = get_skill_taxonomy()
+
+    assert taxonomy.extract("Let's go to the rest of the meeting") == []
+    assert taxonomy.extract("JavaScript") == ["JavaScript"]
+    assert "REST API" in taxonomy.extract("Designed REST endpoints")
+
+
+def test_matches_carry_ids_and_positions():
+    text = "Expert in  Machine\nLearning and React.js"
+    matches = get_skill_taxonomy().find(text)
+
+    assert [(match.skill_id, match.surface) for match in matches] == [
+        ("machine-learning", "Machine\nLearning"),
+        ("react", "React.js"),
+    ]
+    assert text[matches[1].start:matches[1].end] == "React.js"
+
+
+def test_throughput_independent_of_taxonomy_size():
+    text = benchmark_text(50_000)
+    small = get_skill_taxonomy()
+    large = synthetic_taxonomy(5_000)
+
+    small_rate = _throughput(small.find, text)
+    large_rate = _throughput(large.find, text)
+
+    assert len(large) >= 5_000
+    # Single pass: 15x more patterns must not mean proportionally slower scans
+    assert large_rate > small_rate / 3
+
+
+def run_benchmark():
+    text = benchmark_text()
+
+    def legacy(body):
+        found = set()
+        for pattern in LEGACY_SKILL_PATTERNS:
+            found.update(re.findall(pattern, body, re.IGNORECASE))
+        return found
+
+    print("🧪 Skill matching throughput")
+    print("=" * 50)
+    print(f"Text size: {len(text):,} chars")
+    print(f"Legacy regexes (~60 skills):   {_throughput(legacy, text):>12,.0f} chars/s")
+    for size in (len(get_skill_taxonomy()), 1_000, 5_000, 20_000):
+        taxonomy = get_skill_taxonomy() if size == len(get_skill_taxonomy()) else synthetic_taxonomy(size)
+        print(f"Taxonomy ({len(taxonomy):>6,} skills):     {_throughput(taxonomy.find, text):>12,.0f} chars/s")
+
+
+if __name__ == "__main__":
+    run_benchmark()
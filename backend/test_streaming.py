@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Tests for SSE token streaming on the free-text generation endpoints
+
+These run fully offline against a fake OpenAI client that emits tokens slowly.
+"""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import main
+from services.llm_gateway import LLMGateway
+from services.llm_cache import LLMCache
+
+TOKENS = ["Focus ", "on ", "Python ", "depth."]
+TOKEN_DELAY = 0.1
+
+CAREER_REQUEST = {
+    "job_title": "Software Engineer",
+    "company": "Tech Corp",
+    "job_description": "Python and React developer",
+}
+
+
+def make_chunk(content=None, finish_reason=None) -> ChatCompletionChunk:
+    return ChatCompletionChunk.model_validate({
+        "id": "chatcmpl-stream-test",
+        "object": "chat.completion.chunk",
+        "created": 0,
+        "model": "gpt-4",
+        "choices": [{
+            "index": 0,
+            "delta": {"content": content} if content is not None else {},
+            "finish_reason": finish_reason
+        }]
+    })
+
+
+class StreamingCompletions:
+    """Fake `chat.completions` that streams TOKENS, or returns them all after the same delay"""
+
+    def __init__(self, fail_after=None):
+        self.calls = []
+        self.fail_after = fail_after
+
+    async def create(self, stream=False, **params):
+        self.calls.append({"stream": stream, **params})
+        if not stream:
+            await asyncio.sleep(TOKEN_DELAY * len(TOKENS))
+            return ChatCompletion.model_validate({
+                "id": "chatcmpl-test",
+                "object": "chat.completion",
+                "created": 0,
+                "model": params["model"],
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "".join(TOKENS)}}]
+            })
+        return self._chunks()
+
+    async def _chunks(self):
+        for index, token in enumerate(TOKENS):
+            if self.fail_after is not None and index == self.fail_after:
+                raise RuntimeError("upstream dropped the stream")
+            await asyncio.sleep(TOKEN_DELAY)
+            yield make_chunk(token)
+        yield make_chunk(finish_reason="stop")
+
+
+@pytest.fixture
+def completions(monkeypatch, tmp_path):
+    fake = StreamingCompletions()
+    cache = LLMCache(cache_dir=str(tmp_path))
+    client = SimpleNamespace(chat=SimpleNamespace(completions=fake))
+    monkeypatch.setattr(main, "llm_cache", cache)
+    monkeypatch.setattr(main, "llm_gateway", LLMGateway(client=client, cache=cache))
+    return fake
+
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+async def _stream(client, path, payload):
+    response = await client.post(path, params={"stream": "true"}, json=payload)
+    assert response.headers["content-type"].startswith("text/event-stream")
+    return response.text
+
+
+def _run(scenario):
+    async def wrapper():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await scenario(client)
+
+    return asyncio.run(wrapper())
+
+
+async def _first_body_chunk_delay(path: str, payload: dict) -> float:
+    """Drive the ASGI app directly (httpx's ASGITransport buffers whole responses)"""
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"stream=true",
+        "root_path": "", "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("test", 1), "server": ("test", 80),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    started = time.perf_counter()
+    first_chunk = None
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        nonlocal first_chunk
+        if message["type"] == "http.response.body" and b"event: token" in message.get("body", b"") and first_chunk is None:
+            first_chunk = time.perf_counter() - started
+
+    await main.app(scope, receive, send)
+    return first_chunk
+
+
+def test_tokens_arrive_before_the_completion_finishes(completions, monkeypatch):
+    monkeypatch.setattr(main.llm_cache, "enabled", False)
+    first_chunk = asyncio.run(_first_body_chunk_delay("/api/career-advice", CAREER_REQUEST))
+    body = _run(lambda client: _stream(client, "/api/career-advice", CAREER_REQUEST))
+
+    events = parse_sse(body)
+    assert [event["text"] for name, event in events if name == "token"] == TOKENS
+    # First token after one token's delay, not after the whole completion
+    assert first_chunk < TOKEN_DELAY * len(TOKENS) * 0.75
+    assert completions.calls[0]["stream"] is True
+    assert completions.calls[0]["stream_options"] == {"include_usage": True}
+
+
+def test_done_event_matches_the_non_streaming_payload(completions, monkeypatch):
+    monkeypatch.setattr(main.llm_cache, "enabled", False)
+
+    async def scenario(client):
+        body = await _stream(client, "/api/career-advice", CAREER_REQUEST)
+        plain = await client.post("/api/career-advice", json=CAREER_REQUEST)
+        return body, plain.json()
+
+    body, plain = _run(scenario)
+
+    name, payload = parse_sse(body)[-1]
+    assert name == "done"
+    assert payload == plain
+
+
+def test_suggestions_stream_parses_like_the_json_endpoint(completions):
+    request = {
+        "section_id": "summary",
+        "section_title": "Summary",
+        "original_content": "Engineer",
+        "job_title": "Engineer",
+        "job_description": "Python",
+        "matching_skills": ["Python"],
+        "missing_skills": [],
+    }
+    body = _run(lambda client: _stream(client, "/api/resume-suggestions", request))
+
+    name, payload = parse_sse(body)[-1]
+    assert name == "done"
+    assert payload["suggestions"] == ["Focus on Python depth."]
+
+
+def test_completed_stream_fills_the_cache(completions):
+    async def scenario(client):
+        await _stream(client, "/api/career-advice", CAREER_REQUEST)
+        return await client.post("/api/career-advice", json=CAREER_REQUEST)
+
+    plain = _run(scenario)
+
+    assert plain.json()["career_advice"] == "".join(TOKENS)
+    assert len(completions.calls) == 1
+
+
+def test_upstream_failure_ends_with_an_error_event(completions):
+    completions.fail_after = 2
+    body = _run(lambda client: _stream(client, "/api/career-advice", CAREER_REQUEST))
+
+    events = parse_sse(body)
+    assert [name for name, _ in events] == ["token", "token", "error"]
+    assert events[-1][1]["detail"].startswith("Failed to generate career advice")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Tests for asynchronous uploads: persisted job queue, status polling and websocket updates
+(offline, no OpenAI key required)
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Add the current directory to Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import main
+from services.upload_jobs import STAGES, UploadJobQueue, UploadJobStore
+from test_combined_analysis import MATCHING, install
+from test_prompt_context import JOB_DESCRIPTION, long_resume
+
+FORM = {"job_title": "Engineer", "company": "Acme", "job_description": JOB_DESCRIPTION}
+
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    queue = UploadJobQueue(main._process_upload_job, UploadJobStore(str(tmp_path / "jobs.sqlite3")), workers=2)
+    monkeypatch.setattr(main, "upload_jobs", queue)
+    install(monkeypatch, RuntimeError("combined mode is not used here"))
+    return queue
+
+
+def _submit(client: TestClient, resume: str = None, filename: str = "resume.txt"):
+    response = client.post(
+        "/api/upload",
+        files={"resume": (filename, (resume or long_resume()).encode(), "text/plain")},
+        data={**FORM, "async": "true"},
+    )
+    assert response.status_code == 202
+    return response.json()
+
+
+def _wait(client: TestClient, job_id: str) -> dict:
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        job = client.get(f"/api/upload/jobs/{job_id}").json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.02)
+    raise AssertionError("upload job did not finish")
+
+
+def test_async_upload_returns_a_job_and_polls_to_the_same_result(jobs):
+    with TestClient(main.app) as client:
+        submitted = _submit(client)
+        assert submitted["status"] == "queued"
+        assert submitted["stages"] == {stage: "pending" for stage in STAGES}
+        assert submitted["status_url"] == f"/api/upload/jobs/{submitted['job_id']}"
+
+        job = _wait(client, submitted["job_id"])
+        direct = client.post(
+            "/api/upload",
+            files={"resume": ("resume.txt", long_resume().encode(), "text/plain")},
+            data=FORM,
+        ).json()
+
+    assert job["status"] == "done"
+    assert job["stages"] == {stage: "done" for stage in STAGES}
+    assert job["result"] == direct
+    assert job["result"]["job_matching"]["match_percentage"] == MATCHING["match_percentage"]
+
+
+def test_websocket_pushes_every_stage_until_done(jobs):
+    async def slow_start(job, progress):
+        # Long enough for the websocket to connect before the first stage begins
+        await asyncio.sleep(0.3)
+        return await main._process_upload_job(job, progress)
+
+    jobs.handler = slow_start
+    with TestClient(main.app) as client:
+        submitted = _submit(client)
+        updates = []
+        with client.websocket_connect(submitted["websocket_url"]) as websocket:
+            while not updates or updates[-1]["status"] not in ("done", "failed"):
+                updates.append(websocket.receive_json())
+
+    assert updates[0]["result"] is None
+    assert updates[-1]["status"] == "done"
+    assert updates[-1]["result"]["recommendations"]
+    extracting = [update["stages"]["extracting"] for update in updates]
+    assert extracting.index("running") < extracting.index("done")
+    for stage in STAGES[1:]:
+        states = [update["stages"][stage] for update in updates]
+        assert states.index("pending") < states.index("running") < states.index("done")
+
+
+def test_unknown_jobs_are_not_found(jobs):
+    with TestClient(main.app) as client:
+        assert client.get("/api/upload/jobs/missing").status_code == 404
+
+
+def test_unreadable_upload_fails_the_job(jobs):
+    with TestClient(main.app) as client:
+        job = _wait(client, _submit(client, "   ")["job_id"])
+
+    assert job["status"] == "failed"
+    assert job["stages"]["extracting"] == "failed"
+    assert "Could not extract text" in job["error"]
+
+
+def test_unfinished_jobs_survive_a_restart(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    store = UploadJobStore(path)
+    queued = store.create("resume.txt", b"queued resume", {"job_description": "Python"})
+    interrupted = store.create("resume.txt", b"interrupted resume", {"job_description": "Go"})
+    store.update(interrupted, status="running", stages={**{stage: "pending" for stage in STAGES}, "extracting": "running"})
+    store.close()
+
+    handled = []
+
+    async def handler(job, progress):
+        handled.append(job["file"])
+        return {"echo": job["job_description"]}
+
+    async def scenario():
+        queue = UploadJobQueue(handler, UploadJobStore(path), workers=1)
+        await queue.start()
+        results = []
+        for job_id in (queued, interrupted):
+            async for job in queue.watch(job_id):
+                pass
+            results.append(job)
+        await queue.stop()
+        return results
+
+    first, second = asyncio.run(scenario())
+
+    assert handled == [b"queued resume", b"interrupted resume"]
+    assert (first["status"], first["result"]) == ("done", {"echo": "Python"})
+    assert (second["status"], second["result"]) == ("done", {"echo": "Go"})
+    # Finished jobs no longer keep the upload
+    assert UploadJobStore(path).inputs(queued) is None
+
+
+def test_worker_pool_bounds_concurrent_jobs(tmp_path):
+    running, peak = 0, 0
+
+    async def handler(job, progress):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        return {}
+
+    async def scenario():
+        queue = UploadJobQueue(handler, UploadJobStore(str(tmp_path / "jobs.sqlite3")), workers=2)
+        submitted = [await queue.submit("resume.txt", b"resume", {}) for _ in range(6)]
+        for job in submitted:
+            async for _ in queue.watch(job["job_id"]):
+                pass
+        await queue.stop()
+        return [(await queue.get(job["job_id"]))["status"] for job in submitted]
+
+    assert asyncio.run(scenario()) == ["done"] * 6
+    assert peak == 2
+
+
+def test_store_is_only_opened_when_the_queue_starts(tmp_path, monkeypatch):
+    path = tmp_path / "jobs" / "jobs.sqlite3"
+    monkeypatch.setenv("UPLOAD_JOBS_DB", str(path))
+    queue = UploadJobQueue(main._process_upload_job, workers=1)
+    assert not path.parent.exists()
+
+    async def scenario():
+        await queue.start()
+        await queue.stop()
+
+    asyncio.run(scenario())
+    assert path.exists()
+
+
+def test_finished_jobs_expire_while_the_queue_runs(tmp_path):
+    async def handler(job, progress):
+        progress("extracting", "running")
+        progress("extracting", "done")
+        return {}
+
+    async def scenario():
+        queue = UploadJobQueue(handler, UploadJobStore(str(tmp_path / "jobs.sqlite3")), workers=1, max_age=0.05, prune_interval=0.05)
+        submitted = await queue.submit("resume.txt", b"resume", {})
+        async for job in queue.watch(submitted["job_id"]):
+            pass
+        await asyncio.sleep(0.2)
+        expired = await queue.get(submitted["job_id"])
+        await queue.stop()
+        return job, expired
+
+    finished, expired = asyncio.run(scenario())
+
+    assert finished["status"] == "done"
+    assert finished["stages"]["extracting"] == "done"
+    assert expired is None
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
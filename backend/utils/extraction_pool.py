@@ -0,0 +1,178 @@
+import asyncio
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+try:
+    import resource
+except ImportError:  # Windows has no rlimits; the memory cap is skipped there
+    resource = None
+
+
+class ExtractionError(Exception):
+    """Base class for documents the extraction pool could not process"""
+
+
+class ExtractionTimeoutError(ExtractionError):
+    """The document took longer than the per-job wall-clock limit"""
+
+
+class ExtractionWorkerCrashed(ExtractionError):
+    """The worker died (or hit its memory cap) while parsing the document"""
+
+
+def _apply_memory_limit(memory_limit: int):
+    if resource is None or memory_limit <= 0:
+        return
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    except (ValueError, OSError) as e:
+        print(f"Could not apply extraction memory limit: {str(e)}")
+
+
+def _worker_main(conn, parser: Callable, memory_limit: int):
+    """Worker process loop: parse one (data, extension) job at a time"""
+    _apply_memory_limit(memory_limit)
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+
+        data, file_extension = job
+        try:
+            conn.send(("ok", parser(data, file_extension)))
+        except MemoryError:
+            conn.send(("memory", "Document exceeded the extraction memory limit"))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+
+class _Worker:
+    def __init__(self, context, parser: Callable, memory_limit: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, parser, memory_limit),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.join(timeout=5)
+        finally:
+            self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+class ExtractionPool:
+    """
+    Bounded pool of document-parsing worker processes.
+    Each job gets a hard wall-clock timeout and an address-space cap; a worker
+    that times out or crashes is killed and replaced without touching the others.
+    """
+
+    def __init__(
+        self,
+        parser: Callable,
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+        memory_limit: Optional[int] = None
+    ):
+        self.parser = parser
+        self.max_workers = max_workers or int(os.getenv("EXTRACTION_WORKERS", "0")) or os.cpu_count() or 2
+        self.timeout = timeout or float(os.getenv("EXTRACTION_TIMEOUT", "20"))
+        self.memory_limit = memory_limit if memory_limit is not None else int(os.getenv("EXTRACTION_MEMORY_LIMIT", str(512 * 1024 * 1024)))
+
+        # spawn keeps workers independent of the server's threads and event loop
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"jobs": 0, "timeouts": 0, "crashes": 0, "restarts": 0}
+
+    def start(self):
+        """Spawn the worker processes (called lazily on first use)"""
+        with self._lock:
+            if self._executor is not None:
+                return
+            for _ in range(self.max_workers):
+                self._idle.put(self._spawn())
+            # One thread per worker blocks on that worker's pipe
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="extraction")
+
+    def shutdown(self):
+        """Stop all idle workers"""
+        with self._lock:
+            if self._executor is None:
+                return
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            while not self._idle.empty():
+                self._idle.get_nowait().stop()
+
+    async def extract(self, data: bytes, file_extension: str) -> str:
+        """Parse `data` in a worker process and return its text"""
+        self.start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._run_job, data, file_extension)
+
+    def stats(self) -> Dict:
+        return {**self._stats, "workers": self.max_workers}
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._context, self.parser, self.memory_limit)
+
+    def _count(self, counter: str):
+        with self._stats_lock:
+            self._stats[counter] += 1
+
+    def _run_job(self, data: bytes, file_extension: str) -> str:
+        worker = self._idle.get()
+        self._count("jobs")
+        healthy = False
+        try:
+            try:
+                worker.conn.send((data, file_extension))
+                if not worker.conn.poll(self.timeout):
+                    self._count("timeouts")
+                    raise ExtractionTimeoutError(f"Document parsing exceeded {self.timeout:g}s")
+                status, payload = worker.conn.recv()
+            except (EOFError, OSError):
+                self._count("crashes")
+                raise ExtractionWorkerCrashed("Document parser crashed while processing the file")
+
+            if status == "memory":
+                self._count("crashes")
+                raise ExtractionWorkerCrashed(payload)
+
+            healthy = True
+            if status == "error":
+                raise ExtractionError(payload)
+            return payload
+        finally:
+            if healthy:
+                self._idle.put(worker)
+            else:
+                # A stuck, crashed or memory-exhausted worker is never reused
+                worker.kill()
+                self._count("restarts")
+                self._idle.put(self._spawn())
@@ -1,15 +1,26 @@
+import hashlib
+import io
 import os
-import uuid
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Optional, Tuple, Union
 import PyPDF2
 from docx import Document
-import io
+from utils.extraction_pool import ExtractionPool
+from utils.text_cache import ExtractedTextCache
+
+class FileTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limit"""
 
 class FileHandler:
     def __init__(self):
-        self.upload_dir = Path("uploads")
-        self.upload_dir.mkdir(exist_ok=True)
+        self.max_file_size = int(os.getenv("MAX_FILE_SIZE", str(5 * 1024 * 1024)))
+        self.chunk_size = 64 * 1024
+        
+        # Extracted text of recently seen files, keyed by content digest
+        self.text_cache = ExtractedTextCache()
+        
+        # PDF/DOCX parsing runs in worker processes with per-document limits
+        self.extraction_pool = ExtractionPool(parse_document)
         
         # Allowed file extensions and their MIME types
         self.allowed_extensions = {
@@ -27,87 +38,115 @@ class FileHandler:
         file_extension = Path(filename).suffix.lower()
         return file_extension in self.allowed_extensions
     
-    def save_uploaded_file(self, file) -> Path:
-        """Save uploaded file to disk"""
-        # Get file extension
-        file_extension = Path(file.filename).suffix.lower()
+    def read_upload(self, file) -> Tuple[str, int]:
+        """
+        Hash the spooled upload in bounded chunks, enforcing the size limit.
+        Returns the SHA-256 digest and size; the stream is rewound for the parsers.
+        """
+        # Reject early when the multipart parser already knows the size
+        declared_size = getattr(file, "size", None)
+        if declared_size is not None and declared_size > self.max_file_size:
+            raise FileTooLargeError(f"File exceeds the {self.max_file_size} byte limit")
         
-        # Create unique filename
-        unique_id = str(uuid.uuid4())
-        filename = f"{unique_id}{file_extension}"
-        file_path = self.upload_dir / filename
+        stream = file.file
+        stream.seek(0)
+        digest = hashlib.sha256()
+        size = 0
+        while True:
+            chunk = stream.read(self.chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > self.max_file_size:
+                raise FileTooLargeError(f"File exceeds the {self.max_file_size} byte limit")
+            digest.update(chunk)
         
-        # Save file
-        with open(file_path, 'wb') as f:
-            content = file.file.read()
-            f.write(content)
-        
-        return file_path
-    
-    def extract_text_from_file(self, file_path: Path) -> Optional[str]:
-        """Extract text from various file formats"""
-        try:
-            file_extension = file_path.suffix.lower()
-            
-            if file_extension == '.pdf':
-                return self._extract_text_from_pdf(file_path)
-            elif file_extension in ['.doc', '.docx']:
-                return self._extract_text_from_docx(file_path)
-            elif file_extension == '.txt':
-                return self._extract_text_from_txt(file_path)
-            else:
-                return None
-                
-        except Exception as e:
-            print(f"Error extracting text from file {file_path}: {str(e)}")
-            return None
+        stream.seek(0)
+        return digest.hexdigest(), size
     
-    def _extract_text_from_pdf(self, file_path: Path) -> str:
-        """Extract text from PDF file"""
-        try:
-            with open(file_path, 'rb') as f:
-                content = f.read()
-            
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
-            text = ""
-            
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            
-            return text.strip()
-        except Exception as e:
-            print(f"Error reading PDF file: {str(e)}")
-            return ""
+    async def extract_text_from_upload(self, file, file_digest: Optional[str] = None, file_size: int = 0) -> Optional[str]:
+        """Extract text from an uploaded file, parsing PDF/DOCX in the worker process pool"""
+        if file_digest:
+            cached_text = self.text_cache.get(file_digest)
+            if cached_text is not None:
+                return cached_text
+        
+        file_extension = Path(file.filename).suffix.lower()
+        if file_extension == '.txt':
+            # Plain text is cheap enough to decode inline
+            text = parse_document(file.file, file_extension)
+        else:
+            text = await self.extraction_pool.extract(file.file.read(), file_extension)
+        
+        if file_digest and text:
+            self.text_cache.put(file_digest, text, file_size)
+        
+        return text
     
-    def _extract_text_from_docx(self, file_path: Path) -> str:
-        """Extract text from DOCX file"""
-        try:
-            doc = Document(file_path)
-            text = ""
-            
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            
-            return text.strip()
-        except Exception as e:
-            print(f"Error reading DOCX file: {str(e)}")
-            return ""
+    async def extract_text_from_bytes(self, data: bytes, filename: str) -> Optional[str]:
+        """Extract text from file contents held in memory (e.g. a queued upload)"""
+        file_digest = hashlib.sha256(data).hexdigest()
+        cached_text = self.text_cache.get(file_digest)
+        if cached_text is not None:
+            return cached_text
+        
+        file_extension = Path(filename).suffix.lower()
+        if file_extension == '.txt':
+            text = parse_document(data, file_extension)
+        else:
+            text = await self.extraction_pool.extract(data, file_extension)
+        
+        if text:
+            self.text_cache.put(file_digest, text, len(data))
+        
+        return text
+
+def parse_document(source: Union[Path, BinaryIO, bytes], file_extension: str) -> Optional[str]:
+    """Parse a document by extension; runs both in-process and inside extraction workers"""
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
     
-    def _extract_text_from_txt(self, file_path: Path) -> str:
-        """Extract text from TXT file"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
+    if file_extension == '.pdf':
+        return _extract_text_from_pdf(source)
+    elif file_extension in ['.doc', '.docx']:
+        return _extract_text_from_docx(source)
+    elif file_extension == '.txt':
+        return _extract_text_from_txt(source)
+    else:
+        return None
+
+def _extract_text_from_pdf(source: Union[Path, BinaryIO]) -> str:
+    """Extract text from PDF file"""
+    try:
+        pdf_reader = PyPDF2.PdfReader(source)
+        return "\n".join(page.extract_text() for page in pdf_reader.pages).strip()
+    except MemoryError:
+        # Let the extraction worker report the memory limit instead of returning no text
+        raise
+    except Exception as e:
+        print(f"Error reading PDF file: {str(e)}")
+        return ""
+
+def _extract_text_from_docx(source: Union[Path, BinaryIO]) -> str:
+    """Extract text from DOCX file"""
+    try:
+        doc = Document(source)
+        return "\n".join(paragraph.text for paragraph in doc.paragraphs).strip()
+    except MemoryError:
+        raise
+    except Exception as e:
+        print(f"Error reading DOCX file: {str(e)}")
+        return ""
+
+def _extract_text_from_txt(source: Union[Path, BinaryIO]) -> str:
+    """Extract text from TXT file"""
+    try:
+        if isinstance(source, (str, Path)):
+            with open(source, 'r', encoding='utf-8') as f:
                 content = f.read()
-            return content.strip()
-        except Exception as e:
-            print(f"Error reading TXT file: {str(e)}")
-            return ""
-    
-    def cleanup_file(self, file_path: Path):
-        """Remove processed file from disk"""
-        try:
-            if file_path.exists():
-                file_path.unlink()
-                print(f"Cleaned up file: {file_path}")
-        except Exception as e:
-            print(f"Error cleaning up file {file_path}: {str(e)}") 
\ No newline at end of file
+        else:
+            content = source.read().decode('utf-8')
+        return content.strip()
+    except Exception as e:
+        print(f"Error reading TXT file: {str(e)}")
+        return ""
@@ -0,0 +1,63 @@
+import os
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class ExtractedTextCache:
+    """LRU cache of extracted resume text keyed by the SHA-256 of the uploaded file"""
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        # Budget for the cached text itself, measured in UTF-8 bytes
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+        # digest -> (text, text_bytes, source_bytes)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._current_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._bytes_saved = 0
+
+    def get(self, digest: str) -> Optional[str]:
+        """Return the cached text for a file digest, or None"""
+        entry = self._entries.get(digest)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(digest)
+        self._hits += 1
+        # A hit means the source file never had to be parsed again
+        self._bytes_saved += entry[2]
+        return entry[0]
+
+    def put(self, digest: str, text: str, source_bytes: int):
+        """Cache the text extracted from a file of `source_bytes` bytes"""
+        text_bytes = len(text.encode("utf-8"))
+        if text_bytes > self.max_bytes:
+            return
+
+        if digest in self._entries:
+            self._current_bytes -= self._entries.pop(digest)[1]
+
+        self._entries[digest] = (text, text_bytes, source_bytes)
+        self._current_bytes += text_bytes
+
+        while self._current_bytes > self.max_bytes:
+            _, (_, evicted_bytes, _) = self._entries.popitem(last=False)
+            self._current_bytes -= evicted_bytes
+            self._evictions += 1
+
+    def stats(self) -> Dict:
+        """Hit rate, eviction and bytes-saved counters"""
+        lookups = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            "bytes_saved": self._bytes_saved,
+            "evictions": self._evictions,
+            "entries": len(self._entries),
+            "current_bytes": self._current_bytes,
+            "max_bytes": self.max_bytes
+        }